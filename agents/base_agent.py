@@ -0,0 +1,246 @@
+"""
+Base class for the specialist agents (billing, technical, sales)
+Holds the shared plumbing: LLM client, context gathering, conversation memory
+and the sync/async entry points. Subclasses provide the prompt and data.
+
+Prompts are laid out from most to least stable so consecutive requests share
+the longest possible prefix (which Ollama can serve from its KV cache):
+system message = system prompt, instructions and reference data that are the
+same for every customer; user message = customer data, conversation,
+retrieved knowledge and finally the query.
+"""
+import logging
+import time
+from abc import ABC, abstractmethod
+from langchain_core.messages import HumanMessage, SystemMessage
+from database.db_manager import DatabaseManager
+from database.async_db_manager import AsyncDatabaseManager
+from rag.retriever import RAGRetriever, NO_CONTEXT_MESSAGE
+from agents.parallel import run_parallel, arun_parallel, DB_TIMEOUT, RAG_TIMEOUT
+from agents.prompt_builder import PromptBuilder, PromptSection, BuiltPrompt
+from agents.conversation_memory import ConversationMemory, MemoryContext, get_conversation_memory, prior_turns
+from config.ollama import create_chat_model
+from observability.log import get_logger
+from observability.tracing import span
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+ACCOUNT_NOT_FOUND_MESSAGE = "I couldn't find your account. Please verify your customer ID."
+
+class SpecialistAgent(ABC):
+    # Keyword arguments for DatabaseManager.get_agent_context
+    context_options: Dict = {}
+    # Header of the retrieved knowledge section
+    knowledge_header: str = "RELEVANT INFORMATION:"
+    # Answering rules, part of the stable prompt prefix
+    instructions: List[str] = []
+    
+    def __init__(self, temperature: float, db: DatabaseManager = None,
+                 retriever: RAGRetriever = None, memory: ConversationMemory = None):
+        self.llm = create_chat_model(temperature=temperature)
+        self.db = db or DatabaseManager()
+        self.async_db = AsyncDatabaseManager(self.db)
+        self.retriever = retriever or RAGRetriever()
+        self.prompt_builder = PromptBuilder()
+        # Shared running summaries of earlier turns (None: last messages verbatim)
+        self.memory = memory if memory is not None else get_conversation_memory()
+        self.system_prompt = ""
+    
+    # Hooks implemented by each specialist
+    @abstractmethod
+    def retrieve_knowledge(self, query: str) -> List[str]:
+        """Knowledge base chunks for this specialist, best first"""
+    
+    @abstractmethod
+    async def aretrieve_knowledge(self, query: str) -> List[str]:
+        """Async version of retrieve_knowledge"""
+    
+    def reference_sections(self, customer_context: Dict) -> List[PromptSection]:
+        """Stable sections with reference data that is the same for every customer"""
+        return []
+    
+    @abstractmethod
+    def build_sections(self, customer_context: Dict, personalize: bool = True) -> List[PromptSection]:
+        """
+        Prompt sections from the customer's own data
+        With personalize=False only the customer's plan may appear, so the
+        answer can be shared with other customers on the same plan.
+        """
+    
+    # Entry points
+    def get_customer_context(self, customer_id: str, personalize: bool = True) -> Optional[Dict]:
+        """
+        The customer data this agent's prompt uses (one DB round trip)
+        Callers that need it before answering pass it on as customer_context,
+        so the entry points below don't fetch it again.
+        """
+        return self.db.get_agent_context(customer_id, **self._context_options(personalize))
+    
+    async def aget_customer_context(self, customer_id: str, personalize: bool = True) -> Optional[Dict]:
+        """Async version of get_customer_context"""
+        return await self.async_db.get_agent_context(customer_id, **self._context_options(personalize))
+    
+    def handle_query(self, customer_id: str, query: str, history: List[Dict] = None,
+                     personalize: bool = True, customer_context: Dict = None) -> str:
+        """Handle a customer query with conversation history"""
+        return "".join(self.stream_query(customer_id, query, history, personalize, customer_context))
+    
+    async def ahandle_query(self, customer_id: str, query: str, history: List[Dict] = None,
+                            personalize: bool = True, customer_context: Dict = None) -> str:
+        """Async version of handle_query (non-blocking DB, embedding and LLM calls)"""
+        chunks = [chunk async for chunk in self.astream_query(customer_id, query, history, personalize,
+                                                              customer_context)]
+        return "".join(chunks)
+    
+    def stream_query(self, customer_id: str, query: str, history: List[Dict] = None,
+                     personalize: bool = True, customer_context: Dict = None) -> Iterator[str]:
+        """Handle a customer query, yielding the response as the LLM generates it"""
+        messages = self._prepare_messages(customer_id, query, history, personalize, customer_context)
+        if messages is None:
+            yield ACCOUNT_NOT_FOUND_MESSAGE
+            return
+        
+        with span("llm", agent=self.__class__.__name__) as generation:
+            for chunk in self.llm.stream(messages):
+                if chunk.content:
+                    generation.attributes.setdefault("first_token_s", time.perf_counter() - generation.start)
+                    yield chunk.content
+    
+    async def astream_query(self, customer_id: str, query: str, history: List[Dict] = None,
+                            personalize: bool = True, customer_context: Dict = None) -> AsyncIterator[str]:
+        """Async version of stream_query"""
+        messages = await self._aprepare_messages(customer_id, query, history, personalize, customer_context)
+        if messages is None:
+            yield ACCOUNT_NOT_FOUND_MESSAGE
+            return
+        
+        with span("llm", agent=self.__class__.__name__) as generation:
+            async for chunk in self.llm.astream(messages):
+                if chunk.content:
+                    generation.attributes.setdefault("first_token_s", time.perf_counter() - generation.start)
+                    yield chunk.content
+    
+    # Context gathering
+    def _prepare_messages(self, customer_id: str, query: str, history: List[Dict],
+                          personalize: bool, customer_context: Dict = None) -> Optional[List]:
+        """Fetch customer data (unless given) and knowledge, then build the chat messages"""
+        memory = self._memory_context(customer_id, query, history) if personalize else None
+        
+        # Fetch customer data (one DB round trip) and knowledge (RAG) concurrently
+        tasks = {'knowledge_context': lambda: self._retrieve(query)}
+        if customer_context is None:
+            tasks['customer_context'] = lambda: self.get_customer_context(customer_id, personalize)
+        results = run_parallel(
+            tasks,
+            timeouts={'customer_context': DB_TIMEOUT, 'knowledge_context': RAG_TIMEOUT},
+            fallbacks={'knowledge_context': []}
+        )
+        if customer_context is not None:
+            results['customer_context'] = customer_context
+        return self._build_messages(results, query, memory, personalize)
+    
+    async def _aprepare_messages(self, customer_id: str, query: str, history: List[Dict],
+                                 personalize: bool, customer_context: Dict = None) -> Optional[List]:
+        """Async version of _prepare_messages"""
+        memory = self._memory_context(customer_id, query, history) if personalize else None
+        tasks = {'knowledge_context': self._aretrieve(query)}
+        if customer_context is None:
+            tasks['customer_context'] = self.aget_customer_context(customer_id, personalize)
+        results = await arun_parallel(
+            tasks,
+            timeouts={'customer_context': DB_TIMEOUT, 'knowledge_context': RAG_TIMEOUT},
+            fallbacks={'knowledge_context': []}
+        )
+        if customer_context is not None:
+            results['customer_context'] = customer_context
+        return self._build_messages(results, query, memory, personalize)
+    
+    # Helpers
+    def _retrieve(self, query: str) -> List[str]:
+        with span("retrieval", agent=self.__class__.__name__):
+            return self.retrieve_knowledge(query)
+    
+    async def _aretrieve(self, query: str) -> List[str]:
+        with span("retrieval", agent=self.__class__.__name__):
+            return await self.aretrieve_knowledge(query)
+    
+    def _context_options(self, personalize: bool) -> Dict:
+        """get_agent_context options; unpersonalized answers skip the customer's rows"""
+        if personalize:
+            return self.context_options
+        return {
+            'billing_limit': 0,
+            'failed_limit': 0,
+            'ticket_limit': 0,
+            'include_plans': self.context_options.get('include_plans', False),
+        }
+    
+    def _memory_context(self, customer_id: str, query: str, history: List[Dict]) -> MemoryContext:
+        """Conversation summary and recent messages (schedules the next summary update)"""
+        if self.memory is None:
+            return MemoryContext("", prior_turns(query, history)[-6:], 0)
+        return self.memory.context(customer_id, history, query)
+    
+    def _build_messages(self, results: Dict, query: str, memory: Optional[MemoryContext],
+                        personalize: bool = True) -> Optional[List]:
+        """Chat messages for the LLM, or None if the customer was not found"""
+        customer_context = results['customer_context']
+        if not customer_context:
+            return None
+        
+        prompt = self.build_prompt(self.prompt_sections(customer_context, results['knowledge_context'],
+                                                        query, memory, personalize))
+        # Per-section token usage of every turn (skipped when INFO is filtered out)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("📏 %s prompt: %s", self.__class__.__name__, prompt.describe())
+        
+        system_prompt = f"{self.system_prompt}\n{prompt.prefix}" if prompt.prefix else self.system_prompt
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=prompt.text)
+        ]
+    
+    def prompt_sections(self, customer_context: Dict, knowledge_chunks: List[str], query: str,
+                        memory: Optional[MemoryContext], personalize: bool = True) -> List[PromptSection]:
+        """Every prompt section, most stable first"""
+        sections = [self._instructions_section()] + self.reference_sections(customer_context)
+        sections += self.build_sections(customer_context, personalize)
+        if memory is not None:
+            sections += self._memory_sections(memory)
+        return sections + [self._knowledge_section(knowledge_chunks), self._query_section(query)]
+    
+    def build_prompt(self, sections: List[PromptSection]) -> BuiltPrompt:
+        """Fit the sections into the token budget left after the system prompt"""
+        system_tokens = self.prompt_builder.counter.count(self.system_prompt)
+        return self.prompt_builder.build(sections, reserved_tokens=system_tokens)
+    
+    # Shared sections
+    def _memory_sections(self, memory: MemoryContext) -> List[PromptSection]:
+        """Summary of earlier turns, then recent messages (the oldest are dropped first)"""
+        items = [
+            f"{'Customer' if msg['role'] == 'user' else 'Agent'}: {msg['content']}"
+            for msg in memory.recent
+        ]
+        return [
+            PromptSection("summary", memory.summary, header="CONVERSATION SUMMARY:"),
+            PromptSection(
+                "history", items, header="PREVIOUS CONVERSATION:" if not memory.summary else "RECENT MESSAGES:",
+                keep="last", item_max_tokens=self.prompt_builder.settings['history_message_tokens']
+            ),
+        ]
+    
+    def _knowledge_section(self, knowledge_chunks: List[str]) -> PromptSection:
+        """Knowledge base chunks; the lowest ranked are dropped first"""
+        return PromptSection("knowledge", knowledge_chunks, header=self.knowledge_header,
+                             empty_text=NO_CONTEXT_MESSAGE)
+    
+    def _query_section(self, query: str) -> PromptSection:
+        return PromptSection("query", query, header="CURRENT CUSTOMER MESSAGE:", required=True)
+    
+    def _instructions_section(self) -> PromptSection:
+        return PromptSection("instructions", [f"- {line}" for line in self.instructions],
+                             header="INSTRUCTIONS:", required=True, stable=True)
@@ -1,25 +1,26 @@
 """
 Billing Agent - Handles payment, refund, and subscription queries
 """
-from langchain_ollama import ChatOllama
-from langchain_core.messages import HumanMessage, SystemMessage
+from agents.base_agent import SpecialistAgent
+from agents.prompt_builder import PromptSection
+from agents.conversation_memory import ConversationMemory
 from database.db_manager import DatabaseManager
 from rag.retriever import RAGRetriever
-from typing import List, Dict
-import os
-from dotenv import load_dotenv
+from typing import Dict, List
 
-load_dotenv()
-
-class BillingAgent:
-    def __init__(self):
-        self.llm = ChatOllama(
-            model=os.getenv("OLLAMA_MODEL", "llama3.1"),
-            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-            temperature=0.3
-        )
-        self.db = DatabaseManager()
-        self.retriever = RAGRetriever()
+class BillingAgent(SpecialistAgent):
+    # Recent billing rows and all failed payments, no tickets
+    context_options = {'billing_limit': 5, 'failed_limit': None, 'ticket_limit': 0}
+    knowledge_header = "RELEVANT POLICIES:"
+    instructions = [
+        "If this is a follow-up to previous conversation, acknowledge the context",
+        "Answer the current question while considering conversation history",
+        "Be conversational and natural",
+    ]
+    
+    def __init__(self, db: DatabaseManager = None, retriever: RAGRetriever = None,
+                 memory: ConversationMemory = None):
+        super().__init__(temperature=0.3, db=db, retriever=retriever, memory=memory)
         
         self.system_prompt = """You are a billing specialist at Assistly customer support.
 
@@ -41,73 +42,41 @@ Guidelines:
 Tone: Professional, empathetic, solution-oriented
 """
     
-    def handle_query(self, customer_id: str, query: str, history: List[Dict] = None) -> str:
-        """Handle billing-related query with conversation history"""
-        
-        # Get customer data
-        customer = self.db.get_customer(customer_id)
-        if not customer:
-            return "I couldn't find your account. Please verify your customer ID."
-        
-        # Get billing history
-        billing_history = self.db.get_billing_history(customer_id)
-        failed_payments = self.db.get_failed_payments(customer_id)
-        
-        # Get relevant knowledge from RAG
-        knowledge_context = self.retriever.retrieve_for_billing(query)
-        
-        # Format conversation history
-        history_text = ""
-        if history and len(history) > 0:
-            history_text = "PREVIOUS CONVERSATION:\n"
-            # Show last 6 messages (3 exchanges)
-            for msg in history[-6:]:
-                role = "Customer" if msg['role'] == 'user' else "Agent"
-                history_text += f"{role}: {msg['content']}\n"
-            history_text += "\n"
+    def retrieve_knowledge(self, query: str) -> List[str]:
+        """Get relevant policies from RAG"""
+        return self.retriever.retrieve_chunks_for_route("billing", query)
+    
+    async def aretrieve_knowledge(self, query: str) -> List[str]:
+        """Async version of retrieve_knowledge"""
+        return await self.retriever.aretrieve_chunks_for_route("billing", query)
+    
+    def build_sections(self, customer_context: Dict, personalize: bool = True) -> List[PromptSection]:
+        """Build billing prompt sections"""
+        customer = customer_context['customer']
         
-        # Build context
-        context = f"""
-{history_text}CUSTOMER INFORMATION:
-- Name: {customer['name']}
-- Email: {customer['email']}
-- Current Plan: {customer['plan']}
-
-RECENT BILLING HISTORY:
-{self._format_billing_history(billing_history[:5])}
-
-FAILED PAYMENTS:
-{self._format_billing_history(failed_payments) if failed_payments else "None"}
-
-RELEVANT POLICIES:
-{knowledge_context}
-
-CURRENT CUSTOMER MESSAGE:
-{query}
-
-INSTRUCTIONS:
-- If this is a follow-up to previous conversation, acknowledge the context
-- Answer the current question while considering conversation history
-- Be conversational and natural
-"""
+        if not personalize:
+            return [
+                PromptSection("customer", f"- Current Plan: {customer['plan']}\n"
+                                          f"(General policy question: answer from the policies, "
+                                          f"without referring to the customer's own records)",
+                              header="CUSTOMER INFORMATION:", required=True),
+            ]
         
-        messages = [
-            SystemMessage(content=self.system_prompt),
-            HumanMessage(content=context)
+        return [
+            PromptSection("customer", f"- Name: {customer['name']}\n"
+                                      f"- Email: {customer['email']}\n"
+                                      f"- Current Plan: {customer['plan']}",
+                          header="CUSTOMER INFORMATION:", required=True),
+            PromptSection("billing_history", self._format_billing_history(customer_context['billing_history']),
+                          header="RECENT BILLING HISTORY:", empty_text="No billing history found."),
+            PromptSection("failed_payments", self._format_billing_history(customer_context['failed_payments']),
+                          header="FAILED PAYMENTS:", empty_text="None"),
         ]
-        
-        response = self.llm.invoke(messages)
-        return response.content
     
-    def _format_billing_history(self, billing_records):
-        """Format billing records for context"""
-        if not billing_records:
-            return "No billing history found."
-        
-        formatted = []
-        for record in billing_records:
-            formatted.append(
-                f"- {record['billing_date']}: ${record['amount']} ({record['status']}) "
-                f"Invoice: {record['invoice_number']}"
-            )
-        return "\n".join(formatted)
\ No newline at end of file
+    def _format_billing_history(self, billing_records) -> List[str]:
+        """One line per billing record, newest first"""
+        return [
+            f"- {record['billing_date']}: ${record['amount']} ({record['status']}) "
+            f"Invoice: {record['invoice_number']}"
+            for record in billing_records or []
+        ]
\ No newline at end of file
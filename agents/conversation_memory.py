@@ -0,0 +1,222 @@
+"""
+Rolling conversation memory for the specialist agents
+Instead of pasting the last messages verbatim, agents get a compact running
+summary of the older turns plus the most recent messages. When messages fall
+out of the recent window they are folded into the summary by a background
+LLM call, so the update runs while the current answer is being generated
+and is ready for the next turn.
+
+Summaries are keyed by a hash of the conversation prefix they cover, so
+callers keep passing the plain message history (Streamlit session state,
+main.py, batch runs) and an edited or cleared chat simply starts over.
+"""
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+from langchain_ollama import ChatOllama
+from langchain_core.messages import HumanMessage, SystemMessage
+from cache.ttl_cache import TTLCache
+from agents.prompt_builder import get_token_counter
+from config.ollama import create_chat_model
+from observability.log import get_logger
+from observability.tracing import span
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a customer support conversation.
+
+Update the current summary with the new messages. Keep what the agent will need later:
+- the customer's problem and goal
+- details they gave (devices, browsers, error messages, invoice numbers, amounts, dates)
+- what was already tried, suggested or promised
+- anything still unresolved
+
+Write plain sentences, at most {words} words. Reply with the updated summary only."""
+
+def prior_turns(query: str, history: List[Dict]) -> List[Dict]:
+    """
+    The messages before the current query
+    history holds earlier turns only (main.py, batch); a list that already
+    ends with the query as a user message has it dropped.
+    """
+    history = history or []
+    if history and history[-1].get('role') == 'user' and history[-1].get('content') == query:
+        return history[:-1]
+    return history
+
+class MemoryContext(NamedTuple):
+    summary: str         # running summary of history[:covered], "" if none yet
+    recent: List[Dict]   # messages after the summary, oldest first
+    covered: int         # number of messages folded into the summary
+
+def memory_settings_from_env() -> Dict:
+    """Read conversation memory configuration from MEMORY_* environment variables"""
+    return {
+        'enabled': os.getenv('MEMORY_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+        'recent_messages': int(os.getenv('MEMORY_RECENT_MESSAGES', '2')),
+        'summarize_every': int(os.getenv('MEMORY_SUMMARIZE_EVERY', '2')),
+        'summary_tokens': int(os.getenv('MEMORY_SUMMARY_TOKENS', '150')),
+        'message_tokens': int(os.getenv('MEMORY_MESSAGE_TOKENS', '400')),
+        'max_conversations': int(os.getenv('MEMORY_MAX_CONVERSATIONS', '1000')),
+        'ttl': float(os.getenv('MEMORY_TTL', '86400')),
+        'workers': int(os.getenv('MEMORY_WORKERS', '2')),
+    }
+
+def _format_message(message: Dict) -> str:
+    speaker = 'Customer' if message['role'] == 'user' else 'Agent'
+    return f"{speaker}: {message['content']}"
+
+class ConversationMemory:
+    def __init__(self, settings: Dict = None, llm: ChatOllama = None):
+        self.settings = {**memory_settings_from_env(), **(settings or {})}
+        self.recent_messages = self.settings['recent_messages']
+        self.summarize_every = max(1, self.settings['summarize_every'])
+        self.llm = llm or create_chat_model(
+            temperature=0,
+            model=os.getenv("MEMORY_MODEL"),
+            num_predict=self.settings['summary_tokens'] * 2
+        )
+        self.counter = get_token_counter()
+        ttl = self.settings['ttl']
+        # prefix hash -> summary of that prefix
+        self.summaries = TTLCache(maxsize=self.settings['max_conversations'], ttl=ttl if ttl > 0 else None)
+        self._executor = ThreadPoolExecutor(max_workers=self.settings['workers'],
+                                            thread_name_prefix="assistly-memory")
+        self._lock = threading.Lock()
+        self._pending = {}  # prefix hash -> Future
+        self._updates = 0
+        self._failures = 0
+        self._summarize_seconds = 0.0
+        self._lagging_turns = 0
+    
+    # Public API
+    def context(self, customer_id: str, history: List[Dict], query: str = None) -> MemoryContext:
+        """
+        Summary and recent messages for a turn
+        history is the turns before query (which the prompt carries on its
+        own); pass query to have a copy of it at the end of history dropped.
+        Also schedules a background update folding in every message that
+        will be outside the recent window by the next turn (this turn adds
+        a question and an answer), so it runs while this answer is generated.
+        """
+        history = prior_turns(query, history) if query is not None else (history or [])
+        prefixes = self._prefix_hashes(customer_id, history)
+        covered, summary = self._best_summary(prefixes)
+        
+        target = min(len(history), len(history) + 2 - self.recent_messages)
+        if target - covered >= self.summarize_every:
+            self._schedule(prefixes, history, covered, summary, target)
+        
+        return MemoryContext(summary, history[covered:], covered)
+    
+    def wait(self, timeout: Optional[float] = None):
+        """Block until scheduled summary updates have finished (benchmarks, shutdown)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                futures = list(self._pending.values())
+            if not futures:
+                return
+            for future in futures:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                future.exception(timeout=remaining)
+    
+    def clear(self):
+        """Forget every summary"""
+        self.summaries.clear()
+    
+    def stats(self) -> Dict:
+        """Update counters; lagging_turns counts turns served while an update was still running"""
+        with self._lock:
+            return {
+                "updates": self._updates,
+                "failures": self._failures,
+                "pending": len(self._pending),
+                "avg_summarize_seconds": self._summarize_seconds / self._updates if self._updates else 0.0,
+                "lagging_turns": self._lagging_turns,
+                "conversations": len(self.summaries),
+            }
+    
+    # Summaries
+    def _prefix_hashes(self, customer_id: str, history: List[Dict]) -> List[str]:
+        """Hash of every history prefix: entry n covers history[:n]"""
+        digest = hashlib.sha256(customer_id.encode("utf-8"))
+        hashes = [digest.hexdigest()]
+        for message in history:
+            digest.update(f"\x00{message['role']}\x00{message['content']}".encode("utf-8"))
+            hashes.append(digest.hexdigest())
+        return hashes
+    
+    def _best_summary(self, prefixes: List[str]) -> tuple:
+        """(covered, summary) for the longest prefix that has a summary"""
+        for covered in range(len(prefixes) - 1, 0, -1):
+            summary = self.summaries.get(prefixes[covered])
+            if summary is not None:
+                return covered, summary
+        return 0, ""
+    
+    def _schedule(self, prefixes: List[str], history: List[Dict], covered: int,
+                  summary: str, target: int):
+        key = prefixes[target]
+        messages = list(history[covered:target])
+        with self._lock:
+            # An update for part of this backlog is still running: serve this turn
+            # without it and let the next turn fold everything that is left
+            if any(prefix in self._pending for prefix in prefixes[covered + 1:target + 1]):
+                self._lagging_turns += 1
+                return
+            self._pending[key] = self._executor.submit(self._update, key, summary, messages)
+    
+    def _update(self, key: str, summary: str, messages: List[Dict]):
+        start = time.perf_counter()
+        try:
+            self.summaries.set(key, self.summarize(summary, messages))
+        except Exception as e:
+            logger.warning("⚠️ Conversation summary failed (%s), keeping recent messages verbatim", e)
+            with self._lock:
+                self._failures += 1
+            return
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+        
+        seconds = time.perf_counter() - start
+        with self._lock:
+            self._updates += 1
+            self._summarize_seconds += seconds
+        logger.info("🧠 Folded %d messages into the conversation summary in %.2fs", len(messages), seconds)
+    
+    def summarize(self, summary: str, messages: List[Dict]) -> str:
+        """Fold messages into an existing summary with one LLM call"""
+        message_tokens = self.settings['message_tokens']
+        new_messages = "\n".join(
+            self.counter.truncate(_format_message(message), message_tokens) for message in messages
+        )
+        words = int(self.settings['summary_tokens'] * 0.75)
+        with span("summary_llm", messages=len(messages)):
+            response = self.llm.invoke([
+                SystemMessage(content=SUMMARY_SYSTEM_PROMPT.format(words=words)),
+                HumanMessage(content=f"CURRENT SUMMARY:\n{summary or '(none yet)'}\n\n"
+                                     f"NEW MESSAGES:\n{new_messages}\n\nUPDATED SUMMARY:")
+            ])
+        return self.counter.truncate(response.content.strip(), self.settings['summary_tokens'])
+
+_memory = None
+_memory_lock = threading.Lock()
+
+def get_conversation_memory() -> Optional[ConversationMemory]:
+    """Process-wide conversation memory shared by all agents (None when MEMORY_ENABLED is off)"""
+    global _memory
+    if not memory_settings_from_env()['enabled']:
+        return None
+    if _memory is None:
+        with _memory_lock:
+            if _memory is None:
+                _memory = ConversationMemory()
+    return _memory
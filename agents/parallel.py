@@ -0,0 +1,95 @@
+"""
+Shared bounded thread pool for agent I/O
+Runs independent context lookups (database, RAG) concurrently
+"""
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import threading
+import time
+import os
+from dotenv import load_dotenv
+from typing import Any, Awaitable, Callable, Dict
+from observability.log import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Per-step timeouts (seconds) for the context-gathering phase
+DB_TIMEOUT = float(os.getenv("AGENT_DB_TIMEOUT", "10"))
+RAG_TIMEOUT = float(os.getenv("AGENT_RAG_TIMEOUT", "10"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+class StepTimeoutError(Exception):
+    """Raised when a context step without a fallback does not finish in time"""
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the process-wide executor shared by all agents"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("AGENT_IO_WORKERS", "16")),
+                    thread_name_prefix="assistly-io"
+                )
+    return _executor
+
+def run_parallel(steps: Dict[str, Callable[[], Any]], timeouts: Dict[str, float],
+                 fallbacks: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Run named steps concurrently and wait for all of them
+    
+    Each step gets its own timeout, counted from submission. A step that
+    fails or times out returns its fallback value if it has one, otherwise
+    its exception (or StepTimeoutError) is raised.
+    """
+    fallbacks = fallbacks or {}
+    executor = get_executor()
+    started = time.monotonic()
+    # Each step runs in a copy of the caller's context so its spans join the caller's trace
+    futures = {name: executor.submit(contextvars.copy_context().run, fn) for name, fn in steps.items()}
+    
+    results = {}
+    for name, future in futures.items():
+        remaining = max(0.0, timeouts[name] - (time.monotonic() - started))
+        try:
+            results[name] = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            future.cancel()
+            if name not in fallbacks:
+                raise StepTimeoutError(f"Context step '{name}' timed out after {timeouts[name]:.1f}s")
+            logger.warning("⚠️ %s timed out, continuing without it", name)
+            results[name] = fallbacks[name]
+        except Exception as e:
+            if name not in fallbacks:
+                raise
+            logger.warning("⚠️ %s failed (%s), continuing without it", name, e)
+            results[name] = fallbacks[name]
+    return results
+
+async def arun_parallel(steps: Dict[str, Awaitable], timeouts: Dict[str, float],
+                        fallbacks: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Async version of run_parallel: awaits named coroutines concurrently"""
+    fallbacks = fallbacks or {}
+    
+    async def run_step(name: str, step: Awaitable):
+        try:
+            return await asyncio.wait_for(step, timeouts[name])
+        except asyncio.TimeoutError:
+            if name not in fallbacks:
+                raise StepTimeoutError(f"Context step '{name}' timed out after {timeouts[name]:.1f}s")
+            logger.warning("⚠️ %s timed out, continuing without it", name)
+            return fallbacks[name]
+        except Exception as e:
+            if name not in fallbacks:
+                raise
+            logger.warning("⚠️ %s failed (%s), continuing without it", name, e)
+            return fallbacks[name]
+    
+    names = list(steps)
+    values = await asyncio.gather(*(run_step(name, steps[name]) for name in names))
+    return dict(zip(names, values))
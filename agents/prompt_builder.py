@@ -0,0 +1,237 @@
+"""
+Token-budgeted prompt assembly for the specialist agents
+Agents describe their prompt as sections with a priority; the builder
+counts tokens, gives required sections their full size, fills the rest of
+the budget by priority (dropping the least useful items of a section
+first, then truncating) and reports per-section token usage.
+
+Stable sections (the same for every request to an agent) are fitted first
+and rendered separately as the prompt prefix, so their text never depends
+on the customer or the query and the LLM server can reuse its cached prefix.
+"""
+import os
+import threading
+from typing import Dict, List, NamedTuple, Optional
+from observability.log import get_logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+TRUNCATION_MARKER = " …"
+MIN_SECTION_TOKENS = 16  # below this a truncated section is dropped instead
+
+# Defaults per section name; required sections (customer, query, instructions) are always kept
+DEFAULT_PRIORITIES = {
+    "knowledge": 80,
+    "failed_payments": 70,
+    "plans": 70,
+    "billing_history": 60,
+    "tickets": 60,
+    "summary": 55,
+    "history": 50,
+}
+DEFAULT_MAX_TOKENS = {
+    "knowledge": 600,
+    "summary": 250,
+    "history": 400,
+}
+
+def _parse_overrides(value: str) -> Dict[str, int]:
+    """'history:40,knowledge:90' -> {'history': 40, 'knowledge': 90}"""
+    overrides = {}
+    for part in value.split(","):
+        if ":" in part:
+            name, number = part.split(":", 1)
+            overrides[name.strip()] = int(number)
+    return overrides
+
+def prompt_settings_from_env() -> Dict:
+    """Read prompt budget configuration from PROMPT_* environment variables"""
+    return {
+        'budget': int(os.getenv('PROMPT_TOKEN_BUDGET', '1500')),
+        'priorities': {**DEFAULT_PRIORITIES, **_parse_overrides(os.getenv('PROMPT_SECTION_PRIORITIES', ''))},
+        'max_tokens': {**DEFAULT_MAX_TOKENS, **_parse_overrides(os.getenv('PROMPT_SECTION_MAX_TOKENS', ''))},
+        'history_message_tokens': int(os.getenv('PROMPT_HISTORY_MESSAGE_TOKENS', '120')),
+    }
+
+class TokenCounter:
+    """tiktoken-based counting, with a ~4 characters/token estimate if the encoding can't load"""
+    def __init__(self, encoding_name: str = None):
+        self.encoding_name = encoding_name or os.getenv("PROMPT_TOKEN_ENCODING", "cl100k_base")
+        try:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding(self.encoding_name)
+        except Exception as e:
+            logger.warning("⚠️ tiktoken encoding %s unavailable (%s), estimating tokens from characters",
+                           self.encoding_name, e.__class__.__name__)
+            self._encoding = None
+    
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is None:
+            return (len(text) + 3) // 4
+        return len(self._encoding.encode(text, disallowed_special=()))
+    
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to at most max_tokens (including the truncation marker)"""
+        if self.count(text) <= max_tokens:
+            return text
+        keep = max(0, max_tokens - self.count(TRUNCATION_MARKER))
+        if self._encoding is None:
+            return text[:keep * 4].rstrip() + TRUNCATION_MARKER
+        tokens = self._encoding.encode(text, disallowed_special=())
+        return self._encoding.decode(tokens[:keep]).rstrip() + TRUNCATION_MARKER
+
+_counter = None
+_counter_lock = threading.Lock()
+
+def get_token_counter() -> TokenCounter:
+    """Process-wide token counter (loading an encoding is not free)"""
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                _counter = TokenCounter()
+    return _counter
+
+class PromptSection:
+    """
+    One block of the prompt
+    items are the units that can be dropped; keep='first' drops from the
+    end (ranked lists), keep='last' drops from the start (chat history).
+    Required sections are always included in full. priority and max_tokens
+    default to the configured values for the section name. stable marks
+    content that is identical for every request (instructions, reference data).
+    """
+    def __init__(self, name: str, items, header: str = "", priority: Optional[int] = None,
+                 required: bool = False, max_tokens: Optional[int] = None,
+                 item_max_tokens: Optional[int] = None, keep: str = "first",
+                 empty_text: Optional[str] = None, separator: str = "\n", stable: bool = False):
+        self.name = name
+        self.items = [items] if isinstance(items, str) else [item for item in items if item]
+        self.header = header
+        self.priority = priority
+        self.required = required
+        self.max_tokens = max_tokens
+        self.item_max_tokens = item_max_tokens
+        self.keep = keep
+        self.empty_text = empty_text
+        self.separator = separator
+        self.stable = stable
+    
+    def render(self, items: List[str]) -> str:
+        body = self.separator.join(items) if items else (self.empty_text or "")
+        if not body:
+            return ""
+        return f"{self.header}\n{body}" if self.header else body
+
+class SectionUsage(NamedTuple):
+    tokens: int       # tokens the section takes in the prompt
+    full_tokens: int  # tokens it would take untrimmed
+    items_kept: int
+    items_total: int
+
+class BuiltPrompt(NamedTuple):
+    text: str                 # volatile sections (customer, conversation, knowledge, query)
+    tokens: int
+    budget: int
+    usage: Dict[str, SectionUsage]
+    prefix: str = ""          # stable sections, identical across requests
+    
+    def describe(self) -> str:
+        parts = []
+        for name, usage in self.usage.items():
+            part = f"{name} {usage.tokens}"
+            if usage.tokens < usage.full_tokens:
+                part += f"/{usage.full_tokens}"
+            parts.append(part)
+        return f"{self.tokens}/{self.budget} tokens ({', '.join(parts)})"
+
+class PromptBuilder:
+    def __init__(self, settings: Dict = None, counter: TokenCounter = None):
+        self.settings = {**prompt_settings_from_env(), **(settings or {})}
+        self.budget = self.settings['budget']
+        self.counter = counter or get_token_counter()
+    
+    def _priority(self, section: PromptSection) -> int:
+        if section.priority is not None:
+            return section.priority
+        return self.settings['priorities'].get(section.name, 50)
+    
+    def _max_tokens(self, section: PromptSection) -> Optional[int]:
+        if section.max_tokens is not None:
+            return section.max_tokens
+        return self.settings['max_tokens'].get(section.name)
+    
+    def build(self, sections: List[PromptSection], reserved_tokens: int = 0) -> BuiltPrompt:
+        """
+        Assemble sections (in the given order) within budget - reserved_tokens
+        reserved_tokens covers text sent alongside, such as the system prompt.
+        Stable sections go to prefix and are fitted before everything else,
+        so how much of them fits depends only on the budget.
+        """
+        count = self.counter.count
+        prepared = {}
+        for section in sections:
+            items = section.items
+            if section.item_max_tokens:
+                items = [self.counter.truncate(item, section.item_max_tokens) for item in items]
+            prepared[section.name] = items
+        
+        full_tokens = {s.name: count(s.render(s.items)) for s in sections}
+        # Sections are joined by blank lines
+        remaining = self.budget - reserved_tokens - count("\n\n") * (len(sections) - 1)
+        chosen = {}  # name -> (text, items kept)
+        
+        # Stable sections, then the volatile ones: required first, whatever
+        # they cost, then the others, most valuable first
+        for stable in (True, False):
+            layer = [s for s in sections if s.stable == stable]
+            for section in layer:
+                if section.required:
+                    text = section.render(prepared[section.name])
+                    chosen[section.name] = (text, len(prepared[section.name]))
+                    remaining -= count(text)
+            
+            optional = sorted((s for s in layer if not s.required), key=lambda s: -self._priority(s))
+            for section in optional:
+                max_tokens = self._max_tokens(section)
+                limit = remaining if max_tokens is None else min(remaining, max_tokens)
+                chosen[section.name] = self._fit(section, prepared[section.name], limit)
+                remaining -= count(chosen[section.name][0])
+        
+        prefix = "\n\n".join(chosen[s.name][0] for s in sections if s.stable and chosen[s.name][0])
+        text = "\n\n".join(chosen[s.name][0] for s in sections if not s.stable and chosen[s.name][0])
+        usage = {
+            s.name: SectionUsage(count(chosen[s.name][0]), full_tokens[s.name],
+                                 chosen[s.name][1], len(s.items))
+            for s in sections
+        }
+        return BuiltPrompt(text, count(prefix) + count(text) + reserved_tokens, self.budget, usage, prefix)
+    
+    def _fit(self, section: PromptSection, items: List[str], limit: int) -> tuple:
+        """(text, items kept) for the largest part of the section within limit tokens"""
+        count = self.counter.count
+        text = section.render(items)
+        if count(text) <= limit:
+            return text, len(items)
+        if limit < MIN_SECTION_TOKENS:
+            return "", 0
+        
+        # Drop the least useful items while more than one is left
+        kept = list(items)
+        while len(kept) > 1:
+            kept = kept[:-1] if section.keep == "first" else kept[1:]
+            text = section.render(kept)
+            if count(text) <= limit:
+                return text, len(kept)
+        
+        # A single item still does not fit: truncate it
+        if not kept:
+            return "", 0
+        header_tokens = count(section.header + "\n") if section.header else 0
+        truncated = self.counter.truncate(kept[0], limit - header_tokens - 1)
+        return section.render([truncated]), 1
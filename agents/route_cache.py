@@ -0,0 +1,101 @@
+"""
+Route Cache - remembers routing decisions for repeated queries
+Keyed on a normalized query (case, whitespace and punctuation folded),
+bounded LRU with TTL, optionally persisted to a JSON file so restarts stay warm
+"""
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional
+from cache.ttl_cache import TTLCache
+from observability.log import get_logger
+
+logger = get_logger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_query(query: str) -> str:
+    """Fold case, punctuation and whitespace: "I can't  login!" -> "i cant login" """
+    text = _PUNCTUATION.sub("", query.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+class RouteCache:
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = 86400,
+                 path: Optional[str] = None, save_interval: float = 30.0):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.path = path
+        self.save_interval = save_interval
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._save_lock = threading.Lock()
+        
+        if self.path:
+            self.load()
+            atexit.register(self.save)
+    
+    def get(self, query: str) -> Optional[str]:
+        """Cached route for this query, or None"""
+        return self.cache.get(normalize_query(query))
+    
+    def put(self, query: str, route: str):
+        """Remember the route chosen for this query"""
+        key = normalize_query(query)
+        if not key:
+            return
+        self.cache.set(key, route)
+        self._dirty = True
+        if self.path and time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters and size"""
+        return self.cache.stats()
+    
+    # Persistence
+    def load(self):
+        """Load unexpired entries from the persistence file"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("⚠️ Could not load route cache %s: %s", self.path, e)
+            return
+        
+        now = time.time()
+        for key, (route, expires_at) in entries.items():
+            if expires_at is None or expires_at > now:
+                self.cache.set(key, route, expires_at=expires_at)
+    
+    def save(self):
+        """Write the cache to the persistence file (atomic replace)"""
+        if not self.path:
+            return
+        with self._save_lock:
+            if not self._dirty:
+                return
+            entries = {key: [route, expires_at] for key, route, expires_at in self.cache.items()}
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+def route_cache_from_env() -> Optional[RouteCache]:
+    """Build the router's cache from ROUTER_CACHE_* settings (None when disabled)"""
+    if os.getenv("ROUTER_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    ttl = float(os.getenv("ROUTER_CACHE_TTL", "86400"))
+    return RouteCache(
+        maxsize=int(os.getenv("ROUTER_CACHE_SIZE", "10000")),
+        ttl=ttl if ttl > 0 else None,
+        path=os.getenv("ROUTER_CACHE_PATH") or None
+    )
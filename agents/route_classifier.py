@@ -0,0 +1,152 @@
+"""
+Route Classifier - cheap in-process routing for the RouterAgent
+Keyword rules first, then nearest-centroid over query embeddings of
+labelled examples. Every decision carries a confidence score so the
+router can escalate ambiguous queries to the LLM.
+"""
+import asyncio
+import math
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional
+from rag.embeddings import EmbeddingManager
+
+# Same rules the router prompt describes, as regex word stems
+KEYWORD_RULES = {
+    "billing": [
+        r"charg", r"refund", r"invoice", r"payment", r"\bpa(y|id)\b", r"\bbill",
+        r"money", r"receipt", r"credit card", r"subscription", r"overcharg", r"declined",
+    ],
+    "technical": [
+        r"error", r"\bbug", r"not working", r"\bslow", r"log ?in", r"password",
+        r"crash", r"broken", r"can'?t access", r"integration", r"\bapi\b", r"sync",
+        r"loading", r"timeout", r"2fa", r"freez",
+    ],
+    "sales": [
+        r"feature", r"\bplans?\b", r"pricing", r"\bprice", r"upgrade", r"downgrade",
+        r"\bdemo", r"trial", r"enterprise", r"compare", r"discount", r"how much",
+    ],
+}
+
+# Labelled examples used to build one embedding centroid per route
+ROUTING_EXAMPLES = {
+    "billing": [
+        "I was charged twice",
+        "I need a refund for last month",
+        "Where can I download my invoice?",
+        "My payment was declined",
+        "Why is my bill higher than usual?",
+        "Please cancel my subscription and return my money",
+        "The card on file needs to be updated",
+        "I see an unexpected charge on my statement",
+    ],
+    "technical": [
+        "Can't login to my account",
+        "My dashboard is slow",
+        "I get an error when uploading files",
+        "The app crashes on startup",
+        "Password reset email never arrives",
+        "The API integration stopped working",
+        "Data is not syncing between devices",
+        "The page keeps loading forever",
+    ],
+    "sales": [
+        "What features are in Pro plan?",
+        "How much does the Enterprise plan cost?",
+        "Can I upgrade my plan?",
+        "What is the difference between Basic and Pro?",
+        "Do you offer a free trial?",
+        "I'd like to book a demo for my team",
+        "Are there discounts for annual billing?",
+        "Which plan is best for a team of 20?",
+    ],
+}
+
+class RouteDecision(NamedTuple):
+    route: str
+    confidence: float
+    source: str  # 'keywords', 'centroid' or 'llm'
+
+class RouteClassifier:
+    def __init__(self, embedding_manager: Optional[EmbeddingManager] = None,
+                 examples: Dict[str, List[str]] = None, temperature: float = 0.05):
+        self.embedding_manager = embedding_manager
+        self.examples = examples or ROUTING_EXAMPLES
+        self.temperature = temperature  # softmax temperature over cosine similarities
+        self._patterns = {
+            route: [re.compile(pattern) for pattern in patterns]
+            for route, patterns in KEYWORD_RULES.items()
+        }
+        self._centroids = None
+        self._lock = threading.Lock()
+    
+    # Keyword tier
+    def keyword_scores(self, query: str) -> Dict[str, int]:
+        """Number of keyword rules each route matches"""
+        text = query.lower()
+        return {
+            route: sum(1 for pattern in patterns if pattern.search(text))
+            for route, patterns in self._patterns.items()
+        }
+    
+    def classify_keywords(self, query: str) -> Optional[RouteDecision]:
+        """Decide from keywords alone when exactly one route matches"""
+        scores = self.keyword_scores(query)
+        matched = [route for route, hits in scores.items() if hits]
+        if len(matched) != 1:
+            return None
+        route = matched[0]
+        return RouteDecision(route, min(0.95, 0.75 + 0.1 * scores[route]), "keywords")
+    
+    # Centroid tier
+    def warm_up(self):
+        """Embed the labelled examples now instead of on the first ambiguous query"""
+        if self.embedding_manager is not None:
+            self._get_centroids()
+    
+    def _get_centroids(self) -> Dict[str, List[float]]:
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    centroids = {}
+                    for route, texts in self.examples.items():
+                        vectors = self.embedding_manager.embed_documents(texts)
+                        centroids[route] = _normalize([sum(col) / len(vectors) for col in zip(*vectors)])
+                    self._centroids = centroids
+        return self._centroids
+    
+    def _decide_from_embedding(self, query: str, query_embedding: List[float]) -> RouteDecision:
+        centroids = self._get_centroids()
+        query_embedding = _normalize(query_embedding)
+        keyword_scores = self.keyword_scores(query)
+        
+        # Cosine similarity, nudged towards routes whose keywords matched
+        scores = {
+            route: sum(a * b for a, b in zip(query_embedding, centroid)) + 0.02 * keyword_scores.get(route, 0)
+            for route, centroid in centroids.items()
+        }
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        total = sum(math.exp((score - top) / self.temperature) for score in scores.values())
+        return RouteDecision(best, 1.0 / total, "centroid")
+    
+    def classify(self, query: str) -> Optional[RouteDecision]:
+        """Best local decision, or None if no local tier can decide"""
+        decision = self.classify_keywords(query)
+        if decision is not None or self.embedding_manager is None:
+            return decision
+        return self._decide_from_embedding(query, self.embedding_manager.embed_text(query))
+    
+    async def aclassify(self, query: str) -> Optional[RouteDecision]:
+        """Async version of classify"""
+        decision = self.classify_keywords(query)
+        if decision is not None or self.embedding_manager is None:
+            return decision
+        if self._centroids is None:
+            await asyncio.to_thread(self._get_centroids)
+        query_embedding = await self.embedding_manager.aembed_text(query)
+        return self._decide_from_embedding(query, query_embedding)
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
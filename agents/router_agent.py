@@ -1,20 +1,30 @@
 """
 Router Agent - Analyzes customer query and routes to appropriate specialist
 """
-from langchain_ollama import ChatOllama
 from langchain_core.messages import HumanMessage, SystemMessage
+from agents.route_classifier import RouteClassifier, RouteDecision
+from agents.route_cache import RouteCache, route_cache_from_env
+from rag.resources import get_embedding_manager
+from config.ollama import create_chat_model
+from observability.log import get_logger
+from observability.tracing import span
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = get_logger(__name__)
+
 class RouterAgent:
-    def __init__(self):
-        self.llm = ChatOllama(
-            model=os.getenv("OLLAMA_MODEL", "llama3.1"),
-            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-            temperature=0.1  # Low temperature for consistent routing
-        )
+    def __init__(self, classifier: RouteClassifier = None, cache: RouteCache = None):
+        # Local fast path; the LLM is only asked when it is not confident enough
+        self.fast_path = os.getenv("ROUTER_FAST_PATH", "true").lower() in ("1", "true", "yes")
+        self.confidence_threshold = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.7"))
+        self.classifier = classifier or RouteClassifier(get_embedding_manager())
+        # Decisions for repeated queries (None disables caching)
+        self.cache = cache if cache is not None else route_cache_from_env()
+        
+        self.llm = create_chat_model(temperature=0.1)  # Low temperature for consistent routing
         
         self.system_prompt = """You are a routing agent for Assistly customer support.
 
@@ -44,13 +54,85 @@ Examples:
         Route customer query to appropriate department
         Returns: 'billing', 'technical', or 'sales'
         """
-        messages = [
+        return self.classify(customer_query).route
+    
+    async def aroute(self, customer_query: str) -> str:
+        """Async version of route"""
+        return (await self.aclassify(customer_query)).route
+    
+    def classify(self, customer_query: str) -> RouteDecision:
+        """Route with confidence: cache, then local classifier, LLM for ambiguous queries"""
+        cached = self._cached_decision(customer_query)
+        if cached:
+            return cached
+        
+        decision = self._classify_uncached(customer_query)
+        self._remember(customer_query, decision)
+        return decision
+    
+    async def aclassify(self, customer_query: str) -> RouteDecision:
+        """Async version of classify"""
+        cached = self._cached_decision(customer_query)
+        if cached:
+            return cached
+        
+        decision = await self._aclassify_uncached(customer_query)
+        self._remember(customer_query, decision)
+        return decision
+    
+    def _cached_decision(self, customer_query: str):
+        if self.cache is None:
+            return None
+        route = self.cache.get(customer_query)
+        return RouteDecision(route, 1.0, "cache") if route else None
+    
+    def _remember(self, customer_query: str, decision: RouteDecision):
+        if self.cache is not None:
+            self.cache.put(customer_query, decision.route)
+    
+    def _classify_uncached(self, customer_query: str) -> RouteDecision:
+        local = None
+        if self.fast_path:
+            try:
+                local = self.classifier.classify(customer_query)
+            except Exception as e:
+                logger.warning("⚠️ Local router failed (%s), asking the LLM", e)
+            if local and local.confidence >= self.confidence_threshold:
+                return local
+        
+        with span("route_llm"):
+            response = self.llm.invoke(self._messages(customer_query))
+        return self._llm_decision(response.content, local)
+    
+    async def _aclassify_uncached(self, customer_query: str) -> RouteDecision:
+        local = None
+        if self.fast_path:
+            try:
+                local = await self.classifier.aclassify(customer_query)
+            except Exception as e:
+                logger.warning("⚠️ Local router failed (%s), asking the LLM", e)
+            if local and local.confidence >= self.confidence_threshold:
+                return local
+        
+        with span("route_llm"):
+            response = await self.llm.ainvoke(self._messages(customer_query))
+        return self._llm_decision(response.content, local)
+    
+    def _messages(self, customer_query: str):
+        return [
             SystemMessage(content=self.system_prompt),
             HumanMessage(content=f"Customer query: {customer_query}")
         ]
-        
-        response = self.llm.invoke(messages)
-        route_decision = response.content.strip().upper()
+    
+    def _llm_decision(self, content: str, local: RouteDecision = None) -> RouteDecision:
+        route = self._parse_route(content)
+        # Agreeing with the local guess raises confidence; otherwise trust the LLM as is
+        confidence = max(0.9, local.confidence) if local and local.route == route else 0.9
+        return RouteDecision(route, confidence, "llm")
+    
+    def _parse_route(self, content: str) -> str:
+        """Map the model's answer onto a route name"""
+        route_decision = content.strip().upper()
         
         # Normalize response
         if "BILLING" in route_decision:
@@ -1,25 +1,26 @@
 """
 Sales Agent - Handles product inquiries, upgrades, and feature questions
 """
-from langchain_ollama import ChatOllama
-from langchain_core.messages import HumanMessage, SystemMessage
+from agents.base_agent import SpecialistAgent
+from agents.prompt_builder import PromptSection
+from agents.conversation_memory import ConversationMemory
 from database.db_manager import DatabaseManager
 from rag.retriever import RAGRetriever
-from typing import List, Dict
-import os
-from dotenv import load_dotenv
+from typing import Dict, List
 
-load_dotenv()
-
-class SalesAgent:
-    def __init__(self):
-        self.llm = ChatOllama(
-            model=os.getenv("OLLAMA_MODEL", "llama3.1"),
-            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-            temperature=0.4  # Slightly higher for friendlier responses
-        )
-        self.db = DatabaseManager()
-        self.retriever = RAGRetriever()
+class SalesAgent(SpecialistAgent):
+    # Current plan and the full plan catalogue, no history rows
+    context_options = {'billing_limit': 0, 'failed_limit': 0, 'ticket_limit': 0, 'include_plans': True}
+    knowledge_header = "PRODUCT INFORMATION:"
+    instructions = [
+        "If customer asked follow-up questions, answer them in context of previous discussion",
+        "Be conversational and remember what you've already explained",
+        "Don't repeat information unless asked",
+    ]
+    
+    def __init__(self, db: DatabaseManager = None, retriever: RAGRetriever = None,
+                 memory: ConversationMemory = None):
+        super().__init__(temperature=0.4, db=db, retriever=retriever, memory=memory)  # Slightly higher for friendlier responses
         
         self.system_prompt = """You are a sales specialist at Assistly.
 
@@ -43,70 +44,37 @@ Guidelines:
 Tone: Friendly, helpful, value-focused
 """
     
-    def handle_query(self, customer_id: str, query: str, history: List[Dict] = None) -> str:
-        """Handle sales/product query with conversation history"""
-        
-        # Get customer data
-        customer = self.db.get_customer(customer_id)
-        if not customer:
-            return "I couldn't find your account. Please verify your customer ID."
-        
-        # Get current plan details
-        current_plan = self.db.get_plan(customer['plan'])
-        
-        # Get all available plans
-        all_plans = self.db.get_all_plans()
-        
-        # Get product info from RAG
-        knowledge_context = self.retriever.retrieve_for_sales(query)
-        
-        # Format conversation history
-        history_text = ""
-        if history and len(history) > 0:
-            history_text = "PREVIOUS CONVERSATION:\n"
-            for msg in history[-6:]:
-                role = "Customer" if msg['role'] == 'user' else "Agent"
-                history_text += f"{role}: {msg['content']}\n"
-            history_text += "\n"
-        
-        # Build context
-        context = f"""
-{history_text}CUSTOMER INFORMATION:
-- Name: {customer['name']}
-- Current Plan: {current_plan['plan_name']} (${current_plan['price']}/{current_plan['billing_cycle']})
-
-ALL AVAILABLE PLANS:
-{self._format_plans(all_plans)}
-
-PRODUCT INFORMATION:
-{knowledge_context}
-
-CURRENT CUSTOMER MESSAGE:
-{query}
-
-INSTRUCTIONS:
-- If customer asked follow-up questions, answer them in context of previous discussion
-- Be conversational and remember what you've already explained
-- Don't repeat information unless asked
-"""
-        
-        messages = [
-            SystemMessage(content=self.system_prompt),
-            HumanMessage(content=context)
+    def retrieve_knowledge(self, query: str) -> List[str]:
+        """Get product info from RAG"""
+        return self.retriever.retrieve_chunks_for_route("sales", query)
+    
+    async def aretrieve_knowledge(self, query: str) -> List[str]:
+        """Async version of retrieve_knowledge"""
+        return await self.retriever.aretrieve_chunks_for_route("sales", query)
+    
+    def reference_sections(self, customer_context: Dict) -> List[PromptSection]:
+        """The plan catalogue is the same for every customer"""
+        return [
+            PromptSection("plans", self._format_plans(customer_context['all_plans']),
+                          header="ALL AVAILABLE PLANS:", empty_text="No plans available.", stable=True),
         ]
-        
-        response = self.llm.invoke(messages)
-        return response.content
     
-    def _format_plans(self, plans):
-        """Format plan information"""
-        if not plans:
-            return "No plans available."
+    def build_sections(self, customer_context: Dict, personalize: bool = True) -> List[PromptSection]:
+        """Build sales prompt sections"""
+        customer = customer_context['customer']
+        current_plan = customer_context['plan']
+        name_line = f"- Name: {customer['name']}\n" if personalize else ""
         
-        formatted = []
-        for plan in plans:
-            formatted.append(
-                f"- {plan['plan_name']}: ${plan['price']}/{plan['billing_cycle']}\n"
-                f"  Features: {plan['features']}"
-            )
-        return "\n".join(formatted)
\ No newline at end of file
+        return [
+            PromptSection("customer", f"{name_line}- Current Plan: {current_plan['plan_name']} "
+                                      f"(${current_plan['price']}/{current_plan['billing_cycle']})",
+                          header="CUSTOMER INFORMATION:", required=True),
+        ]
+    
+    def _format_plans(self, plans) -> List[str]:
+        """One entry per plan"""
+        return [
+            f"- {plan['plan_name']}: ${plan['price']}/{plan['billing_cycle']}\n"
+            f"  Features: {plan['features']}"
+            for plan in plans or []
+        ]
\ No newline at end of file
@@ -1,25 +1,26 @@
 """
 Technical Agent - Handles technical support and troubleshooting
 """
-from langchain_ollama import ChatOllama
-from langchain_core.messages import HumanMessage, SystemMessage
+from agents.base_agent import SpecialistAgent
+from agents.prompt_builder import PromptSection
+from agents.conversation_memory import ConversationMemory
 from database.db_manager import DatabaseManager
 from rag.retriever import RAGRetriever
-from typing import List, Dict
-import os
-from dotenv import load_dotenv
+from typing import Dict, List
 
-load_dotenv()
-
-class TechnicalAgent:
-    def __init__(self):
-        self.llm = ChatOllama(
-            model=os.getenv("OLLAMA_MODEL", "llama3.1"),
-            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-            temperature=0.3
-        )
-        self.db = DatabaseManager()
-        self.retriever = RAGRetriever()
+class TechnicalAgent(SpecialistAgent):
+    # Recent tickets only
+    context_options = {'billing_limit': 0, 'failed_limit': 0, 'ticket_limit': 3}
+    knowledge_header = "TROUBLESHOOTING GUIDES:"
+    instructions = [
+        "If customer provided information in response to your previous questions, acknowledge it",
+        "Continue troubleshooting based on conversation history",
+        "Be patient and guide them step-by-step",
+    ]
+    
+    def __init__(self, db: DatabaseManager = None, retriever: RAGRetriever = None,
+                 memory: ConversationMemory = None):
+        super().__init__(temperature=0.3, db=db, retriever=retriever, memory=memory)
         
         self.system_prompt = """You are a technical support specialist at Assistly.
 
@@ -42,67 +43,36 @@ Guidelines:
 Tone: Patient, helpful, technically accurate
 """
     
-    def handle_query(self, customer_id: str, query: str, history: List[Dict] = None) -> str:
-        """Handle technical support query with conversation history"""
-        
-        # Get customer data
-        customer = self.db.get_customer(customer_id)
-        if not customer:
-            return "I couldn't find your account. Please verify your customer ID."
-        
-        # Get past tickets
-        past_tickets = self.db.get_tickets(customer_id)
-        
-        # Get troubleshooting guides from RAG
-        knowledge_context = self.retriever.retrieve_for_technical(query)
+    def retrieve_knowledge(self, query: str) -> List[str]:
+        """Get troubleshooting guides from RAG"""
+        return self.retriever.retrieve_chunks_for_route("technical", query)
+    
+    async def aretrieve_knowledge(self, query: str) -> List[str]:
+        """Async version of retrieve_knowledge"""
+        return await self.retriever.aretrieve_chunks_for_route("technical", query)
+    
+    def build_sections(self, customer_context: Dict, personalize: bool = True) -> List[PromptSection]:
+        """Build technical support prompt sections"""
+        customer = customer_context['customer']
         
-        # Format conversation history
-        history_text = ""
-        if history and len(history) > 0:
-            history_text = "PREVIOUS CONVERSATION:\n"
-            for msg in history[-6:]:
-                role = "Customer" if msg['role'] == 'user' else "Agent"
-                history_text += f"{role}: {msg['content']}\n"
-            history_text += "\n"
+        if not personalize:
+            return [
+                PromptSection("customer", f"- Plan: {customer['plan']} (determines available features)",
+                              header="CUSTOMER INFORMATION:", required=True),
+            ]
         
-        # Build context
-        context = f"""
-{history_text}CUSTOMER INFORMATION:
-- Name: {customer['name']}
-- Plan: {customer['plan']} (determines available features)
-
-PAST TECHNICAL ISSUES:
-{self._format_tickets(past_tickets[:3])}
-
-TROUBLESHOOTING GUIDES:
-{knowledge_context}
-
-CURRENT CUSTOMER MESSAGE:
-{query}
-
-INSTRUCTIONS:
-- If customer provided information in response to your previous questions, acknowledge it
-- Continue troubleshooting based on conversation history
-- Be patient and guide them step-by-step
-"""
-        
-        messages = [
-            SystemMessage(content=self.system_prompt),
-            HumanMessage(content=context)
+        return [
+            PromptSection("customer", f"- Name: {customer['name']}\n"
+                                      f"- Plan: {customer['plan']} (determines available features)",
+                          header="CUSTOMER INFORMATION:", required=True),
+            PromptSection("tickets", self._format_tickets(customer_context['tickets']),
+                          header="PAST TECHNICAL ISSUES:", empty_text="No previous tickets found."),
         ]
-        
-        response = self.llm.invoke(messages)
-        return response.content
     
-    def _format_tickets(self, tickets):
-        """Format past tickets for context"""
-        if not tickets:
-            return "No previous tickets found."
-        
-        formatted = []
-        for ticket in tickets:
-            formatted.append(
-                f"- Ticket #{ticket['ticket_id']}: {ticket['subject']} "
-                f"({ticket['status']}) - {ticket['created_at']}"
-            )
-        return "\n".join(formatted)
\ No newline at end of file
+    def _format_tickets(self, tickets) -> List[str]:
+        """One line per past ticket, newest first"""
+        return [
+            f"- Ticket #{ticket['ticket_id']}: {ticket['subject']} "
+            f"({ticket['status']}) - {ticket['created_at']}"
+            for ticket in tickets or []
+        ]
\ No newline at end of file
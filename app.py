@@ -2,7 +2,7 @@
 Assistly - Streamlit Web Interface with Conversation Memory
 """
 import streamlit as st
-from graph.workflow import run_assistly
+from graph.workflow import stream_assistly
 from database.db_manager import DatabaseManager
 
 st.set_page_config(
@@ -17,6 +17,36 @@ def get_db():
 
 db = get_db()
 
+PAGE_SIZE = 10
+
+def load_page(key: str, fetch_page):
+    """
+    Rows to show for a paginated list
+    fetch_page(limit, before_date, before_id) must return rows newest first.
+    The first page is re-fetched on every rerun, so new tickets and charges
+    show up; pages added with 'Load more' are kept in session state until
+    the first page changes.
+    """
+    rows = fetch_page(PAGE_SIZE + 1, None, None)
+    first = rows[:PAGE_SIZE]
+    page = st.session_state.get(key)
+    if page is None or page["first"] != first:
+        page = st.session_state[key] = {"first": first, "more": [], "has_more": len(rows) > PAGE_SIZE}
+    return page["first"] + page["more"]
+
+def _load_next_page(key: str, fetch_page, cursor_fields: tuple):
+    page = st.session_state[key]
+    last = (page["first"] + page["more"])[-1]
+    rows = fetch_page(PAGE_SIZE + 1, last[cursor_fields[0]], last[cursor_fields[1]])
+    page["more"].extend(rows[:PAGE_SIZE])
+    page["has_more"] = len(rows) > PAGE_SIZE
+
+def load_more_button(key: str, fetch_page, cursor_fields: tuple):
+    """Show a 'Load more' button that appends the next page using a keyset cursor"""
+    if st.session_state[key]["has_more"]:
+        st.button("⬇️ Load more", key=f"{key}_more",
+                  on_click=_load_next_page, args=(key, fetch_page, cursor_fields))
+
 # Header
 st.title("🤖 Assistly - AI Customer Support")
 st.markdown("---")
@@ -24,7 +54,7 @@ st.markdown("---")
 # Sidebar
 with st.sidebar:
     st.header("Customer Login")
-    customers = db.execute_query("SELECT customer_id, name, email FROM customers ORDER BY name")
+    customers = db.get_customer_directory()
     customer_options = {f"{c['name']} ({c['customer_id']})": c['customer_id'] for c in customers}
     selected_customer = st.selectbox("Select Customer", options=list(customer_options.keys()))
     customer_id = customer_options[selected_customer]
@@ -44,9 +74,14 @@ with tab1:
     if "messages" not in st.session_state:
         st.session_state.messages = []
     
+    def show_latency(metrics: dict):
+        st.caption(f"⏱️ First token {metrics['ttft']:.2f}s · total {metrics['total_latency']:.2f}s")
+    
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
+            if "metrics" in message:
+                show_latency(message["metrics"])
     
     if prompt := st.chat_input("How can we help you?"):
         st.session_state.messages.append({"role": "user", "content": prompt})
@@ -54,15 +89,16 @@ with tab1:
             st.markdown(prompt)
         
         with st.chat_message("assistant"):
-            with st.spinner("🤔 Processing your request..."):
-                response = run_assistly(
-                    customer_id=customer_id, 
-                    query=prompt,
-                    history=st.session_state.messages
-                )
-            st.markdown(response)
+            stream = stream_assistly(
+                customer_id=customer_id, 
+                query=prompt,
+                history=st.session_state.messages[:-1]  # earlier turns, not this prompt
+            )
+            st.write_stream(stream)
+            metrics = {"ttft": stream.ttft, "total_latency": stream.total_latency}
+            show_latency(metrics)
         
-        st.session_state.messages.append({"role": "assistant", "content": response})
+        st.session_state.messages.append({"role": "assistant", "content": stream.response, "metrics": metrics})
     
     if st.session_state.messages:
         if st.button("🗑️ Clear Chat"):
@@ -71,7 +107,11 @@ with tab1:
 
 with tab2:
     st.header("Support Tickets")
-    tickets = db.get_tickets(customer_id)
+    tickets_key = f"tickets_{customer_id}"
+    fetch_tickets = lambda limit, before_date, before_id: db.get_tickets(
+        customer_id, limit=limit, before_date=before_date, before_id=before_id
+    )
+    tickets = load_page(tickets_key, fetch_tickets)
     
     if tickets:
         for ticket in tickets:
@@ -82,12 +122,17 @@ with tab2:
                 st.write(f"**Status:** {ticket['status']}")
                 st.write(f"**Created:** {ticket['created_at']}")
                 st.write(f"**Description:** {ticket['description']}")
+        load_more_button(tickets_key, fetch_tickets, ("created_at", "ticket_id"))
     else:
         st.info("No tickets found")
 
 with tab3:
     st.header("Billing History")
-    billing = db.get_billing_history(customer_id)
+    billing_key = f"billing_{customer_id}"
+    fetch_billing = lambda limit, before_date, before_id: db.get_billing_history(
+        customer_id, limit=limit, before_date=before_date, before_id=before_id
+    )
+    billing = load_page(billing_key, fetch_billing)
     
     if billing:
         for record in billing:
@@ -96,6 +141,7 @@ with tab3:
                 st.write(f"**Invoice:** {record['invoice_number']}")
                 st.write(f"**Status:** {record['status']}")
                 st.write(f"**Method:** {record['payment_method']}")
+        load_more_button(billing_key, fetch_billing, ("billing_date", "billing_id"))
     else:
         st.info("No billing history")
 
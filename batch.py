@@ -0,0 +1,268 @@
+"""
+Offline batch mode for Assistly
+Streams {"customer_id", "query", "history"} records from a JSONL file through
+the workflow with a pool of worker threads, writing one result line per
+record (route, response, per-node timings, per-stage span totals) to the
+output file as soon as it finishes. Rerunning with the same output file resumes: records whose id is
+already in it are skipped. Records get their "id" field as id, or their
+line number in the input.
+
+Usage: python batch.py inbound.jsonl -o results.jsonl --concurrency 8 --rate 5
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+class RateLimiter:
+    """Spaces calls to acquire() at most rate per second (None = unlimited)"""
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait_until = max(now, self._next)
+            self._next = wait_until + self.interval
+        time.sleep(max(0.0, wait_until - now))
+
+def read_records(path: str) -> Iterator[Tuple[str, Dict]]:
+    """(id, record) for every line of a JSONL file; bad lines become {"error": ...}"""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield str(line_number), {"error": f"invalid JSON: {e}"}
+                continue
+            if not isinstance(record, dict):
+                yield str(line_number), {"error": "record is not a JSON object"}
+                continue
+            yield str(record.get("id", line_number)), record
+
+def completed_ids(path: str, retry_errors: bool) -> Set[str]:
+    """Ids already written to an output file (a line cut off by an interruption is ignored)"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(result, dict) or "id" not in result:
+                continue
+            if retry_errors and result.get("status") != "ok":
+                continue
+            done.add(str(result["id"]))
+    return done
+
+def open_output(path: str):
+    """Open the output for appending, ending a cut-off last line first"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    output = open(path, "a+", encoding="utf-8")
+    if output.tell() > 0:
+        output.seek(output.tell() - 1)
+        if output.read(1) != "\n":
+            output.write("\n")
+    return output
+
+def process(run, record_id: str, record: Dict) -> Dict:
+    """Run one record through the workflow; failures become error results"""
+    result = {"id": record_id, "customer_id": record.get("customer_id"), "query": record.get("query")}
+    if "error" in record and "query" not in record:
+        return {**result, "status": "error", "error": record["error"]}
+    if not record.get("customer_id") or not record.get("query"):
+        return {**result, "status": "error", "error": "customer_id and query are required"}
+    
+    start = time.perf_counter()
+    try:
+        turn = run(record["customer_id"], record["query"], record.get("history") or [])
+    except Exception as e:
+        return {**result, "status": "error", "error": f"{type(e).__name__}: {e}",
+                "latency_s": round(time.perf_counter() - start, 4)}
+    
+    stages = {}
+    for span in turn.spans:
+        stages[span.name] = stages.get(span.name, 0.0) + span.seconds
+    return {
+        **result,
+        "status": "ok",
+        "route": turn.route,
+        "response": turn.response,
+        "timings": {node: round(seconds, 4) for node, seconds in turn.timings.items()},
+        "stages": {stage: round(seconds, 4) for stage, seconds in stages.items()},
+        "latency_s": round(turn.total_latency, 4),
+    }
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    values = sorted(values)
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+def run_batch(run, input_path: str, output_path: str, concurrency: int = 4, rate: Optional[float] = None,
+              limit: Optional[int] = None, retry_errors: bool = False, progress_every: int = 50) -> Dict:
+    """Process every record not yet in the output; returns the run summary"""
+    done = completed_ids(output_path, retry_errors)
+    limiter = RateLimiter(rate)
+    results = []
+    skipped = submitted = 0
+    interrupted = False
+    
+    start = time.perf_counter()
+    with open_output(output_path) as output, ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="assistly-batch") as executor:
+        pending = set()  # submitted records whose results aren't written yet
+        
+        def collect(futures):
+            for future in futures:
+                result = future.result()
+                pending.discard(future)
+                output.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+                output.flush()
+                results.append(result)
+                if progress_every and len(results) % progress_every == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"📦 {len(results)} done ({len(results) / elapsed:.1f}/s)", file=sys.stderr)
+        
+        try:
+            for record_id, record in read_records(input_path):
+                if record_id in done:
+                    skipped += 1
+                    continue
+                if limit is not None and submitted >= limit:
+                    break
+                # Keep at most concurrency records in flight so the input is streamed
+                while len(pending) >= concurrency:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+                limiter.acquire()
+                pending.add(executor.submit(process, run, record_id, record))
+                submitted += 1
+            collect(list(pending))
+        except KeyboardInterrupt:
+            interrupted = True
+            # Drop queued records, wait for the running ones and keep their results
+            executor.shutdown(wait=True, cancel_futures=True)
+            collect([future for future in pending if not future.cancelled()])
+            print("⚠️ Interrupted: rerun with the same output file to resume", file=sys.stderr)
+    
+    wall = time.perf_counter() - start
+    return summarize(results, wall, skipped, interrupted)
+
+def summarize(results: List[Dict], wall: float, skipped: int = 0, interrupted: bool = False) -> Dict:
+    """Throughput, latency percentiles and per-node and per-stage timings of a batch"""
+    ok = [result for result in results if result["status"] == "ok"]
+    latencies = [result["latency_s"] for result in ok]
+    nodes = {}
+    stages = {}
+    for result in ok:
+        for node, seconds in result["timings"].items():
+            nodes.setdefault(node, []).append(seconds)
+        for stage, seconds in result.get("stages", {}).items():
+            stages.setdefault(stage, []).append(seconds)
+    
+    return {
+        "processed": len(results),
+        "ok": len(ok),
+        "errors": len(results) - len(ok),
+        "skipped": skipped,
+        "interrupted": interrupted,
+        "wall_s": wall,
+        "throughput_per_s": len(results) / wall if wall else 0.0,
+        "latency_s": {
+            "mean": statistics.mean(latencies),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies),
+        } if latencies else {},
+        "nodes_s": {
+            node: {"mean": statistics.mean(values), "p50": percentile(values, 50), "p95": percentile(values, 95)}
+            for node, values in nodes.items()
+        },
+        # Seconds per request spent in each stage (summed over its spans)
+        "stages_s": {
+            stage: {"mean": statistics.mean(values), "p50": percentile(values, 50), "p95": percentile(values, 95)}
+            for stage, values in sorted(stages.items())
+        },
+        "routes": dict(Counter(result["route"] for result in ok)),
+    }
+
+def print_summary(summary: Dict):
+    print("=" * 60)
+    print("📊 BATCH SUMMARY")
+    print("=" * 60)
+    print(f"processed {summary['processed']} ({summary['ok']} ok, {summary['errors']} errors), "
+          f"skipped {summary['skipped']} already done")
+    print(f"wall {summary['wall_s']:.1f}s, throughput {summary['throughput_per_s']:.2f} queries/s")
+    latency = summary['latency_s']
+    if latency:
+        print(f"latency p50 {latency['p50']:.2f}s  p95 {latency['p95']:.2f}s  "
+              f"p99 {latency['p99']:.2f}s  max {latency['max']:.2f}s")
+    for node, stats in summary['nodes_s'].items():
+        print(f"  {node:<18} mean {stats['mean']:.2f}s  p50 {stats['p50']:.2f}s  p95 {stats['p95']:.2f}s")
+    if summary['stages_s']:
+        print("stages:")
+    for stage, stats in summary['stages_s'].items():
+        print(f"  {stage:<18} mean {stats['mean']:.2f}s  p50 {stats['p50']:.2f}s  p95 {stats['p95']:.2f}s")
+    if summary['routes']:
+        print("routes: " + ", ".join(f"{route} {count}" for route, count in sorted(summary['routes'].items())))
+    if summary['interrupted']:
+        print("⚠️ Interrupted before the end of the input")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("input", help="JSONL file of {customer_id, query, history} records")
+    parser.add_argument("-o", "--output", required=True, help="JSONL results file (appended to, enables resume)")
+    parser.add_argument("--concurrency", type=int, default=4, help="records processed at once")
+    parser.add_argument("--rate", type=float, help="max records started per second")
+    parser.add_argument("--limit", type=int, help="process at most this many new records")
+    parser.add_argument("--retry-errors", action="store_true", help="rerun records whose result was an error")
+    parser.add_argument("--progress-every", type=int, default=50)
+    parser.add_argument("--summary-json", help="also write the summary to this file")
+    parser.add_argument("--metrics-file", help="write an OpenMetrics snapshot of the stage metrics here "
+                                               "(METRICS_FILE does the same at exit)")
+    parser.add_argument("--verbose", action="store_true", help="keep the workflow's per-query output")
+    args = parser.parse_args()
+    
+    os.environ.setdefault("POSTGRES_POOL_MAX_SIZE", str(max(10, args.concurrency * 2)))
+    if not args.verbose:
+        # Per-query progress logging is not even formatted
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+    from graph.workflow import run_assistly_timed
+    from observability.metrics import get_metrics
+    
+    with contextlib.ExitStack() as stack:
+        if not args.verbose:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        summary = run_batch(run_assistly_timed, args.input, args.output, concurrency=args.concurrency,
+                            rate=args.rate, limit=args.limit, retry_errors=args.retry_errors,
+                            progress_every=args.progress_every)
+    
+    print_summary(summary)
+    if args.summary_json:
+        with open(args.summary_json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    if args.metrics_file:
+        get_metrics().write(args.metrics_file)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+Benchmarks for Assistly
+Run individual scripts with: python -m benchmarks.<name>
+"""
@@ -0,0 +1,99 @@
+"""
+Concurrency benchmark: thread-per-conversation run_assistly vs asyncio arun_assistly
+Starts a stub Ollama server in-process, so only PostgreSQL (seeded with
+database/setup_db.py) is needed. The vector store uses a throwaway directory.
+
+Usage: python -m benchmarks.async_concurrency --conversations 200 --threads 16 --concurrency 200
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.stub_ollama import StubOllamaServer
+
+QUERIES = [
+    ("CUST001", "I was charged twice this month"),
+    ("CUST002", "I can't login to my account"),
+    ("CUST003", "What features are in the Enterprise plan?"),
+    ("CUST004", "My dashboard is slow"),
+    ("CUST005", "Can I get a refund for my last invoice?"),
+]
+
+def _summary(label: str, latencies, wall: float):
+    latencies = sorted(latencies)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(f"{label:<28} {len(latencies) / wall:8.1f} conv/s   "
+          f"p50 {statistics.median(latencies) * 1000:8.0f} ms   p95 {p95 * 1000:8.0f} ms   "
+          f"wall {wall:6.2f} s")
+
+def run_sync(run_assistly, conversations: int, threads: int):
+    def one(i):
+        customer_id, query = QUERIES[i % len(QUERIES)]
+        start = time.perf_counter()
+        run_assistly(customer_id, query)
+        return time.perf_counter() - start
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(one, range(conversations)))
+    return latencies, time.perf_counter() - start
+
+async def run_async(arun_assistly, conversations: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def one(i):
+        customer_id, query = QUERIES[i % len(QUERIES)]
+        async with semaphore:
+            start = time.perf_counter()
+            await arun_assistly(customer_id, query)
+            return time.perf_counter() - start
+    
+    await arun_assistly(*QUERIES[0])  # warm up in this loop (async clients are loop-bound)
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one(i) for i in range(conversations)))
+    return list(latencies), time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=16, help="worker threads for the sync path")
+    parser.add_argument("--concurrency", type=int, default=200, help="in-flight conversations for the async path")
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--response-tokens", type=int, default=50)
+    args = parser.parse_args()
+    
+    stub = StubOllamaServer(
+        first_token_latency=args.first_token_ms / 1000,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+    ).start()
+    
+    # Agents read their configuration at import time
+    os.environ["OLLAMA_BASE_URL"] = stub.base_url
+    os.environ.setdefault("CHROMA_PERSIST_DIR", tempfile.mkdtemp(prefix="assistly_bench_"))
+    os.environ.setdefault("POSTGRES_POOL_MAX_SIZE", "32")
+    from graph.workflow import run_assistly, arun_assistly
+    
+    print("=" * 60)
+    print(f"CONCURRENCY BENCHMARK ({args.conversations} conversations, stub LLM at {stub.base_url})")
+    print("=" * 60)
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_assistly(*QUERIES[0])  # warm up connections and compiled graphs
+        sync_latencies, sync_wall = run_sync(run_assistly, args.conversations, args.threads)
+        async_latencies, async_wall = asyncio.run(
+            run_async(arun_assistly, args.conversations, args.concurrency)
+        )
+    
+    _summary(f"sync ({args.threads} threads)", sync_latencies, sync_wall)
+    _summary(f"async ({args.concurrency} in flight)", async_latencies, async_wall)
+    stub.stop()
+
+if __name__ == "__main__":
+    main()
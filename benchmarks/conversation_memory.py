@@ -0,0 +1,150 @@
+"""
+Conversation memory benchmark: verbatim history vs rolling summary
+Plays the same 20-turn conversation twice through run_assistly, once with
+the last six messages pasted verbatim (MEMORY_ENABLED=false behaviour) and
+once with the running summary plus recent messages, and reports the
+specialist prompt size and turn latency per turn.
+
+A stub Ollama server runs in-process with a prefill cost proportional to the
+prompt size, so prompt growth shows up in latency the way it does on a real
+model. Needs PostgreSQL seeded with database/setup_db.py.
+
+Usage: python -m benchmarks.conversation_memory --turns 20 --response-tokens 250
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+from benchmarks.stub_ollama import StubOllamaServer
+
+CUSTOMER_ID = "CUST002"
+QUERIES = [
+    "I can't login to my account",
+    "Wrong password and I'm using Chrome browser",
+    "Yes, I already tried the forgot password option",
+    "The reset email never arrives, I checked spam too",
+    "My email is the one on the account, it hasn't changed",
+    "OK I'm in now. But the dashboard is really slow",
+    "It takes about 30 seconds to load the reports page",
+    "I have around 200 saved reports, is that a problem?",
+    "Clearing the cache didn't help",
+    "Is there an API limit that could be slowing things down?",
+    "We call the API about 5000 times a day from our integration",
+    "Our integration also gets error 429 sometimes",
+    "Would upgrading our plan raise the rate limit?",
+    "What does the Enterprise plan cost compared to ours?",
+    "Does Enterprise include priority support?",
+    "If we upgrade mid-month how is the invoice prorated?",
+    "I was charged twice on the last invoice by the way",
+    "Can you refund the duplicate charge?",
+    "Going back to the login issue, will it happen again?",
+    "Thanks, can you summarize what we agreed on today?",
+]
+
+class RecordingStub(StubOllamaServer):
+    """Stub that records specialist prompt sizes and returns short summaries"""
+    def __init__(self, summary_tokens: int, **kwargs):
+        super().__init__(**kwargs)
+        self.summary_tokens = summary_tokens
+        self.specialist_prompts = []  # prompt characters per specialist call
+    
+    def reply_tokens(self, messages):
+        system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+        if "running summary" in system:
+            return [f"fact{i} " for i in range(self.summary_tokens)]
+        if "routing agent" not in system.lower():
+            self.specialist_prompts.append("\n".join(m.get("content", "") for m in messages))
+        return super().reply_tokens(messages)
+
+def _p95(values):
+    values = sorted(values)
+    return values[max(0, int(len(values) * 0.95) - 1)]
+
+def play_conversation(run_assistly, stub: RecordingStub, counter, turns: int, think_seconds: float):
+    """Per-turn prompt tokens and latency for one conversation"""
+    history = []
+    rows = []
+    for query in (QUERIES * (turns // len(QUERIES) + 1))[:turns]:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = run_assistly(CUSTOMER_ID, query, history)
+        latency = time.perf_counter() - start
+        rows.append({"prompt_tokens": counter.count(stub.specialist_prompts[-1]), "latency_s": latency})
+        history += [{"role": "user", "content": query}, {"role": "assistant", "content": response}]
+        time.sleep(think_seconds)  # the customer reads and types; summaries update meanwhile
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--first-token-ms", type=float, default=150)
+    parser.add_argument("--prompt-tokens-per-second", type=float, default=2000,
+                        help="stub prefill speed; prompt size adds tokens / this to each call")
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--response-tokens", type=int, default=250, help="length of each agent answer")
+    parser.add_argument("--summary-tokens", type=int, default=80, help="words in each stub summary")
+    parser.add_argument("--think-ms", type=float, default=500, help="pause between turns")
+    parser.add_argument("--json", help="also write the per-turn results to this file")
+    args = parser.parse_args()
+    
+    stub = RecordingStub(
+        summary_tokens=args.summary_tokens,
+        first_token_latency=args.first_token_ms / 1000,
+        prompt_tokens_per_second=args.prompt_tokens_per_second,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+    ).start()
+    
+    # Agents read their configuration at import time
+    os.environ["OLLAMA_BASE_URL"] = stub.base_url
+    os.environ.setdefault("CHROMA_PERSIST_DIR", tempfile.mkdtemp(prefix="assistly_bench_"))
+    os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+    with contextlib.redirect_stdout(io.StringIO()):
+        from rag.setup_rag import setup_rag
+        setup_rag()
+        from graph import nodes
+        from graph.workflow import run_assistly
+    from agents.conversation_memory import ConversationMemory
+    from agents.prompt_builder import get_token_counter
+    agents = (nodes.billing_agent, nodes.technical_agent, nodes.sales_agent)
+    
+    print("=" * 60)
+    print(f"CONVERSATION MEMORY BENCHMARK ({args.turns} turns, {args.response_tokens}-token answers)")
+    print("=" * 60)
+    
+    results = {}
+    memory = None
+    for mode in ("verbatim", "summary"):
+        memory = ConversationMemory() if mode == "summary" else None
+        for agent in agents:
+            agent.memory = memory
+        results[mode] = play_conversation(run_assistly, stub, get_token_counter(), args.turns,
+                                          args.think_ms / 1000)
+    memory.wait()
+    
+    print(f"{'turn':>4}{'verbatim tok':>14}{'summary tok':>13}{'verbatim s':>12}{'summary s':>11}")
+    for turn, (verbatim, summary) in enumerate(zip(results["verbatim"], results["summary"]), 1):
+        print(f"{turn:>4}{verbatim['prompt_tokens']:>14}{summary['prompt_tokens']:>13}"
+              f"{verbatim['latency_s']:>12.2f}{summary['latency_s']:>11.2f}")
+    
+    print("-" * 60)
+    for mode, rows in results.items():
+        tokens = [row['prompt_tokens'] for row in rows]
+        latencies = [row['latency_s'] for row in rows]
+        print(f"{mode:<10} prompt mean {statistics.mean(tokens):6.0f} max {max(tokens):5d} tokens   "
+              f"latency p50 {statistics.median(latencies):5.2f}s p95 {_p95(latencies):5.2f}s")
+    stats = memory.stats()
+    print(f"summary updates: {stats['updates']} (avg {stats['avg_summarize_seconds']:.2f}s, off the "
+          f"critical path), turns served while an update was running: {stats['lagging_turns']}")
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": results, "memory": stats}, f, indent=2)
+    stub.stop()
+
+if __name__ == "__main__":
+    main()
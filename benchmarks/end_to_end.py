@@ -0,0 +1,303 @@
+"""
+End-to-end benchmark: the real workflow against local stand-ins
+Runs graph/workflow.py (router, specialists, retrieval, caches, memory) with
+no external services: a stub Ollama server for chat and embeddings
+(benchmarks/stub_ollama.py), an in-memory seeded database
+(benchmarks/stub_db.py) and a synthetic knowledge base indexed into a
+throwaway vector store. For each concurrency level it reports throughput,
+end-to-end latency, per-stage latency (from the workflow's timing spans:
+route, db, retrieval, embedding, vector_search, llm) and the highest RSS
+sampled while the level ran; the process's peak RSS is reported once.
+
+Results are written as JSON; pass an earlier file as --compare to see how
+the current commit differs from it.
+
+Usage: python -m benchmarks.end_to_end --concurrency 1,4,16 --requests 100 --json bench.json
+       python -m benchmarks.end_to_end --json new.json --compare bench.json
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from benchmarks.stub_ollama import StubOllamaServer
+from benchmarks.stub_db import StubDatabaseManager, seed_database
+from benchmarks.synthetic_kb import write_synthetic_kb
+
+STAGES = ("route", "db", "retrieval", "embedding", "vector_search", "llm")
+
+# Query templates per route; the slots keep queries distinct like real traffic
+TEMPLATES = {
+    "billing": ["I was charged twice on invoice INV-{n}", "Can I get a refund of ${amount} for last month?",
+                "Why did my payment of ${amount} fail?", "Please send me a receipt for invoice INV-{n}"],
+    "technical": ["I can't login from {browser} since {day}", "The dashboard takes {n} seconds to load",
+                  "Our API integration gets error 429 after {n} calls", "The mobile app crashes on {day}"],
+    "sales": ["What does the Enterprise plan add for a team of {n}?", "Is there a discount for {n} seats?",
+              "How much storage do we get if we upgrade on {day}?", "Can we trial the Pro plan for {n} days?"],
+}
+BROWSERS = ["Chrome", "Firefox", "Safari", "Edge"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+def build_workload(rng: random.Random, customer_ids: List[str], requests: int, history_share: float):
+    """(customer_id, query, history) tuples; history_share of them continue a conversation"""
+    workload = []
+    for _ in range(requests):
+        route = rng.choice(list(TEMPLATES))
+        slots = {"n": rng.randint(2, 9999), "amount": f"{rng.uniform(5, 200):.2f}",
+                 "browser": rng.choice(BROWSERS), "day": rng.choice(DAYS)}
+        query = rng.choice(TEMPLATES[route]).format(**slots)
+        history = []
+        if rng.random() < history_share:
+            for turn in range(rng.randint(1, 3)):
+                history += [{"role": "user", "content": rng.choice(TEMPLATES[route]).format(**slots)},
+                            {"role": "assistant", "content": f"Here is what I found about your request {turn + 1}."}]
+        workload.append((rng.choice(customer_ids), query, history))
+    return workload
+
+def use_stub_database(nodes, db: StubDatabaseManager):
+    """Point the shared agents at the stub database"""
+    from database.async_db_manager import AsyncDatabaseManager
+    nodes.db = db
+    for agent in (nodes.billing_agent, nodes.technical_agent, nodes.sales_agent):
+        agent.db = db
+        agent.async_db = AsyncDatabaseManager(db)
+
+def _percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    return values[max(0, math.ceil(len(values) * pct / 100) - 1)]
+
+def _distribution(values: List[float]) -> Dict:
+    if not values:
+        return {"count": 0}
+    return {"count": len(values), "mean": statistics.mean(values), "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95), "p99": _percentile(values, 99), "max": max(values)}
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far (None where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process right now (None without /proc)"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+@contextlib.contextmanager
+def sample_rss(interval: float = 0.05):
+    """Collect current RSS samples into the yielded list while the block runs"""
+    samples = []
+    done = threading.Event()
+    def sample():
+        while True:
+            rss = current_rss_mb()
+            if rss is None:
+                return
+            samples.append(rss)
+            if done.wait(interval):
+                return
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        yield samples
+    finally:
+        done.set()
+        sampler.join()
+
+def git_revision() -> Dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, timeout=10).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+def run_level(run, workload, concurrency: int, stub: StubOllamaServer, db: StubDatabaseManager) -> Dict:
+    """Send the workload with this many requests in flight"""
+    def one(request):
+        customer_id, query, history = request
+        start = time.perf_counter()
+        try:
+            turn = run(customer_id, query, history)
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}", "latency_s": time.perf_counter() - start}
+        return {"latency_s": turn.total_latency, "route": turn.route, "timings": turn.timings, "spans": turn.spans}
+    
+    chat_before, embed_before, queries_before = stub.request_counts["chat"], stub.request_counts["embed"], db.queries
+    with sample_rss() as rss:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(one, workload))
+        wall = time.perf_counter() - start
+    
+    ok = [result for result in results if "error" not in result]
+    nodes = {}
+    stages = {stage: [] for stage in STAGES}
+    for result in ok:
+        for node, seconds in result["timings"].items():
+            nodes.setdefault(node, []).append(seconds)
+        for span in result["spans"]:
+            if span.name in stages:
+                stages[span.name].append(span.seconds)
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "error_samples": sorted({result["error"] for result in results if "error" in result})[:3],
+        "wall_s": wall,
+        "throughput_per_s": len(results) / wall,
+        "latency_s": _distribution([result["latency_s"] for result in ok]),
+        "stages_s": {stage: _distribution(values) for stage, values in stages.items()},
+        "nodes_s": {node: _distribution(values) for node, values in nodes.items()},
+        "llm_calls": stub.request_counts["chat"] - chat_before,
+        "embedding_calls": stub.request_counts["embed"] - embed_before,
+        "db_round_trips": db.queries - queries_before,
+        "rss_mb": max(rss) if rss else None,
+    }
+
+def print_level(level: Dict):
+    latency = level["latency_s"]
+    print(f"\nconcurrency {level['concurrency']}: {level['throughput_per_s']:.2f} req/s, "
+          f"{level['errors']} errors, RSS {level['rss_mb'] or 0:.0f} MB")
+    if latency.get("count"):
+        print(f"  end-to-end     p50 {latency['p50'] * 1000:8.1f} ms  p95 {latency['p95'] * 1000:8.1f} ms  "
+              f"p99 {latency['p99'] * 1000:8.1f} ms")
+    for stage, stats in level["stages_s"].items():
+        if stats["count"]:
+            print(f"  {stage:<14} p50 {stats['p50'] * 1000:8.1f} ms  p95 {stats['p95'] * 1000:8.1f} ms  "
+                  f"({stats['count']} calls)")
+    for sample in level["error_samples"]:
+        print(f"  ⚠️ {sample}")
+
+def print_comparison(current: Dict, baseline: Dict):
+    """Relative change per concurrency level against an earlier result file"""
+    def change(new, old):
+        return f"{(new - old) / old:+7.1%}" if old else "    n/a"
+    
+    print("\n" + "=" * 60)
+    print(f"VS BASELINE {(baseline['meta'].get('commit') or 'unknown')[:10]} "
+          f"({baseline['meta'].get('timestamp', '?')})")
+    print("=" * 60)
+    old_levels = {level["concurrency"]: level for level in baseline["levels"]}
+    for level in current["levels"]:
+        old = old_levels.get(level["concurrency"])
+        if old is None:
+            continue
+        print(f"concurrency {level['concurrency']:>3}: throughput "
+              f"{change(level['throughput_per_s'], old['throughput_per_s'])}, p95 "
+              f"{change(level['latency_s'].get('p95', 0), old['latency_s'].get('p95', 0))}, "
+              + ", ".join(f"{stage} p50 {change(level['stages_s'][stage].get('p50', 0), old['stages_s'].get(stage, {}).get('p50', 0))}"
+                          for stage in STAGES))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated levels")
+    parser.add_argument("--requests", type=int, default=100, help="requests per level")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--history-share", type=float, default=0.3, help="share of requests with earlier turns")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--db-ms", type=float, default=2, help="simulated database round trip")
+    parser.add_argument("--kb-docs", type=int, default=5, help="synthetic documents per topic")
+    parser.add_argument("--first-token-ms", type=float, default=200)
+    parser.add_argument("--prompt-tokens-per-second", type=float, default=0)
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--response-tokens", type=int, default=60)
+    parser.add_argument("--embed-ms", type=float, default=20)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="earlier --json output to compare against")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(",")]
+    
+    stub = StubOllamaServer(
+        first_token_latency=args.first_token_ms / 1000,
+        prompt_tokens_per_second=args.prompt_tokens_per_second,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        embed_latency=args.embed_ms / 1000,
+    ).start()
+    
+    # Agents read their configuration at import time; nothing may reach real services
+    workdir = tempfile.mkdtemp(prefix="assistly_bench_")
+    os.environ["OLLAMA_BASE_URL"] = stub.base_url
+    os.environ["CHROMA_PERSIST_DIR"] = os.path.join(workdir, "vectors")
+    os.environ["REFERENCE_CACHE_LISTEN"] = "false"
+    os.environ["POSTGRES_POOL_ENABLED"] = "false"
+    for variable in ("ROUTER_CACHE_PATH", "EMBEDDING_CACHE_PATH"):
+        os.environ.pop(variable, None)
+    
+    print("=" * 60)
+    print(f"END-TO-END BENCHMARK ({args.requests} requests x concurrency {args.concurrency}, stub services)")
+    print("=" * 60)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        from rag.document_loader import DocumentLoader
+        from rag.indexer import KnowledgeBaseIndexer
+        from rag.resources import get_vector_store
+        kb_dir = os.path.join(workdir, "knowledge_base")
+        write_synthetic_kb(kb_dir, docs_per_topic=args.kb_docs, seed=args.seed)
+        report = KnowledgeBaseIndexer(get_vector_store(), DocumentLoader(kb_dir)).index()
+        from graph import nodes
+        from graph.workflow import run_assistly_timed
+    
+    db = StubDatabaseManager(seed_database(args.customers, args.seed), query_latency=args.db_ms / 1000)
+    use_stub_database(nodes, db)
+    print(f"📚 {report.added} synthetic chunks indexed, {args.customers} seeded customers")
+    
+    rng = random.Random(args.seed)
+    customer_ids = [row["customer_id"] for row in db.tables["customers"]]
+    results = {
+        "meta": {
+            **git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": vars(args),
+        },
+        "levels": [],
+    }
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        run_level(run_assistly_timed, build_workload(rng, customer_ids, args.warmup, args.history_share),
+                  1, stub, db)
+        for concurrency in levels:
+            workload = build_workload(rng, customer_ids, args.requests, args.history_share)
+            results["levels"].append(run_level(run_assistly_timed, workload, concurrency, stub, db))
+        if nodes.memory is not None:
+            nodes.memory.wait()
+    results["peak_rss_mb"] = peak_rss_mb()
+    results["caches"] = {"customer": db.customer_cache_stats(),
+                         "router": nodes.router_agent.cache.stats() if nodes.router_agent.cache else None}
+    
+    for level in results["levels"]:
+        print_level(level)
+    print(f"\npeak RSS {results['peak_rss_mb'] or 0:.0f} MB")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(results, json.load(f))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"\n💾 Results saved to {args.json}")
+    stub.stop()
+
+if __name__ == "__main__":
+    main()
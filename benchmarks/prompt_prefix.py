@@ -0,0 +1,182 @@
+"""
+Prompt prefix benchmark: prefill work with the old and the stable-prefix layout
+Builds the specialists' real prompts (PostgreSQL data, knowledge base chunks,
+verbatim history) for one conversation per customer, then sends them in the
+old layout (history and customer data first, instructions last, everything
+in the user message) and in the current one (system prompt, instructions and
+plan catalogue first, then customer data, conversation, knowledge, query).
+Prompts are sent once conversation by conversation and once interleaved
+across customers, as concurrent traffic would arrive.
+
+By default an in-process stub with a simulated prefix cache stands in for
+Ollama; pass --base-url to measure a real server (prompt_eval_count and
+prompt_eval_duration come from its responses). Needs PostgreSQL seeded with
+database/setup_db.py.
+
+Usage: python -m benchmarks.prompt_prefix --customers 5 --turns 6
+       python -m benchmarks.prompt_prefix --base-url http://localhost:11434
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import tempfile
+from langchain_core.messages import HumanMessage, SystemMessage
+from benchmarks.stub_ollama import StubOllamaServer
+
+# One conversation per customer, routes assigned round-robin
+CONVERSATIONS = {
+    "billing": [
+        "Why was I charged twice this month?",
+        "The second charge was on the same day as the first",
+        "Can I get a refund for the duplicate charge?",
+        "How long will the refund take to arrive?",
+        "Will my next invoice be correct?",
+        "Can you send me a copy of the last invoice?",
+    ],
+    "technical": [
+        "The dashboard is slow to load",
+        "It takes about 30 seconds, in Chrome and Firefox",
+        "Clearing the cache didn't help",
+        "Now the mobile app also logs me out",
+        "I reinstalled the app and it still happens",
+        "Should I open a ticket for this?",
+    ],
+    "sales": [
+        "What would the Enterprise plan add over my current plan?",
+        "Does Enterprise include priority support?",
+        "How much more storage would we get?",
+        "Can we try Enterprise before upgrading?",
+        "Is there a discount for annual billing?",
+        "How do I upgrade if I decide to?",
+    ],
+}
+ROUTES = list(CONVERSATIONS)
+
+def answer(customer_id: str, turn: int) -> str:
+    return (f"Thanks {customer_id}, about your message {turn}: here is what I found on your "
+            f"account and the next steps I recommend. ") * 4
+
+# Section order before the stable-prefix layout
+LEGACY_ORDER = ("summary", "history", "customer", "billing_history", "failed_payments", "tickets",
+                "plans", "knowledge", "query", "instructions")
+
+def legacy_messages(agent, sections):
+    """Old layout: system prompt alone, every section in the user message"""
+    for section in sections:
+        section.stable = False
+    sections.sort(key=lambda section: LEGACY_ORDER.index(section.name))
+    prompt = agent.build_prompt(sections)
+    return [SystemMessage(content=agent.system_prompt), HumanMessage(content=prompt.text)]
+
+def build_requests(customer_ids, turns: int, interleaved: bool):
+    """(customer, route, query, history) in send order"""
+    if interleaved:
+        order = [(customer_id, turn) for turn in range(turns) for customer_id in customer_ids]
+    else:
+        order = [(customer_id, turn) for customer_id in customer_ids for turn in range(turns)]
+    
+    requests = []
+    for customer_id, turn in order:
+        route = ROUTES[customer_ids.index(customer_id) % len(ROUTES)]
+        script = CONVERSATIONS[route]
+        history = []
+        for previous in range(turn):
+            history += [{"role": "user", "content": script[previous % len(script)]},
+                        {"role": "assistant", "content": answer(customer_id, previous + 1)}]
+        requests.append((customer_id, route, script[turn % len(script)], history))
+    return requests
+
+def prompt_messages(agent, layout: str, customer_id: str, query: str, history):
+    from agents.conversation_memory import MemoryContext
+    context = agent.db.get_agent_context(customer_id, **agent.context_options)
+    chunks = agent.retrieve_knowledge(query)
+    memory = MemoryContext("", history[-6:], 0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if layout == "stable_prefix":
+            return agent._build_messages({'customer_context': context, 'knowledge_context': chunks},
+                                         query, memory)
+        return legacy_messages(agent, agent.prompt_sections(context, chunks, query, memory))
+
+def measure(llm, counter, prompts):
+    rows = []
+    for messages in prompts:
+        metadata = llm.invoke(messages).response_metadata
+        rows.append({
+            "prompt_tokens": counter.count("".join(m.content for m in messages)),
+            "evaluated_tokens": metadata.get("prompt_eval_count", 0),
+            "prefill_ms": metadata.get("prompt_eval_duration", 0) / 1e6,
+        })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--customers", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--base-url", help="real Ollama server (default: in-process stub)")
+    parser.add_argument("--prompt-tokens-per-second", type=float, default=500, help="stub prefill speed")
+    parser.add_argument("--cache-slots", type=int, default=4,
+                        help="stub prompts kept for prefix reuse (Ollama keeps one per OLLAMA_NUM_PARALLEL slot)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    
+    stub = None
+    if args.base_url:
+        os.environ["OLLAMA_BASE_URL"] = args.base_url
+    else:
+        stub = StubOllamaServer(first_token_latency=0.0, response_tokens=1,
+                                prompt_tokens_per_second=args.prompt_tokens_per_second,
+                                prefix_cache_slots=args.cache_slots).start()
+        os.environ["OLLAMA_BASE_URL"] = stub.base_url
+    
+    # Agents read their configuration at import time
+    os.environ.setdefault("CHROMA_PERSIST_DIR", tempfile.mkdtemp(prefix="assistly_bench_"))
+    os.environ.setdefault("MEMORY_ENABLED", "false")
+    with contextlib.redirect_stdout(io.StringIO()):
+        from rag.setup_rag import setup_rag
+        setup_rag()
+        from graph import nodes
+    from agents.prompt_builder import get_token_counter
+    from config.ollama import create_chat_model
+    agents = {"billing": nodes.billing_agent, "technical": nodes.technical_agent, "sales": nodes.sales_agent}
+    customer_ids = [row['customer_id'] for row in nodes.db.execute_query(
+        "SELECT customer_id FROM customers ORDER BY customer_id LIMIT %s", (args.customers,)
+    )]
+    llm = create_chat_model(temperature=0, num_predict=1)
+    
+    print("=" * 60)
+    print(f"PROMPT PREFIX BENCHMARK ({len(customer_ids)} customers x {args.turns} turns, "
+          f"{'Ollama at ' + args.base_url if args.base_url else 'stub prefix cache'})")
+    print("=" * 60)
+    print(f"{'order':<14}{'layout':<15}{'prompt tok':>11}{'evaluated':>11}{'reused':>8}"
+          f"{'prefill ms':>12}{'total s':>9}")
+    
+    results = {}
+    for interleaved in (False, True):
+        order = "interleaved" if interleaved else "conversation"
+        requests = build_requests(customer_ids, args.turns, interleaved)
+        for layout in ("legacy", "stable_prefix"):
+            prompts = [prompt_messages(agents[route], layout, customer_id, query, history)
+                       for customer_id, route, query, history in requests]
+            if stub is not None:
+                stub.clear_prefix_cache()
+            rows = measure(llm, get_token_counter(), prompts)
+            
+            prompt_tokens = sum(row['prompt_tokens'] for row in rows)
+            evaluated = sum(row['evaluated_tokens'] for row in rows)
+            prefill = [row['prefill_ms'] for row in rows]
+            results[f"{order}/{layout}"] = rows
+            print(f"{order:<14}{layout:<15}{prompt_tokens / len(rows):>11.0f}{evaluated / len(rows):>11.0f}"
+                  f"{1 - evaluated / prompt_tokens:>8.0%}{statistics.mean(prefill):>12.1f}"
+                  f"{sum(prefill) / 1000:>9.2f}")
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+    if stub is not None:
+        stub.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Routing evaluation: accuracy and latency of each router tier on a labelled test set
+Tiers: keywords only, local (keywords + embedding centroids), tiered (local with
+LLM fallback below ROUTER_CONFIDENCE_THRESHOLD) and LLM only.
+
+Usage: python -m benchmarks.routing_eval [--testset benchmarks/data/routing_testset.jsonl] [--stub]
+--stub runs against an in-process stub Ollama server instead of a real one.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from benchmarks.stub_ollama import StubOllamaServer
+
+DEFAULT_TESTSET = os.path.join(os.path.dirname(__file__), "data", "routing_testset.jsonl")
+
+def load_testset(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def evaluate(label: str, decide, testset):
+    """decide(query) -> (route or None, used_llm)"""
+    correct = 0
+    escalated = 0
+    undecided = 0
+    latencies = []
+    for example in testset:
+        start = time.perf_counter()
+        route, used_llm = decide(example["query"])
+        latencies.append(time.perf_counter() - start)
+        correct += route == example["route"]
+        escalated += used_llm
+        undecided += route is None
+    
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(f"{label:<12} accuracy {correct / len(testset):6.1%}   "
+          f"mean {statistics.mean(latencies) * 1000:8.2f} ms   p95 {p95 * 1000:8.2f} ms   "
+          f"LLM calls {escalated:3d}   undecided {undecided:3d}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate router tiers")
+    parser.add_argument("--testset", default=DEFAULT_TESTSET)
+    parser.add_argument("--stub", action="store_true", help="use an in-process stub Ollama server")
+    args = parser.parse_args()
+    
+    stub = None
+    if args.stub:
+        stub = StubOllamaServer(first_token_latency=0.3, embed_latency=0.01).start()
+        os.environ["OLLAMA_BASE_URL"] = stub.base_url
+    
+    from agents.router_agent import RouterAgent
+    router = RouterAgent()
+    classifier = router.classifier
+    testset = load_testset(args.testset)
+    
+    print("=" * 60)
+    print(f"ROUTING EVALUATION ({len(testset)} labelled queries, "
+          f"threshold {router.confidence_threshold})")
+    print("=" * 60)
+    
+    def keywords_only(query):
+        decision = classifier.classify_keywords(query)
+        return (decision.route if decision else None), False
+    
+    def local_only(query):
+        decision = classifier.classify(query)
+        return (decision.route if decision else None), False
+    
+    def tiered(query):
+        decision = router.classify(query)
+        return decision.route, decision.source == "llm"
+    
+    def llm_only(query):
+        response = router.llm.invoke(router._messages(query))
+        return router._parse_route(response.content), True
+    
+    classifier.warm_up()  # build centroids up front
+    evaluate("keywords", keywords_only, testset)
+    evaluate("local", local_only, testset)
+    evaluate("tiered", tiered, testset)
+    evaluate("llm", llm_only, testset)
+    
+    if stub:
+        stub.stop()
+
+if __name__ == "__main__":
+    main()
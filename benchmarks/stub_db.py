@@ -0,0 +1,267 @@
+"""
+In-memory stand-in for PostgreSQL in benchmarks
+StubDatabaseManager is the real DatabaseManager with its connections
+swapped for stub ones: a stub cursor answers the SQL the query methods send
+from seeded in-memory tables, after a configurable round-trip delay. Query
+building, result parsing and the reference and customer caches are the
+production code, so the workflow runs without a database server and DB-layer
+changes still show up in the numbers. SQL the stub doesn't understand raises
+NotImplementedError rather than being answered wrongly.
+"""
+import json
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+from database.db_manager import DatabaseManager
+from database.customer_cache import CustomerCache, customer_cache_settings_from_env
+from database.reference_cache import ReferenceCache, reference_cache_settings_from_env
+
+# Same plans as database/mock_data.sql
+PLANS = [
+    {"plan_id": "PLAN_BASIC", "plan_name": "Basic Plan", "price": Decimal("9.99"), "billing_cycle": "monthly",
+     "features": "Email support, 5GB storage", "active": True},
+    {"plan_id": "PLAN_PRO", "plan_name": "Pro Plan", "price": Decimal("29.99"), "billing_cycle": "monthly",
+     "features": "24/7 support, 50GB storage, Priority queue", "active": True},
+    {"plan_id": "PLAN_ENTERPRISE", "plan_name": "Enterprise Plan", "price": Decimal("99.99"), "billing_cycle": "monthly",
+     "features": "Dedicated support, Unlimited storage, Custom integrations", "active": True},
+]
+FIRST_NAMES = ["John", "Jane", "Bob", "Alice", "Charlie", "Maria", "Wei", "Priya", "Omar", "Sofia"]
+LAST_NAMES = ["Doe", "Smith", "Johnson", "Williams", "Brown", "Garcia", "Chen", "Patel", "Haddad", "Rossi"]
+TICKET_SUBJECTS = {
+    "billing": ["Double charged", "Payment failed", "Refund request", "Invoice question"],
+    "technical": ["Cannot login", "Slow performance", "Sync error", "API rate limit"],
+    "sales": ["Upgrade plan", "Enterprise features", "Annual discount", "Add seats"],
+}
+
+def seed_database(customers: int = 200, seed: int = 7) -> Dict[str, List[Dict]]:
+    """Deterministic plans, customers, billing history and tickets (CUST001, CUST002, ...)"""
+    rng = random.Random(seed)
+    now = datetime(2024, 6, 1, 12, 0, 0)
+    tables = {"plans": [dict(plan) for plan in PLANS], "customers": [], "billing_history": [], "tickets": []}
+    
+    for n in range(1, customers + 1):
+        customer_id = f"CUST{n:03d}"
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        plan = rng.choice(PLANS)
+        created = now - timedelta(days=rng.randint(30, 900))
+        tables["customers"].append({
+            "customer_id": customer_id, "name": f"{first} {last}",
+            "email": f"{first}.{last}.{n}@example.com".lower(), "phone": f"+1-555-{n:04d}",
+            "plan": plan["plan_id"], "created_at": created, "last_updated": created,
+        })
+        for month in range(rng.randint(1, 12)):
+            billing_date = (now - timedelta(days=30 * month + rng.randint(0, 5))).date()
+            tables["billing_history"].append({
+                "billing_id": len(tables["billing_history"]) + 1, "customer_id": customer_id,
+                "amount": plan["price"], "billing_date": billing_date,
+                "status": rng.choices(["paid", "failed", "pending"], weights=[85, 10, 5])[0],
+                "invoice_number": f"INV-{n:03d}-{billing_date:%Y%m}-{month}",
+                "payment_method": rng.choice(["credit_card", "paypal", "wire_transfer"]),
+                "created_at": datetime.combine(billing_date, datetime.min.time()),
+            })
+        for _ in range(rng.randint(0, 4)):
+            issue_type = rng.choice(list(TICKET_SUBJECTS))
+            subject = rng.choice(TICKET_SUBJECTS[issue_type])
+            tables["tickets"].append({
+                "ticket_id": len(tables["tickets"]) + 1, "customer_id": customer_id,
+                "issue_type": issue_type, "subject": subject, "description": f"{subject} (synthetic)",
+                "status": rng.choice(["open", "in_progress", "resolved"]),
+                "priority": rng.choice(["low", "medium", "high"]),
+                "created_at": now - timedelta(days=rng.randint(0, 180), minutes=rng.randint(0, 1440)),
+                "resolved_at": None,
+            })
+    return tables
+
+# Statement shapes DatabaseManager sends (after whitespace is collapsed)
+_SELECT = re.compile(r"SELECT (?P<columns>.+?) FROM (?P<table>\w+)(?: WHERE (?P<where>.+?))?"
+                     r"(?: ORDER BY (?P<order>.+?))?(?: LIMIT (?P<limit>%s))?$")
+_INSERT = re.compile(r"INSERT INTO (?P<table>\w+) \((?P<columns>[^)]+)\) VALUES \([^)]+\)"
+                     r"(?: RETURNING (?P<returning>\w+))?$")
+_AGENT_CONTEXT = "SELECT row_to_json(c)::text AS customer,"
+_EQUALS = re.compile(r"(\w+) = (%s|TRUE|FALSE|'[^']*')$")
+_BEFORE = re.compile(r"(\w+) < %s$")
+_BEFORE_KEY = re.compile(r"\((\w+), (\w+)\) < \(%s, %s\)$")
+_LITERALS = {"TRUE": True, "FALSE": False}
+
+# Column defaults and serial keys of the tables the stub inserts into
+_INSERT_DEFAULTS = {
+    "tickets": lambda: {"status": "open", "priority": "medium", "created_at": datetime.now(), "resolved_at": None},
+}
+_SERIAL_COLUMNS = {"tickets": "ticket_id"}
+
+def _json_text(value) -> str:
+    """value as row_to_json/json_agg print it (numerics keep their scale, dates are ISO strings)"""
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{json.dumps(key)}:{_json_text(item)}" for key, item in value.items()) + "}"
+    if isinstance(value, list):
+        return "[" + ",".join(_json_text(item) for item in value) + "]"
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return json.dumps(value.isoformat())
+    return json.dumps(value)
+
+def _order(rows: List[Dict], order: str) -> List[Dict]:
+    """Sort rows by an ORDER BY list, e.g. billing_date DESC, billing_id DESC"""
+    for term in reversed(order.split(", ")):
+        column, _, direction = term.partition(" ")
+        rows = sorted(rows, key=lambda row: row[column], reverse=direction == "DESC")
+    return rows
+
+class StubCursor:
+    def __init__(self, db: "StubDatabaseManager", dict_rows: bool):
+        self.db = db
+        self.dict_rows = dict_rows
+        self.rows: List[Dict] = []
+        self.rowcount = -1
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def execute(self, query: str, params=None):
+        self.rows = self.db.run_sql(query, params)
+        self.rowcount = len(self.rows)
+    
+    def fetchall(self) -> List:
+        rows, self.rows = self.rows, []
+        return rows if self.dict_rows else [tuple(row.values()) for row in rows]
+    
+    def fetchone(self):
+        rows = self.fetchall()
+        return rows[0] if rows else None
+    
+    def close(self):
+        pass
+
+class StubConnection:
+    def __init__(self, db: "StubDatabaseManager"):
+        self.db = db
+    
+    def cursor(self, cursor_factory=None) -> StubCursor:
+        # DatabaseManager only passes a cursor_factory for RealDictCursor
+        return StubCursor(self.db, dict_rows=cursor_factory is not None)
+    
+    def commit(self):
+        pass
+    
+    def rollback(self):
+        pass
+    
+    def close(self):
+        pass
+
+class StubDatabaseManager(DatabaseManager):
+    def __init__(self, tables: Dict[str, List[Dict]] = None, query_latency: float = 0.002):
+        self.tables = tables or seed_database()
+        self.query_latency = query_latency  # seconds per simulated round trip
+        self.connection_params = {"database": f"assistly_stub_{id(self)}"}
+        self.pool = None  # connection() then opens (stub) connections through get_connection
+        # Own caches (never shared with a real database, never LISTENing)
+        reference = reference_cache_settings_from_env()
+        self.reference_cache = ReferenceCache(reference['ttl'], reference['ttls']) if reference['enabled'] else None
+        customer = customer_cache_settings_from_env()
+        self.customer_cache = CustomerCache(customer['ttl'], customer['max_customers'],
+                                            customer['cache_context']) if customer['enabled'] else None
+        self._lock = threading.Lock()
+        self.queries = 0
+    
+    def get_connection(self) -> StubConnection:
+        return StubConnection(self)
+    
+    def run_sql(self, query: str, params=None) -> List[Dict]:
+        """Answer one statement from the in-memory tables, after the simulated round trip"""
+        if self.query_latency > 0:
+            time.sleep(self.query_latency)
+        sql = " ".join(query.split())
+        with self._lock:
+            self.queries += 1
+            if sql.startswith(_AGENT_CONTEXT):
+                return self._agent_context(sql, params)
+            match = _SELECT.match(sql)
+            if match:
+                return self._select(match, list(params or ()), sql)
+            match = _INSERT.match(sql)
+            if match and match["table"] in _INSERT_DEFAULTS:
+                return self._insert(match, list(params or ()))
+        raise NotImplementedError(f"StubDatabaseManager can't answer: {sql[:120]}")
+    
+    def _select(self, match: re.Match, params: List, sql: str) -> List[Dict]:
+        rows = self.tables[match["table"]]
+        conditions = match["where"].split(" AND ") if match["where"] else []
+        for condition in conditions:
+            rows = self._filter(rows, condition, params, sql)
+        if match["order"]:
+            rows = _order(rows, match["order"])
+        if match["limit"]:
+            limit = params.pop(0)
+            rows = rows if limit is None else rows[:limit]
+        if match["columns"] == "*":
+            return [dict(row) for row in rows]
+        columns = match["columns"].split(", ")
+        return [{column: row[column] for column in columns} for row in rows]
+    
+    @staticmethod
+    def _filter(rows: List[Dict], condition: str, params: List, sql: str) -> List[Dict]:
+        match = _EQUALS.match(condition)
+        if match:
+            column, operand = match.groups()
+            if operand == "%s":
+                value = params.pop(0)
+            else:
+                value = _LITERALS.get(operand, operand.strip("'"))
+            return [row for row in rows if row[column] == value]
+        match = _BEFORE.match(condition)
+        if match:
+            column, value = match[1], params.pop(0)
+            return [row for row in rows if row[column] < value]
+        match = _BEFORE_KEY.match(condition)
+        if match:
+            key = (params.pop(0), params.pop(0))
+            return [row for row in rows if (row[match[1]], row[match[2]]) < key]
+        raise NotImplementedError(f"StubDatabaseManager can't answer: {sql[:120]}")
+    
+    def _insert(self, match: re.Match, params: List) -> List[Dict]:
+        table = match["table"]
+        row = _INSERT_DEFAULTS[table]()
+        row.update(zip(match["columns"].split(", "), params))
+        serial = _SERIAL_COLUMNS[table]
+        row[serial] = max((existing[serial] for existing in self.tables[table]), default=0) + 1
+        self.tables[table].append(row)
+        return [{match["returning"]: row[match["returning"]]}] if match["returning"] else []
+    
+    def _agent_context(self, sql: str, params: Dict) -> List[Dict]:
+        """The get_agent_context bundle, as JSON text columns like PostgreSQL returns them"""
+        customers = [row for row in self.tables["customers"] if row["customer_id"] == params["customer_id"]]
+        if not customers:
+            return []
+        customer = customers[0]
+        
+        def newest(table: str, date_column: str, id_column: str, limit: Optional[int], **equals) -> str:
+            rows = [row for row in self.tables[table] if row["customer_id"] == customer["customer_id"]
+                    and all(row[column] == value for column, value in equals.items())]
+            rows = _order(rows, f"{date_column} DESC, {id_column} DESC")
+            return _json_text(rows if limit is None else rows[:limit])
+        
+        result = {
+            "customer": _json_text(customer),
+            "billing_history": newest("billing_history", "billing_date", "billing_id", params["billing_limit"]),
+            "failed_payments": newest("billing_history", "billing_date", "billing_id", params["failed_limit"],
+                                      status="failed"),
+            "tickets": newest("tickets", "created_at", "ticket_id", params["ticket_limit"]),
+        }
+        # Plans are joined in only when the reference cache is disabled
+        if " AS plan," in sql:
+            plans = [row for row in self.tables["plans"] if row["plan_id"] == customer["plan"]]
+            result["plan"] = _json_text(plans[0]) if plans else None
+            all_plans = []
+            if "FROM plans ap" in sql:
+                all_plans = _order([row for row in self.tables["plans"] if row["active"]], "price, plan_id")
+            result["all_plans"] = _json_text(all_plans)
+        return [result]
@@ -0,0 +1,262 @@
+"""
+Stub Ollama server for benchmarks
+Speaks enough of the Ollama HTTP API (/api/chat, /api/embed, /api/embeddings,
+/api/tags) for ChatOllama and OllamaEmbeddings, with configurable latency.
+
+Usage: python -m benchmarks.stub_ollama --port 11435 --first-token-ms 200 --tokens-per-second 40
+(--prompt-tokens-per-second adds a prefill delay proportional to the prompt size;
+--prefix-cache-slots skips the part of the prompt shared with recent prompts,
+like the KV cache reuse of a llama.cpp-based server)
+Then point Assistly at it with OLLAMA_BASE_URL=http://127.0.0.1:11435
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+ROUTE_KEYWORDS = {
+    "BILLING": ("charge", "refund", "invoice", "payment", "bill", "money"),
+    "SALES": ("plan", "pricing", "price", "upgrade", "feature", "demo"),
+}
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def stub_embedding(text: str, dim: int = 768):
+    """Deterministic unit vector derived from the text"""
+    values = []
+    counter = 0
+    while len(values) < dim:
+        digest = hashlib.sha256(f"{counter}:{text}".encode("utf-8")).digest()
+        values.extend((byte - 127.5) / 127.5 for byte in digest)
+        counter += 1
+    values = values[:dim]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+class _ThreadingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # hundreds of concurrent clients connect at once
+
+class StubOllamaServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 first_token_latency: float = 0.2, tokens_per_second: float = 50.0,
+                 response_tokens: int = 60, embed_latency: float = 0.02,
+                 embedding_dim: int = 768, prompt_tokens_per_second: float = 0.0,
+                 prefix_cache_slots: int = 0):
+        self.first_token_latency = first_token_latency
+        self.prompt_tokens_per_second = prompt_tokens_per_second  # 0 = prefill is free
+        self.prefix_cache_slots = prefix_cache_slots  # recent prompts whose prefix is reused
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.embed_latency = embed_latency
+        self.embedding_dim = embedding_dim
+        
+        self._lock = threading.Lock()
+        self.request_counts = {"chat": 0, "embed": 0}
+        self._cached_prompts = []  # most recent last
+        
+        server = self
+        class Handler(_StubHandler):
+            stub = server
+        
+        self.httpd = _ThreadingServer((host, port), Handler)
+        self._thread = None
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+    
+    def count(self, kind: str):
+        with self._lock:
+            self.request_counts[kind] += 1
+    
+    # Response generation
+    def evaluate_prompt(self, messages) -> tuple:
+        """(prompt tokens, tokens that must be evaluated after reusing a cached prefix)"""
+        prompt = "".join(f"<|{m.get('role', '')}|>{m.get('content', '')}" for m in messages)
+        if self.prefix_cache_slots <= 0:
+            return len(prompt) // 4, len(prompt) // 4
+        with self._lock:
+            cached = max((len(os.path.commonprefix([prompt, previous])) for previous in self._cached_prompts),
+                         default=0)
+            self._cached_prompts.append(prompt)
+            del self._cached_prompts[:-self.prefix_cache_slots]
+        return len(prompt) // 4, (len(prompt) - cached) // 4
+    
+    def clear_prefix_cache(self):
+        with self._lock:
+            self._cached_prompts.clear()
+    
+    def prefill_latency(self, prompt_tokens: int) -> float:
+        """Time to first token for a prompt of this size"""
+        if self.prompt_tokens_per_second <= 0:
+            return self.first_token_latency
+        return self.first_token_latency + prompt_tokens / self.prompt_tokens_per_second
+    
+    def reply_tokens(self, messages):
+        """Tokens for a chat reply: one routing word for the router, filler otherwise"""
+        system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+        last_user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        
+        if "routing agent" in system.lower():
+            lowered = last_user.lower()
+            for route, keywords in ROUTE_KEYWORDS.items():
+                if any(keyword in lowered for keyword in keywords):
+                    return [route]
+            return ["TECHNICAL"]
+        
+        return [f"token{i} " for i in range(self.response_tokens)]
+
+class _StubHandler(BaseHTTPRequestHandler):
+    stub = None
+    protocol_version = "HTTP/1.1"
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+    
+    def _send_json(self, payload, status: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        if self.path in ("/api/tags", "/api/ps"):
+            self._send_json({"models": [{"name": "stub", "model": "stub"}]})
+        elif self.path == "/api/version":
+            self._send_json({"version": "0.0.0-stub"})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+    
+    def do_HEAD(self):
+        self.send_response(200)
+        self.end_headers()
+    
+    def do_POST(self):
+        request = self._read_json()
+        if self.path == "/api/chat":
+            self._chat(request)
+        elif self.path == "/api/embed":
+            self._embed(request)
+        elif self.path == "/api/embeddings":
+            self.stub.count("embed")
+            time.sleep(self.stub.embed_latency)
+            self._send_json({"embedding": stub_embedding(request.get("prompt", ""), self.stub.embedding_dim)})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+    
+    def _embed(self, request):
+        self.stub.count("embed")
+        inputs = request.get("input", "")
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        time.sleep(self.stub.embed_latency)
+        self._send_json({
+            "model": request.get("model", "stub"),
+            "embeddings": [stub_embedding(text, self.stub.embedding_dim) for text in inputs],
+        })
+    
+    def _chat(self, request):
+        stub = self.stub
+        stub.count("chat")
+        model = request.get("model", "stub")
+        messages = request.get("messages", [])
+        tokens = stub.reply_tokens(messages)
+        _, evaluated_tokens = stub.evaluate_prompt(messages)
+        started = time.perf_counter()
+        prefill = stub.prefill_latency(evaluated_tokens)
+        
+        time.sleep(prefill)
+        token_delay = 1.0 / stub.tokens_per_second if stub.tokens_per_second > 0 else 0.0
+        done_chunk = {
+            "model": model,
+            "created_at": _now(),
+            "message": {"role": "assistant", "content": ""},
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": evaluated_tokens,
+            "prompt_eval_duration": int(prefill * 1e9),
+            "eval_count": len(tokens),
+        }
+        
+        if not request.get("stream", True):
+            time.sleep(token_delay * len(tokens))
+            done_chunk["message"]["content"] = "".join(tokens)
+            done_chunk["total_duration"] = int((time.perf_counter() - started) * 1e9)
+            self._send_json(done_chunk)
+            return
+        
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for token in tokens:
+            self._write_chunk({
+                "model": model,
+                "created_at": _now(),
+                "message": {"role": "assistant", "content": token},
+                "done": False,
+            })
+            time.sleep(token_delay)
+        done_chunk["total_duration"] = int((time.perf_counter() - started) * 1e9)
+        self._write_chunk(done_chunk)
+        self.wfile.write(b"0\r\n\r\n")
+    
+    def _write_chunk(self, payload):
+        data = (json.dumps(payload) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Ollama server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--first-token-ms", type=float, default=200)
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--response-tokens", type=int, default=60)
+    parser.add_argument("--embed-ms", type=float, default=20)
+    parser.add_argument("--prompt-tokens-per-second", type=float, default=0,
+                        help="prefill speed (0 = prompt size does not affect latency)")
+    parser.add_argument("--prefix-cache-slots", type=int, default=0,
+                        help="recent prompts whose shared prefix skips prefill (0 = no prefix cache)")
+    args = parser.parse_args()
+    
+    server = StubOllamaServer(
+        host=args.host, port=args.port,
+        first_token_latency=args.first_token_ms / 1000,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        embed_latency=args.embed_ms / 1000,
+        prompt_tokens_per_second=args.prompt_tokens_per_second,
+        prefix_cache_slots=args.prefix_cache_slots,
+    )
+    print(f"🧪 Stub Ollama listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Synthetic knowledge base for benchmarks
+Writes topic-prefixed .txt files (billing_synthetic_00.txt, ...) so the
+document loader tags each chunk with its topic and route-scoped retrieval
+behaves as with the real knowledge base, at any size.
+"""
+import os
+import random
+from typing import List
+
+TOPIC_TERMS = {
+    "billing": ["invoice", "refund", "charge", "payment method", "proration", "billing cycle",
+                "credit card", "receipt", "late fee", "tax", "subscription", "chargeback"],
+    "technical": ["login", "password reset", "dashboard", "browser cache", "API key", "rate limit",
+                  "sync", "mobile app", "two-factor authentication", "webhook", "timeout", "export"],
+    "sales": ["Enterprise plan", "Pro plan", "upgrade", "annual discount", "seats", "storage",
+              "priority support", "custom integrations", "trial", "volume pricing", "SSO", "onboarding"],
+    "general": ["account", "support hours", "data retention", "privacy", "contact", "status page",
+                "terms of service", "language", "time zone", "notifications", "team members", "security"],
+}
+SENTENCES = [
+    "Customers asking about {a} should first check {b}.",
+    "If {a} does not work, the usual cause is {b}.",
+    "The {a} policy applies to every plan and is linked to {b}.",
+    "Support agents can resolve most {a} questions by reviewing {b}.",
+    "Changes to {a} take effect at the start of the next billing cycle unless {b} is involved.",
+    "For {a}, Enterprise customers get a dedicated contact who also handles {b}.",
+]
+
+def write_synthetic_kb(directory: str, docs_per_topic: int = 5, paragraphs: int = 8,
+                       sentences_per_paragraph: int = 5, seed: int = 7) -> List[str]:
+    """Write the documents and return their paths"""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for topic, terms in TOPIC_TERMS.items():
+        for doc in range(docs_per_topic):
+            lines = [f"{topic.upper()} GUIDE {doc + 1}"]
+            for paragraph in range(paragraphs):
+                term = rng.choice(terms)
+                lines.append(f"\n{term.title()} ({paragraph + 1})")
+                lines.append(" ".join(
+                    rng.choice(SENTENCES).format(a=rng.choice(terms), b=rng.choice(terms))
+                    for _ in range(sentences_per_paragraph)
+                ))
+            path = os.path.join(directory, f"{topic}_synthetic_{doc:02d}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            paths.append(path)
+    return paths
@@ -0,0 +1,141 @@
+"""
+Vector backend benchmark: Chroma vs the NumPy index (float32/float16/int8)
+Builds each index from the same seeded random embeddings, then reopens it in
+a fresh process and measures single-query latency, batched search latency
+and resident memory. Embedding time is excluded (vectors are precomputed).
+
+Usage: python -m benchmarks.vector_backends --chunks 5000 --dim 768 --queries 300
+"""
+import argparse
+import json
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+BACKENDS = ["chroma", "numpy:float32", "numpy:float16", "numpy:int8"]
+COLLECTION = "benchmark"
+
+def _rss_mb() -> float:
+    """Current resident set size in MB (Linux), falling back to the peak"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _vectors(seed: int, count: int, dim: int) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+
+def _open_collection(backend: str, path: str):
+    if backend == "chroma":
+        import chromadb
+        return chromadb.PersistentClient(path=path).get_or_create_collection(COLLECTION)
+    from rag.numpy_index import NumpyIndexClient
+    return NumpyIndexClient(path, backend.split(":")[1]).get_or_create_collection(COLLECTION)
+
+def build(backend: str, path: str, args) -> dict:
+    collection = _open_collection(backend, path)
+    vectors = _vectors(0, args.chunks, args.dim)
+    start = time.perf_counter()
+    for i in range(0, args.chunks, 1000):
+        batch = range(i, min(i + 1000, args.chunks))
+        collection.upsert(
+            embeddings=vectors[i:i + 1000].tolist(),
+            documents=[f"chunk {j}" for j in batch],
+            metadatas=[{"source": f"doc{j % 50}.txt", "chunk_id": j} for j in batch],
+            ids=[f"doc_{j}" for j in batch],
+        )
+    return {"build_s": time.perf_counter() - start}
+
+def query(backend: str, path: str, args) -> dict:
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    collection = _open_collection(backend, path)
+    collection.query(query_embeddings=[[0.0] * args.dim], n_results=args.top_k)  # load/warm the index
+    open_s = time.perf_counter() - start
+    
+    queries = _vectors(1, args.queries, args.dim)
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        collection.query(query_embeddings=[q.tolist()], n_results=args.top_k)
+        latencies.append(time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    for i in range(0, args.queries, args.batch):
+        collection.query(query_embeddings=queries[i:i + args.batch].tolist(), n_results=args.top_k)
+    batched_s = time.perf_counter() - start
+    
+    latencies.sort()
+    return {
+        "open_s": open_s,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000,
+        "batched_ms_per_query": batched_s / args.queries * 1000,
+        "rss_index_mb": _rss_mb() - rss_before,
+        "rss_total_mb": _rss_mb(),
+    }
+
+def _run_worker(phase: str, backend: str, path: str, args) -> dict:
+    command = [
+        sys.executable, "-m", "benchmarks.vector_backends", "--worker", phase,
+        "--backend", backend, "--path", path, "--chunks", str(args.chunks),
+        "--dim", str(args.dim), "--queries", str(args.queries),
+        "--batch", str(args.batch), "--top-k", str(args.top_k),
+    ]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--batch", type=int, default=32, help="queries per batched search call")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--worker", choices=["build", "query"], help=argparse.SUPPRESS)
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.worker:
+        phase = build if args.worker == "build" else query
+        print(json.dumps(phase(args.backend, args.path, args)))
+        return
+    
+    print("=" * 60)
+    print(f"VECTOR BACKEND BENCHMARK ({args.chunks} chunks x {args.dim} dims, "
+          f"{args.queries} queries, top {args.top_k})")
+    print("=" * 60)
+    print(f"{'backend':<16}{'build s':>9}{'open s':>8}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'batch ms/q':>12}{'index MB':>10}{'RSS MB':>9}")
+    
+    results = {}
+    for backend in args.backends.split(","):
+        path = tempfile.mkdtemp(prefix="assistly_vec_")
+        try:
+            result = _run_worker("build", backend, path, args)
+            result.update(_run_worker("query", backend, path, args))
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+        results[backend] = result
+        print(f"{backend:<16}{result['build_s']:9.2f}{result['open_s']:8.2f}{result['p50_ms']:9.3f}"
+              f"{result['p95_ms']:9.3f}{result['batched_ms_per_query']:12.3f}"
+              f"{result['rss_index_mb']:10.1f}{result['rss_total_mb']:9.1f}")
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
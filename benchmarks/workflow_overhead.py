@@ -0,0 +1,65 @@
+"""
+Micro-benchmark: per-request workflow overhead
+Compares building + compiling the graph on every request (old behaviour)
+with reusing the shared compiled graph from get_assistly_app().
+
+Nodes are replaced with no-op functions so only LangGraph overhead is measured.
+
+Usage: python -m benchmarks.workflow_overhead [iterations]
+"""
+import sys
+import time
+from graph.workflow import create_assistly_workflow, get_assistly_app
+
+def _noop_route(state):
+    state['route'] = "billing"
+    return state
+
+def _noop_specialist(state):
+    state['response'] = "ok"
+    return state
+
+NOOP_NODES = {
+    "route_query": _noop_route,
+    "handle_billing": _noop_specialist,
+    "handle_technical": _noop_specialist,
+    "handle_sales": _noop_specialist,
+    "determine_route": lambda state: state['route'],
+}
+
+def _initial_state():
+    return {
+        "customer_id": "CUST001",
+        "query": "I was charged twice",
+        "route": "",
+        "response": "",
+        "conversation_history": []
+    }
+
+def _time_per_request(fn, iterations: int) -> float:
+    """Average milliseconds per call"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) * 1000 / iterations
+
+def run_benchmark(iterations: int = 200):
+    rebuild = _time_per_request(
+        lambda: create_assistly_workflow(NOOP_NODES).invoke(_initial_state()),
+        iterations
+    )
+    get_assistly_app(NOOP_NODES)  # warm the cache
+    cached = _time_per_request(
+        lambda: get_assistly_app(NOOP_NODES).invoke(_initial_state()),
+        iterations
+    )
+    
+    print("=" * 60)
+    print(f"WORKFLOW OVERHEAD ({iterations} requests)")
+    print("=" * 60)
+    print(f"Rebuild per request: {rebuild:.3f} ms/request")
+    print(f"Shared compiled app: {cached:.3f} ms/request")
+    print(f"Saved per request:   {rebuild - cached:.3f} ms ({rebuild / cached:.1f}x)")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
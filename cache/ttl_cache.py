@@ -0,0 +1,106 @@
+"""
+Thread-safe LRU cache with optional per-entry TTL
+Shared building block for Assistly's in-process caches
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterator, Optional, Tuple
+
+_MISSING = object()
+
+class TTLCache:
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl  # default time-to-live in seconds, None = never expires
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value (and mark it recently used) or default"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self._misses += 1
+                return default
+            
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                self._expirations += 1
+                self._misses += 1
+                return default
+            
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None,
+            expires_at: Optional[float] = None):
+        """Store a value; ttl overrides the cache default, expires_at is absolute (epoch seconds)"""
+        if expires_at is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires_at = time.time() + ttl if ttl is not None else None
+        
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+    
+    def delete(self, key: Hashable) -> bool:
+        """Remove one entry; returns True if it was present"""
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+    
+    def delete_where(self, predicate) -> int:
+        """Remove every entry whose key matches predicate(key)"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+    
+    def clear(self):
+        """Remove every entry (counters are kept)"""
+        with self._lock:
+            self._data.clear()
+    
+    def items(self) -> Iterator[Tuple[Hashable, Any, Optional[float]]]:
+        """Snapshot of live entries as (key, value, expires_at), least recently used first"""
+        now = time.time()
+        with self._lock:
+            snapshot = list(self._data.items())
+        for key, (value, expires_at) in snapshot:
+            if expires_at is None or expires_at > now:
+                yield key, value, expires_at
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+        return entry is not _MISSING and (entry[1] is None or entry[1] > time.time())
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
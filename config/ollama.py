@@ -0,0 +1,45 @@
+"""
+Shared Ollama client settings
+Every chat model (router, specialists, conversation summaries) is created
+through create_chat_model so they agree on keep_alive and num_ctx. Ollama
+reloads a model when a request asks for a different num_ctx, so all callers
+of one model must use the same context size.
+"""
+import os
+from typing import Dict, Optional
+from langchain_ollama import ChatOllama
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+def parse_keep_alive(value: str) -> int:
+    """Seconds from '30m', '1h', '600' or '600s'; -1 keeps the model loaded, 0 unloads it"""
+    value = value.strip().lower()
+    if value and value[-1] in DURATION_UNITS:
+        return int(float(value[:-1]) * DURATION_UNITS[value[-1]])
+    return int(value)
+
+def ollama_settings_from_env() -> Dict:
+    """Read Ollama configuration from OLLAMA_* environment variables"""
+    return {
+        'model': os.getenv("OLLAMA_MODEL", "llama3.1"),
+        'base_url': os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+        # How long the server keeps the model loaded after a request
+        'keep_alive': parse_keep_alive(os.getenv("OLLAMA_KEEP_ALIVE", "30m")),
+        # Context window; must cover PROMPT_TOKEN_BUDGET plus the longest answer
+        'num_ctx': int(os.getenv("OLLAMA_NUM_CTX", "4096")),
+    }
+
+def create_chat_model(temperature: float, model: Optional[str] = None, **options) -> ChatOllama:
+    """ChatOllama with the shared model, keep-alive and context size (options are passed through)"""
+    settings = ollama_settings_from_env()
+    return ChatOllama(
+        model=model or settings['model'],
+        base_url=settings['base_url'],
+        keep_alive=settings['keep_alive'],
+        num_ctx=settings['num_ctx'],
+        temperature=temperature,
+        **options
+    )
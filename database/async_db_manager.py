@@ -0,0 +1,58 @@
+"""
+Async facade over DatabaseManager
+Runs the blocking psycopg2 calls on worker threads (over the shared
+connection pool) so the event loop is never blocked by the database
+"""
+import asyncio
+from typing import Iterable, List, Dict, Optional
+from database.db_manager import DatabaseManager
+
+class AsyncDatabaseManager:
+    def __init__(self, db: DatabaseManager = None):
+        self.db = db or DatabaseManager()
+    
+    async def _run(self, fn, *args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    
+    async def execute_query(self, query: str, params: tuple = None) -> List[Dict]:
+        """Execute SELECT query and return results as list of dicts"""
+        return await self._run(self.db.execute_query, query, params)
+    
+    async def execute_update(self, query: str, params: tuple = None, customer_id: str = None,
+                             tables: Iterable[str] = None) -> int:
+        """Execute INSERT/UPDATE/DELETE and return affected rows (drops the cached data it changes)"""
+        return await self._run(self.db.execute_update, query, params, customer_id, tables)
+    
+    async def get_customer(self, customer_id: str) -> Optional[Dict]:
+        """Get customer by ID (cached)"""
+        return await self._run(self.db.get_customer, customer_id)
+    
+    async def get_agent_context(self, customer_id: str, **options) -> Optional[Dict]:
+        """Get the specialist agent context bundle in one round trip"""
+        return await self._run(self.db.get_agent_context, customer_id, **options)
+    
+    async def get_customer_directory(self) -> List[Dict]:
+        """customer_id, name and email of every customer, by name (cached)"""
+        return await self._run(self.db.get_customer_directory)
+    
+    async def get_billing_history(self, customer_id: str, **options) -> List[Dict]:
+        """Get billing history for customer, newest first"""
+        return await self._run(self.db.get_billing_history, customer_id, **options)
+    
+    async def get_tickets(self, customer_id: str, **options) -> List[Dict]:
+        """Get tickets for customer, newest first"""
+        return await self._run(self.db.get_tickets, customer_id, **options)
+    
+    async def create_ticket(self, customer_id: str, issue_type: str,
+                            subject: str, description: str, priority: str = 'medium') -> int:
+        """Create new support ticket"""
+        return await self._run(self.db.create_ticket, customer_id, issue_type,
+                               subject, description, priority)
+    
+    async def get_plan(self, plan_id: str) -> Optional[Dict]:
+        """Get plan details"""
+        return await self._run(self.db.get_plan, plan_id)
+    
+    async def get_all_plans(self) -> List[Dict]:
+        """Get all active plans"""
+        return await self._run(self.db.get_all_plans)
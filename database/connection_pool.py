@@ -0,0 +1,303 @@
+"""
+Connection pool for Assistly
+Bounded, thread-safe pool of PostgreSQL connections shared by every
+DatabaseManager in the process
+"""
+import psycopg2
+from psycopg2 import extensions
+import threading
+import time
+import os
+from collections import deque
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from typing import Dict
+
+load_dotenv()
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the acquire timeout"""
+
+class _PooledConnection:
+    """Bookkeeping for one open connection"""
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+class ConnectionPool:
+    def __init__(self, connection_params: Dict, min_size: int = 1, max_size: int = 10,
+                 timeout: float = 5.0, max_lifetime: float = 1800.0,
+                 max_idle: float = 300.0, health_check_after: float = 30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min={min_size}, max={max_size}")
+
+        self.connection_params = connection_params
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._in_use = {}  # id(conn) -> _PooledConnection
+        self._size = 0     # open connections plus ones being opened
+        self._warmed = False
+        self._closed = False
+
+        self._stats = {
+            "acquires": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "connections_created": 0,
+            "connections_discarded": 0,
+        }
+
+    # Connection lifecycle
+    def _connect(self) -> _PooledConnection:
+        conn = psycopg2.connect(**self.connection_params)
+        with self._cond:
+            self._stats["connections_created"] += 1
+        return _PooledConnection(conn)
+
+    def _discard(self, pooled: _PooledConnection):
+        """Close a connection and free its slot (caller holds no lock)"""
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats["connections_discarded"] += 1
+            self._cond.notify()
+
+    def _is_expired(self, pooled: _PooledConnection, now: float) -> bool:
+        if pooled.conn.closed:
+            return True
+        if self.max_lifetime and now - pooled.created_at > self.max_lifetime:
+            return True
+        return False
+
+    def _is_alive(self, pooled: _PooledConnection) -> bool:
+        """Ping a connection that has been idle for a while"""
+        try:
+            with pooled.conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            pooled.conn.rollback()
+            return True
+        except psycopg2.Error:
+            # Dropped, or left in a state it can't recover from
+            return False
+
+    def _warm(self):
+        """Open min_size connections on first use (best effort)"""
+        with self._cond:
+            if self._warmed:
+                return
+            self._warmed = True
+            missing = max(0, self.min_size - self._size)
+            self._size += missing
+
+        for _ in range(missing):
+            try:
+                pooled = self._connect()
+            except psycopg2.Error:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                continue
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    # Public API
+    def acquire(self, timeout: float = None):
+        """Check out a connection, waiting up to timeout seconds"""
+        if not self._warmed:
+            self._warm()
+
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        wait_started = None
+
+        while True:
+            pooled = None
+            open_new = False
+
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeoutError("Connection pool is closed")
+
+                while True:
+                    if self._idle:
+                        pooled = self._idle.pop()  # most recently used first
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        open_new = True
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"No database connection available after {timeout:.1f}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    if wait_started is None:
+                        wait_started = time.monotonic()
+                        self._stats["waits"] += 1
+                    self._cond.wait(remaining)
+
+            if open_new:
+                try:
+                    pooled = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            else:
+                now = time.monotonic()
+                if self._is_expired(pooled, now):
+                    self._discard(pooled)
+                    continue
+                if now - pooled.last_used > self.health_check_after and not self._is_alive(pooled):
+                    self._discard(pooled)
+                    continue
+
+            with self._cond:
+                self._in_use[id(pooled.conn)] = pooled
+                self._stats["acquires"] += 1
+                if wait_started is not None:
+                    waited = time.monotonic() - wait_started
+                    self._stats["wait_time_total"] += waited
+                    self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+            return pooled.conn
+
+    def release(self, conn, broken: bool = False):
+        """Return a connection to the pool (or drop it if broken)"""
+        with self._cond:
+            pooled = self._in_use.pop(id(conn), None)
+        if pooled is None:
+            return
+
+        if broken or conn.closed or self._closed:
+            self._discard(pooled)
+            return
+
+        # Never hand out a connection with an open or failed transaction
+        try:
+            if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except psycopg2.Error:
+            self._discard(pooled)
+            return
+
+        now = time.monotonic()
+        if self._is_expired(pooled, now):
+            self._discard(pooled)
+            return
+        pooled.last_used = now
+
+        with self._cond:
+            self._idle.append(pooled)
+            self._shrink_locked(now)
+            self._cond.notify()
+
+    def _shrink_locked(self, now: float):
+        """Close idle connections above min_size that sat unused too long"""
+        if not self.max_idle:
+            return
+        while len(self._idle) > 0 and self._size > self.min_size:
+            oldest = self._idle[0]
+            if now - oldest.last_used <= self.max_idle:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            self._stats["connections_discarded"] += 1
+            try:
+                oldest.conn.close()
+            except Exception:
+                pass
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """Context manager: acquire a connection and always give it back"""
+        conn = self.acquire(timeout)
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.release(conn, broken=broken)
+
+    def stats(self) -> Dict:
+        """Pool usage statistics for monitoring"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            })
+        stats["wait_time_avg"] = (
+            stats["wait_time_total"] / stats["waits"] if stats["waits"] else 0.0
+        )
+        return stats
+
+    def close(self):
+        """Close idle connections; in-use ones are closed when released"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            try:
+                pooled.conn.close()
+            except Exception:
+                pass
+
+# Process-wide pools, one per set of connection parameters
+_pools = {}
+_pools_lock = threading.Lock()
+
+def pool_settings_from_env() -> Dict:
+    """Read pool configuration from POSTGRES_POOL_* environment variables"""
+    return {
+        'min_size': int(os.getenv('POSTGRES_POOL_MIN_SIZE', '1')),
+        'max_size': int(os.getenv('POSTGRES_POOL_MAX_SIZE', '10')),
+        'timeout': float(os.getenv('POSTGRES_POOL_TIMEOUT', '5')),
+        'max_lifetime': float(os.getenv('POSTGRES_POOL_MAX_LIFETIME', '1800')),
+        'max_idle': float(os.getenv('POSTGRES_POOL_MAX_IDLE', '300')),
+    }
+
+def get_pool(connection_params: Dict) -> ConnectionPool:
+    """Get the shared pool for these connection parameters"""
+    key = tuple(sorted((k, str(v)) for k, v in connection_params.items()))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(connection_params, **pool_settings_from_env())
+            _pools[key] = pool
+        return pool
+
+def close_all_pools():
+    """Close every shared pool (e.g. on shutdown)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
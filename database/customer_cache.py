@@ -0,0 +1,145 @@
+"""
+Per-customer profile cache
+Holds each customer's row and, optionally, the agent context bundle
+(recent billing, failed payments, tickets) so the repeated lookups of one
+message (answer cache, specialist context, Streamlit sidebar reruns) hit
+memory instead of PostgreSQL. Entries are bounded by customer (LRU), expire
+after a TTL, and are dropped by DatabaseManager's write paths.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+from cache.ttl_cache import TTLCache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_MISSING = object()
+
+def customer_cache_settings_from_env() -> Dict:
+    """Read customer cache configuration from CUSTOMER_CACHE_* environment variables"""
+    return {
+        'enabled': os.getenv('CUSTOMER_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+        'ttl': float(os.getenv('CUSTOMER_CACHE_TTL', '60')),
+        'max_customers': int(os.getenv('CUSTOMER_CACHE_MAX_CUSTOMERS', '1000')),
+        # Also cache the billing/ticket summaries of get_agent_context
+        'cache_context': os.getenv('CUSTOMER_CACHE_CONTEXT', 'true').lower() in ('1', 'true', 'yes'),
+    }
+
+class CustomerCache:
+    def __init__(self, ttl: Optional[float] = 60, max_customers: int = 1000, cache_context: bool = True):
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.cache_context = cache_context
+        # customer_id -> {view: (value, expires_at)}; LRU over customers
+        self.profiles = TTLCache(maxsize=max_customers, ttl=None)
+        self._lock = threading.Lock()
+        self._generations = {}  # customer_id -> bumped on every invalidation
+        self._generation_all = 0
+        self._stats = {}        # view -> counters
+        self._invalidations = 0
+    
+    def get(self, customer_id: str, view: Hashable, loader: Callable[[], Any]) -> Any:
+        """Cached view of a customer ("customer", ("context", options)), calling loader() on a miss"""
+        view_name = view[0] if isinstance(view, tuple) else view
+        if view_name == "context" and not self.cache_context:
+            return loader()
+        
+        value = self._lookup(customer_id, view)
+        if value is not _MISSING:
+            self._count(view_name, "hits")
+            return value
+        
+        self._count(view_name, "misses")
+        generation = self._generation(customer_id)
+        value = loader()
+        # Unknown customers aren't cached, and neither are rows read before a
+        # write to this customer that committed during the load
+        if value is not None:
+            self._store(customer_id, view, value, generation)
+        return value
+    
+    def invalidate(self, customer_id: Optional[str] = None) -> int:
+        """Drop one customer's cached views (or every customer's); returns the customers removed"""
+        with self._lock:
+            self._invalidations += 1
+            if customer_id is not None:
+                self._generations[customer_id] = self._generations.get(customer_id, 0) + 1
+                return int(self.profiles.delete(customer_id))
+            self._generation_all += 1
+            removed = len(self.profiles)
+            self.profiles.clear()
+            return removed
+    
+    def stats(self) -> Dict:
+        """Hit rate overall and per view, plus invalidations, evictions and size"""
+        with self._lock:
+            views = {view: dict(counters) for view, counters in self._stats.items()}
+            invalidations = self._invalidations
+        hits = sum(counters["hits"] for counters in views.values())
+        misses = sum(counters["misses"] for counters in views.values())
+        for counters in views.values():
+            lookups = counters["hits"] + counters["misses"]
+            counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+        profiles = self.profiles.stats()
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "views": views,
+            "invalidations": invalidations,
+            "evictions": profiles["evictions"],
+            "customers": profiles["size"],
+            "max_customers": profiles["maxsize"],
+        }
+    
+    def _lookup(self, customer_id: str, view: Hashable) -> Any:
+        profile = self.profiles.get(customer_id)
+        if profile is None:
+            return _MISSING
+        value, expires_at = profile.get(view, (_MISSING, None))
+        if expires_at is not None and expires_at <= time.time():
+            return _MISSING
+        return value
+    
+    def _store(self, customer_id: str, view: Hashable, value: Any, generation: tuple):
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if self._generation_unlocked(customer_id) != generation:
+                return
+            # Copy-on-write so readers never see a profile dict being changed
+            profile = self.profiles.get(customer_id) or {}
+            profile = {key: entry for key, entry in profile.items()
+                       if entry[1] is None or entry[1] > now}
+            profile[view] = (value, expires_at)
+            self.profiles.set(customer_id, profile)
+    
+    def _generation(self, customer_id: str) -> tuple:
+        with self._lock:
+            return self._generation_unlocked(customer_id)
+    
+    def _generation_unlocked(self, customer_id: str) -> tuple:
+        return self._generation_all, self._generations.get(customer_id, 0)
+    
+    def _count(self, view: str, counter: str):
+        with self._lock:
+            self._stats.setdefault(view, {"hits": 0, "misses": 0})[counter] += 1
+
+# Process-wide caches, one per database
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_customer_cache(connection_params: Dict) -> Optional[CustomerCache]:
+    """Shared customer cache for this database (None when CUSTOMER_CACHE_ENABLED is off)"""
+    settings = customer_cache_settings_from_env()
+    if not settings['enabled']:
+        return None
+    key = tuple(sorted((k, str(v)) for k, v in connection_params.items()))
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = CustomerCache(ttl=settings['ttl'], max_customers=settings['max_customers'],
+                                  cache_context=settings['cache_context'])
+            _caches[key] = cache
+        return cache
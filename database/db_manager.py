@@ -4,14 +4,52 @@ Handles PostgreSQL connections and queries
 """
 import psycopg2
 from psycopg2.extras import RealDictCursor
+import json
 import os
+import re
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
 from dotenv import load_dotenv
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional
+from database.connection_pool import get_pool
+from database.reference_cache import REFERENCE_TABLES, get_reference_cache, start_change_listener
+from database.customer_cache import get_customer_cache
+from observability.tracing import span
 
 load_dotenv()
 
+# Columns row_to_json renders as ISO strings, parsed back so the agent
+# context has the same types as rows from the plain queries
+_TIMESTAMP_COLUMNS = frozenset({"created_at", "last_updated", "resolved_at"})
+_DATE_COLUMNS = frozenset({"billing_date"})
+
+# Table an INSERT/UPDATE/DELETE writes to
+_WRITE_TARGET = re.compile(r"^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+(\w+)", re.IGNORECASE)
+
+def _restore_types(row: Dict) -> Dict:
+    for key, value in row.items():
+        if isinstance(value, str):
+            if key in _TIMESTAMP_COLUMNS:
+                row[key] = datetime.fromisoformat(value)
+            elif key in _DATE_COLUMNS:
+                row[key] = date.fromisoformat(value)
+    return row
+
+def _copy_rows(value):
+    """Copy of a row or a list of rows, so callers can't change the cached one"""
+    if isinstance(value, list):
+        return [dict(row) for row in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+def _parse_json_rows(text: str):
+    """row_to_json/json_agg output with DECIMALs as Decimal (keeping their scale) and dates as date/datetime"""
+    return json.loads(text, parse_float=Decimal, object_hook=_restore_types)
+
 class DatabaseManager:
-    def __init__(self):
+    def __init__(self, pooled: bool = None):
         self.connection_params = {
             'host': os.getenv('POSTGRES_HOST', 'localhost'),
             'port': os.getenv('POSTGRES_PORT', '5432'),
@@ -19,38 +57,115 @@ class DatabaseManager:
             'user': os.getenv('POSTGRES_USER', 'postgres'),
             'password': os.getenv('POSTGRES_PASSWORD', '')
         }
+        
+        # Pooled mode shares one connection pool across all instances
+        if pooled is None:
+            pooled = os.getenv('POSTGRES_POOL_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.pool = get_pool(self.connection_params) if pooled else None
+        # Plans and the customer directory are served from memory (None disables caching)
+        self.reference_cache = get_reference_cache(self.connection_params)
+        # Customer rows and agent context bundles, dropped by the write paths below
+        self.customer_cache = get_customer_cache(self.connection_params)
+        # With REFERENCE_CACHE_LISTEN, changes made by other processes invalidate both caches
+        start_change_listener(self.connection_params, self.reference_cache, self.customer_cache)
     
     def get_connection(self):
         """Create a new database connection"""
         return psycopg2.connect(**self.connection_params)
     
-    def execute_query(self, query: str, params: tuple = None) -> List[Dict]:
-        """Execute SELECT query and return results as list of dicts"""
+    @contextmanager
+    def connection(self):
+        """Borrow a connection from the pool, or open a one-off connection"""
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+            return
+        
         conn = self.get_connection()
         try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def cached_reference(self, table: str, key, loader):
+        """Read-through lookup in the reference cache (loader() runs on a miss or without a cache)"""
+        if self.reference_cache is None:
+            return loader()
+        return self.reference_cache.get(table, key, loader)
+    
+    def invalidate_reference_data(self, table: str = None):
+        """Drop cached rows of one reference table, or all of them"""
+        if self.reference_cache is not None:
+            self.reference_cache.invalidate(table)
+    
+    def cached_customer(self, customer_id: str, view, loader):
+        """Read-through lookup in the customer cache (loader() runs on a miss or without a cache)"""
+        if self.customer_cache is None:
+            return loader()
+        return self.customer_cache.get(customer_id, view, loader)
+    
+    def invalidate_customer(self, customer_id: str = None):
+        """Drop one customer's cached profile, or every customer's"""
+        if self.customer_cache is not None:
+            self.customer_cache.invalidate(customer_id)
+    
+    def customer_cache_stats(self) -> Optional[Dict]:
+        """Customer cache hit rates (None when the cache is disabled)"""
+        return self.customer_cache.stats() if self.customer_cache is not None else None
+    
+    def pool_stats(self) -> Optional[Dict]:
+        """Connection pool statistics (None when pooling is disabled)"""
+        return self.pool.stats() if self.pool is not None else None
+    
+    def execute_query(self, query: str, params: tuple = None) -> List[Dict]:
+        """Execute SELECT query and return results as list of dicts"""
+        with span("db", op="select"), self.connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cursor:
                 cursor.execute(query, params)
                 return [dict(row) for row in cursor.fetchall()]
-        finally:
-            conn.close()
     
-    def execute_update(self, query: str, params: tuple = None) -> int:
-        """Execute INSERT/UPDATE/DELETE and return affected rows"""
-        conn = self.get_connection()
-        try:
+    def execute_update(self, query: str, params: tuple = None, customer_id: str = None,
+                       tables: Iterable[str] = None) -> int:
+        """
+        Execute INSERT/UPDATE/DELETE and return affected rows
+        
+        Pass the customer_id the statement changes so only that customer's
+        cached profile is dropped; without it every cached profile is.
+        Cached reference data (plans, customer directory) of the table the
+        statement writes to is dropped too; pass tables for statements that
+        write to others (or whose target can't be read from the SQL).
+        """
+        with span("db", op="update"), self.connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(query, params)
                 conn.commit()
-                return cursor.rowcount
-        finally:
-            conn.close()
+                rowcount = cursor.rowcount
+        self.invalidate_customer(customer_id)
+        for table in self._reference_tables_written(query, tables):
+            self.invalidate_reference_data(table)
+        return rowcount
+    
+    @staticmethod
+    def _reference_tables_written(query: str, tables: Iterable[str] = None) -> List[str]:
+        """Reference tables a write statement may change (all of them if its target is unknown)"""
+        if tables is None:
+            match = _WRITE_TARGET.match(query)
+            tables = [match.group(1).lower()] if match else REFERENCE_TABLES
+        return [table for table in tables if table in REFERENCE_TABLES]
     
     # Customer queries
     def get_customer(self, customer_id: str) -> Optional[Dict]:
-        """Get customer by ID"""
-        query = "SELECT * FROM customers WHERE customer_id = %s"
-        results = self.execute_query(query, (customer_id,))
-        return results[0] if results else None
+        """Get customer by ID (cached)"""
+        def load():
+            results = self.execute_query("SELECT * FROM customers WHERE customer_id = %s", (customer_id,))
+            return results[0] if results else None
+        customer = self.cached_customer(customer_id, "customer", load)
+        return dict(customer) if customer else None
+    
+    def get_customer_directory(self) -> List[Dict]:
+        """customer_id, name and email of every customer, by name (cached; callers get copies)"""
+        query = "SELECT customer_id, name, email FROM customers ORDER BY name"
+        return _copy_rows(self.cached_reference("customers", "directory", lambda: self.execute_query(query)))
     
     def get_customer_by_email(self, email: str) -> Optional[Dict]:
         """Get customer by email"""
@@ -58,42 +173,166 @@ class DatabaseManager:
         results = self.execute_query(query, (email,))
         return results[0] if results else None
     
+    # Agent context
+    def get_agent_context(self, customer_id: str, billing_limit: Optional[int] = 5,
+                          failed_limit: Optional[int] = None, ticket_limit: Optional[int] = 3,
+                          include_plans: bool = False) -> Optional[Dict]:
+        """
+        Get everything a specialist agent needs about a customer in one round trip
+        
+        Returns a dict with customer, plan, billing_history, failed_payments,
+        tickets and all_plans, or None if the customer does not exist.
+        A limit of 0 skips that section, None means no limit. The bundle is
+        cached per customer and limits. plan and all_plans come from the
+        reference cache; with it disabled they are joined into this query,
+        so the context still takes one round trip. Rows have the same types
+        as get_customer, get_billing_history and get_tickets return.
+        """
+        join_plans = self.reference_cache is None
+        plans_sql = ""
+        if join_plans:
+            all_plans_sql = """
+                COALESCE((
+                    SELECT json_agg(ap ORDER BY ap.price, ap.plan_id)
+                    FROM plans ap
+                    WHERE ap.active = TRUE
+                ), '[]'::json)
+            """ if include_plans else "'[]'::json"
+            plans_sql = f""",
+                (SELECT row_to_json(p) FROM plans p WHERE p.plan_id = c.plan)::text AS plan,
+                ({all_plans_sql})::text AS all_plans"""
+        
+        # JSON as text, parsed by _parse_json_rows (psycopg2 would turn DECIMAL into float)
+        query = f"""
+            SELECT
+                row_to_json(c)::text AS customer,
+                COALESCE((
+                    SELECT json_agg(b ORDER BY b.billing_date DESC, b.billing_id DESC)
+                    FROM (
+                        SELECT * FROM billing_history
+                        WHERE customer_id = c.customer_id
+                        ORDER BY billing_date DESC, billing_id DESC
+                        LIMIT %(billing_limit)s
+                    ) b
+                ), '[]'::json)::text AS billing_history,
+                COALESCE((
+                    SELECT json_agg(f ORDER BY f.billing_date DESC, f.billing_id DESC)
+                    FROM (
+                        SELECT * FROM billing_history
+                        WHERE customer_id = c.customer_id AND status = 'failed'
+                        ORDER BY billing_date DESC, billing_id DESC
+                        LIMIT %(failed_limit)s
+                    ) f
+                ), '[]'::json)::text AS failed_payments,
+                COALESCE((
+                    SELECT json_agg(t ORDER BY t.created_at DESC, t.ticket_id DESC)
+                    FROM (
+                        SELECT * FROM tickets
+                        WHERE customer_id = c.customer_id
+                        ORDER BY created_at DESC, ticket_id DESC
+                        LIMIT %(ticket_limit)s
+                    ) t
+                ), '[]'::json)::text AS tickets{plans_sql}
+            FROM customers c
+            WHERE c.customer_id = %(customer_id)s
+        """
+        def load():
+            results = self.execute_query(query, {
+                'customer_id': customer_id,
+                'billing_limit': billing_limit,
+                'failed_limit': failed_limit,
+                'ticket_limit': ticket_limit,
+            })
+            if not results:
+                return None
+            return {key: _parse_json_rows(value) if value is not None else None
+                    for key, value in results[0].items()}
+        
+        view = ("context", billing_limit, failed_limit, ticket_limit)
+        if join_plans:
+            view += (include_plans,)
+        cached = self.cached_customer(customer_id, view, load)
+        if cached is None:
+            return None
+        
+        context = {key: _copy_rows(value) for key, value in cached.items()}
+        if not join_plans:
+            context['plan'] = self.get_plan(context['customer']['plan'])
+            context['all_plans'] = self.get_all_plans() if include_plans else []
+        return context
+    
     # Billing queries
-    def get_billing_history(self, customer_id: str) -> List[Dict]:
-        """Get billing history for customer"""
-        query = """
-            SELECT * FROM billing_history 
-            WHERE customer_id = %s 
-            ORDER BY billing_date DESC
+    def get_billing_history(self, customer_id: str, limit: Optional[int] = None,
+                            before_date=None, before_id: Optional[int] = None) -> List[Dict]:
+        """
+        Get billing history for customer, newest first
+        
+        For the next page, pass the billing_date and billing_id of the
+        last row you received as before_date/before_id.
         """
-        return self.execute_query(query, (customer_id,))
+        return self._get_billing_rows(customer_id, None, limit, before_date, before_id)
     
-    def get_failed_payments(self, customer_id: str) -> List[Dict]:
-        """Get failed payments for customer"""
-        query = """
+    def get_failed_payments(self, customer_id: str, limit: Optional[int] = None,
+                            before_date=None, before_id: Optional[int] = None) -> List[Dict]:
+        """Get failed payments for customer, newest first (same paging as billing history)"""
+        return self._get_billing_rows(customer_id, 'failed', limit, before_date, before_id)
+    
+    def _get_billing_rows(self, customer_id: str, status: Optional[str], limit: Optional[int],
+                          before_date, before_id: Optional[int]) -> List[Dict]:
+        conditions = ["customer_id = %s"]
+        params = [customer_id]
+        if status:
+            conditions.append("status = %s")
+            params.append(status)
+        conditions.extend(self._keyset_conditions("billing_date", "billing_id",
+                                                  before_date, before_id, params))
+        params.append(limit)
+        
+        query = f"""
             SELECT * FROM billing_history 
-            WHERE customer_id = %s AND status = 'failed'
-            ORDER BY billing_date DESC
+            WHERE {' AND '.join(conditions)}
+            ORDER BY billing_date DESC, billing_id DESC
+            LIMIT %s
         """
-        return self.execute_query(query, (customer_id,))
+        return self.execute_query(query, tuple(params))
     
     # Ticket queries
-    def get_tickets(self, customer_id: str, status: str = None) -> List[Dict]:
-        """Get tickets for customer, optionally filtered by status"""
+    def get_tickets(self, customer_id: str, status: str = None, limit: Optional[int] = None,
+                    before_date=None, before_id: Optional[int] = None) -> List[Dict]:
+        """
+        Get tickets for customer, optionally filtered by status, newest first
+        
+        For the next page, pass the created_at and ticket_id of the last
+        row you received as before_date/before_id.
+        """
+        conditions = ["customer_id = %s"]
+        params = [customer_id]
         if status:
-            query = """
-                SELECT * FROM tickets 
-                WHERE customer_id = %s AND status = %s
-                ORDER BY created_at DESC
-            """
-            return self.execute_query(query, (customer_id, status))
-        else:
-            query = """
-                SELECT * FROM tickets 
-                WHERE customer_id = %s
-                ORDER BY created_at DESC
-            """
-            return self.execute_query(query, (customer_id,))
+            conditions.append("status = %s")
+            params.append(status)
+        conditions.extend(self._keyset_conditions("created_at", "ticket_id",
+                                                  before_date, before_id, params))
+        params.append(limit)
+        
+        query = f"""
+            SELECT * FROM tickets 
+            WHERE {' AND '.join(conditions)}
+            ORDER BY created_at DESC, ticket_id DESC
+            LIMIT %s
+        """
+        return self.execute_query(query, tuple(params))
+    
+    @staticmethod
+    def _keyset_conditions(date_column: str, id_column: str, before_date,
+                           before_id: Optional[int], params: List) -> List[str]:
+        """WHERE clauses that continue a (date DESC, id DESC) ordering after a cursor"""
+        if before_date is None:
+            return []
+        if before_id is None:
+            params.append(before_date)
+            return [f"{date_column} < %s"]
+        params.extend([before_date, before_id])
+        return [f"({date_column}, {id_column}) < (%s, %s)"]
     
     def create_ticket(self, customer_id: str, issue_type: str, 
                      subject: str, description: str, priority: str = 'medium') -> int:
@@ -103,24 +342,24 @@ class DatabaseManager:
             VALUES (%s, %s, %s, %s, %s)
             RETURNING ticket_id
         """
-        conn = self.get_connection()
-        try:
+        with span("db", op="insert"), self.connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(query, (customer_id, issue_type, subject, description, priority))
                 ticket_id = cursor.fetchone()[0]
                 conn.commit()
-                return ticket_id
-        finally:
-            conn.close()
+        # The cached context bundle lists the customer's recent tickets
+        self.invalidate_customer(customer_id)
+        return ticket_id
     
-    # Plan queries
+    # Plan queries (cached: plans change a few times a year; callers get copies)
     def get_plan(self, plan_id: str) -> Optional[Dict]:
         """Get plan details"""
-        query = "SELECT * FROM plans WHERE plan_id = %s"
-        results = self.execute_query(query, (plan_id,))
-        return results[0] if results else None
+        def load():
+            results = self.execute_query("SELECT * FROM plans WHERE plan_id = %s", (plan_id,))
+            return results[0] if results else None
+        return _copy_rows(self.cached_reference("plans", plan_id, load))
     
     def get_all_plans(self) -> List[Dict]:
-        """Get all active plans"""
-        query = "SELECT * FROM plans WHERE active = TRUE ORDER BY price"
-        return self.execute_query(query)
\ No newline at end of file
+        """Get all active plans, cheapest first"""
+        query = "SELECT * FROM plans WHERE active = TRUE ORDER BY price, plan_id"
+        return _copy_rows(self.cached_reference("plans", "active", lambda: self.execute_query(query)))
\ No newline at end of file
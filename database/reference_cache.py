@@ -0,0 +1,220 @@
+"""
+Read-through cache for slow-changing reference tables (plans, customer directory)
+Rows are served from memory until their table's TTL expires or the table is
+invalidated, either explicitly (invalidate) or pushed by PostgreSQL: the
+triggers in schema.sql NOTIFY the reference channel with the table name on
+every change, and ReferenceChangeListener turns that into invalidate(table).
+Row changes to customers, tickets and billing_history are announced on the
+same channel as "customer:<customer_id>" and drop that customer's entries
+from the CustomerCache (database/customer_cache.py).
+"""
+import os
+import select
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+import psycopg2
+from psycopg2 import extensions
+from cache.ttl_cache import TTLCache
+from database.customer_cache import CustomerCache
+from observability.log import get_logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+REFERENCE_CHANNEL = "assistly_reference_changed"
+# Tables whose rows this cache serves
+REFERENCE_TABLES = ("plans", "customers")
+# Payload prefix of per-customer notifications ("customer:" alone means every customer)
+CUSTOMER_PAYLOAD_PREFIX = "customer:"
+
+_MISSING = object()
+
+def reference_cache_settings_from_env() -> Dict:
+    """Read reference cache configuration from REFERENCE_CACHE_* environment variables"""
+    return {
+        'enabled': os.getenv('REFERENCE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+        'ttl': float(os.getenv('REFERENCE_CACHE_TTL', '3600')),
+        # The customer directory changes on signups, so it expires sooner
+        'ttls': {'customers': float(os.getenv('REFERENCE_CACHE_TTL_CUSTOMERS', '300'))},
+        'listen': os.getenv('REFERENCE_CACHE_LISTEN', 'false').lower() in ('1', 'true', 'yes'),
+        'channel': os.getenv('REFERENCE_CACHE_CHANNEL', REFERENCE_CHANNEL),
+    }
+
+class ReferenceCache:
+    def __init__(self, ttl: Optional[float] = 3600, ttls: Dict[str, float] = None, maxsize: int = 1024):
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.ttls = ttls or {}
+        self.entries = TTLCache(maxsize=maxsize, ttl=self.ttl)  # (table, key) -> rows
+        self._lock = threading.Lock()
+        self._generations = {}  # table -> bumped on every invalidation
+        self._stats = {}        # table -> counters
+    
+    def get(self, table: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Cached value for (table, key), calling loader() on a miss"""
+        value = self.entries.get((table, key), _MISSING)
+        if value is not _MISSING:
+            self._count(table, "hits")
+            return value
+        
+        self._count(table, "misses")
+        generation = self._generation(table)
+        value = loader()
+        # Don't store rows read before an invalidation that arrived during the load
+        if self._generation(table) == generation:
+            ttl = self.ttls.get(table, self.ttl)
+            self.entries.set((table, key), value, ttl=ttl if ttl and ttl > 0 else None)
+        return value
+    
+    def invalidate(self, table: Optional[str] = None) -> int:
+        """Drop one table's entries (or everything); returns the number removed"""
+        with self._lock:
+            for name in ([table] if table else set(self._generations) | set(self._stats)):
+                self._generations[name] = self._generations.get(name, 0) + 1
+                self._counters(name)["invalidations"] += 1
+        if table is None:
+            removed = len(self.entries)
+            self.entries.clear()
+            return removed
+        return self.entries.delete_where(lambda key: key[0] == table)
+    
+    def stats(self) -> Dict:
+        """Per-table hit/miss/invalidation counters"""
+        with self._lock:
+            stats = {table: dict(counters) for table, counters in self._stats.items()}
+        for counters in stats.values():
+            lookups = counters["hits"] + counters["misses"]
+            counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+        return stats
+    
+    def _generation(self, table: str) -> int:
+        with self._lock:
+            return self._generations.get(table, 0)
+    
+    def _counters(self, table: str) -> Dict:
+        return self._stats.setdefault(table, {"hits": 0, "misses": 0, "invalidations": 0})
+    
+    def _count(self, table: str, counter: str):
+        with self._lock:
+            self._counters(table)[counter] += 1
+
+class ReferenceChangeListener:
+    """
+    Background LISTEN on the reference channel
+    A notification's payload is a table name to invalidate in the reference
+    cache, or "customer:<customer_id>" to invalidate in the customer cache
+    (either cache may be None). After a lost connection both caches are
+    invalidated, since notifications sent while disconnected are gone.
+    """
+    def __init__(self, cache: Optional[ReferenceCache], connection_params: Dict,
+                 channel: str = REFERENCE_CHANNEL, reconnect_delay: float = 5.0,
+                 customer_cache: Optional[CustomerCache] = None):
+        self.cache = cache
+        self.customer_cache = customer_cache
+        self.connection_params = connection_params
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.notifications = 0
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self) -> "ReferenceChangeListener":
+        self._thread = threading.Thread(target=self._run, name="assistly-reference-listener", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+    
+    def _run(self):
+        connected_before = False
+        while not self._stop.is_set():
+            try:
+                conn = psycopg2.connect(**self.connection_params)
+            except psycopg2.Error as e:
+                logger.warning("⚠️ Reference cache listener can't connect (%s), retrying in %.0fs",
+                               e, self.reconnect_delay)
+                self._stop.wait(self.reconnect_delay)
+                continue
+            
+            try:
+                conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                if connected_before:
+                    self._invalidate_all()
+                connected_before = True
+                self._listen(conn)
+            except (psycopg2.Error, OSError) as e:
+                logger.warning("⚠️ Reference cache listener lost its connection (%s), reconnecting", e)
+                self._stop.wait(self.reconnect_delay)
+            finally:
+                conn.close()
+    
+    def _listen(self, conn):
+        while not self._stop.is_set():
+            # Wake up at least once a second to notice stop()
+            if select.select([conn], [], [], 1.0) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                self.notifications += 1
+                self._handle(notify.payload)
+    
+    def _handle(self, payload: str):
+        if payload.startswith(CUSTOMER_PAYLOAD_PREFIX):
+            if self.customer_cache is not None:
+                customer_id = payload[len(CUSTOMER_PAYLOAD_PREFIX):] or None
+                self.customer_cache.invalidate(customer_id)
+                logger.debug("🔔 Customer %s changed", customer_id or 'all')
+            return
+        if self.cache is not None:
+            removed = self.cache.invalidate(payload or None)
+            logger.info("🔔 Reference data changed (%s), dropped %d cached entries", payload or 'all', removed)
+    
+    def _invalidate_all(self):
+        if self.cache is not None:
+            self.cache.invalidate()
+        if self.customer_cache is not None:
+            self.customer_cache.invalidate()
+
+# Process-wide caches, one per database
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_reference_cache(connection_params: Dict) -> Optional[ReferenceCache]:
+    """Shared reference cache for this database (None when REFERENCE_CACHE_ENABLED is off)"""
+    settings = reference_cache_settings_from_env()
+    if not settings['enabled']:
+        return None
+    key = tuple(sorted((k, str(v)) for k, v in connection_params.items()))
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = ReferenceCache(ttl=settings['ttl'], ttls=settings['ttls'])
+            _caches[key] = cache
+        return cache
+
+_listeners = {}
+
+def start_change_listener(connection_params: Dict, reference_cache: Optional[ReferenceCache],
+                          customer_cache: Optional[CustomerCache]) -> Optional[ReferenceChangeListener]:
+    """
+    Shared LISTEN thread feeding this database's caches
+    None when REFERENCE_CACHE_LISTEN is off or neither cache is enabled.
+    """
+    settings = reference_cache_settings_from_env()
+    if not settings['listen'] or (reference_cache is None and customer_cache is None):
+        return None
+    key = tuple(sorted((k, str(v)) for k, v in connection_params.items()))
+    with _caches_lock:
+        listener = _listeners.get(key)
+        if listener is None:
+            listener = ReferenceChangeListener(reference_cache, connection_params, settings['channel'],
+                                               customer_cache=customer_cache).start()
+            _listeners[key] = listener
+        return listener
@@ -46,8 +46,75 @@ CREATE TABLE IF NOT EXISTS plans (
     active BOOLEAN DEFAULT TRUE
 );
 
+-- Reference data change notifications: the app's reference cache
+-- (database/reference_cache.py) LISTENs on this channel and drops the
+-- cached rows of the table named in the payload
+CREATE OR REPLACE FUNCTION notify_reference_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('assistly_reference_changed', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS plans_reference_change ON plans;
+CREATE TRIGGER plans_reference_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON plans
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_reference_change();
+
+DROP TRIGGER IF EXISTS customers_reference_change ON customers;
+CREATE TRIGGER customers_reference_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON customers
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_reference_change();
+
+-- Per-customer change notifications ('customer:<id>', 'customer:' for all) for the customer cache
+CREATE OR REPLACE FUNCTION notify_customer_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('assistly_reference_changed', 'customer:');
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.customer_id IS NOT NULL THEN
+        PERFORM pg_notify('assistly_reference_changed', 'customer:' || OLD.customer_id);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.customer_id IS NOT NULL THEN
+        PERFORM pg_notify('assistly_reference_changed', 'customer:' || NEW.customer_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS customers_customer_change ON customers;
+CREATE TRIGGER customers_customer_change
+    AFTER INSERT OR UPDATE OR DELETE ON customers
+    FOR EACH ROW EXECUTE FUNCTION notify_customer_change();
+DROP TRIGGER IF EXISTS customers_customer_truncate ON customers;
+CREATE TRIGGER customers_customer_truncate
+    AFTER TRUNCATE ON customers
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_customer_change();
+
+DROP TRIGGER IF EXISTS tickets_customer_change ON tickets;
+CREATE TRIGGER tickets_customer_change
+    AFTER INSERT OR UPDATE OR DELETE ON tickets
+    FOR EACH ROW EXECUTE FUNCTION notify_customer_change();
+DROP TRIGGER IF EXISTS tickets_customer_truncate ON tickets;
+CREATE TRIGGER tickets_customer_truncate
+    AFTER TRUNCATE ON tickets
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_customer_change();
+
+DROP TRIGGER IF EXISTS billing_history_customer_change ON billing_history;
+CREATE TRIGGER billing_history_customer_change
+    AFTER INSERT OR UPDATE OR DELETE ON billing_history
+    FOR EACH ROW EXECUTE FUNCTION notify_customer_change();
+DROP TRIGGER IF EXISTS billing_history_customer_truncate ON billing_history;
+CREATE TRIGGER billing_history_customer_truncate
+    AFTER TRUNCATE ON billing_history
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_customer_change();
+
 -- Indexes for performance
 CREATE INDEX idx_tickets_customer ON tickets(customer_id);
 CREATE INDEX idx_tickets_status ON tickets(status);
 CREATE INDEX idx_billing_customer ON billing_history(customer_id);
-CREATE INDEX idx_billing_date ON billing_history(billing_date);
\ No newline at end of file
+CREATE INDEX idx_billing_date ON billing_history(billing_date);
+-- Composite indexes for newest-first, keyset-paginated history queries
+CREATE INDEX IF NOT EXISTS idx_billing_customer_date ON billing_history(customer_id, billing_date DESC, billing_id DESC);
+CREATE INDEX IF NOT EXISTS idx_tickets_customer_created ON tickets(customer_id, created_at DESC, ticket_id DESC);
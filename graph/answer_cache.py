@@ -0,0 +1,132 @@
+"""
+Semantic answer cache for policy/FAQ-style questions
+Reuses a specialist's answer when a new query is close enough (cosine
+similarity of query embeddings) to one already answered for the same
+route and customer plan. Only queries without customer-specific data
+are eligible; the cache is cleared whenever the knowledge base is re-indexed.
+"""
+import itertools
+import os
+import re
+import threading
+import numpy as np
+from typing import List, Dict, Optional, Tuple
+from cache.ttl_cache import TTLCache
+from rag.embeddings import EmbeddingManager
+from rag.kb_version import KBVersionReader
+
+# Signals that an answer depends on the customer's own account or conversation
+_PERSONAL_PATTERNS = re.compile(
+    r"\b(my|mine|me|our|ours|us|i'?m|i am|i'?ve|i have|i had|i was|i got|i did|i paid|"
+    r"i can'?t|i cannot|i'?d|yesterday|today|last (week|month|year)|this (week|month))\b"
+    r"|\binv-|#\d+|\$\s?\d|\d{2,}"
+)
+
+def is_customer_specific(query: str, history: List[Dict] = None) -> bool:
+    """True when the answer could depend on the customer's data or earlier messages"""
+    if history:
+        return True
+    return bool(_PERSONAL_PATTERNS.search(query.lower()))
+
+class AnswerCache:
+    def __init__(self, embedding_manager: EmbeddingManager, routes=("billing", "sales"),
+                 maxsize: int = 500, ttl: Optional[float] = 3600, threshold: float = 0.92,
+                 version_check_interval: float = None):
+        self.embedding_manager = embedding_manager
+        self.routes = set(routes)
+        self.threshold = threshold
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)  # id -> (route, plan, vector, answer)
+        self._ids = itertools.count()
+        # Re-reads the version every KB_VERSION_CHECK_INTERVAL seconds by default
+        self._kb_version_reader = KBVersionReader(interval=version_check_interval)
+        self._kb_version = self._kb_version_reader.get()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+    
+    def applies_to(self, route: str, query: str, history: List[Dict] = None) -> bool:
+        """Whether this turn may be answered from (and stored in) the cache"""
+        return route in self.routes and not is_customer_specific(query, history)
+    
+    def lookup(self, route: str, plan: str, query: str) -> Tuple[Optional[str], np.ndarray]:
+        """Cached answer (or None) and the query vector to pass to store()"""
+        vector = self._normalize(self.embedding_manager.embed_text(query))
+        return self._best_match(route, plan, vector), vector
+    
+    async def alookup(self, route: str, plan: str, query: str) -> Tuple[Optional[str], np.ndarray]:
+        """Async version of lookup"""
+        vector = self._normalize(await self.embedding_manager.aembed_text(query))
+        return self._best_match(route, plan, vector), vector
+    
+    def store(self, route: str, plan: str, vector: np.ndarray, answer: str):
+        """Remember an answer generated without customer-specific data"""
+        self._check_kb_version()
+        self.entries.set(next(self._ids), (route, plan, vector, answer))
+    
+    def invalidate(self):
+        """Drop every cached answer"""
+        self.entries.clear()
+        with self._lock:
+            self._invalidations += 1
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters and size"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "invalidations": self._invalidations,
+                "size": len(self.entries),
+            }
+    
+    def _best_match(self, route: str, plan: str, vector: np.ndarray) -> Optional[str]:
+        self._check_kb_version()
+        candidates = [
+            (entry_id, entry) for entry_id, entry, _ in self.entries.items()
+            if entry[0] == route and entry[1] == plan
+        ]
+        
+        answer = None
+        if candidates:
+            similarities = np.vstack([entry[2] for _, entry in candidates]) @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                entry_id, entry = candidates[best]
+                self.entries.get(entry_id)  # mark as recently used
+                answer = entry[3]
+        
+        with self._lock:
+            if answer is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return answer
+    
+    def _check_kb_version(self):
+        """Clear the cache if the knowledge base was re-indexed (checked at most every interval)"""
+        version = self._kb_version_reader.get()
+        if version != self._kb_version:
+            self._kb_version = version
+            self.invalidate()
+    
+    def _normalize(self, vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+def answer_cache_from_env(embedding_manager: EmbeddingManager) -> Optional[AnswerCache]:
+    """Build the answer cache from ANSWER_CACHE_* settings (None when disabled)"""
+    if os.getenv("ANSWER_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    ttl = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+    routes = [route.strip() for route in os.getenv("ANSWER_CACHE_ROUTES", "billing,sales").split(",")]
+    return AnswerCache(
+        embedding_manager,
+        routes=[route for route in routes if route],
+        maxsize=int(os.getenv("ANSWER_CACHE_SIZE", "500")),
+        ttl=ttl if ttl > 0 else None,
+        threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+    )
@@ -6,63 +6,163 @@ from agents.router_agent import RouterAgent
 from agents.billing_agent import BillingAgent
 from agents.technical_agent import TechnicalAgent
 from agents.sales_agent import SalesAgent
+from database.db_manager import DatabaseManager
+from rag.retriever import RAGRetriever
+from rag.resources import get_vector_store, get_embedding_manager
+from agents.conversation_memory import get_conversation_memory
 from graph.state import AssistlyState
+from graph.answer_cache import answer_cache_from_env
+from observability.log import get_logger
+from observability.tracing import span
+
+logger = get_logger(__name__)
+
+# Shared resources, injected into every specialist agent
+db = DatabaseManager()
+retriever = RAGRetriever(get_vector_store())
+memory = get_conversation_memory()
 
 # Initialize agents (reuse across calls)
 router_agent = RouterAgent()
-billing_agent = BillingAgent()
-technical_agent = TechnicalAgent()
-sales_agent = SalesAgent()
+billing_agent = BillingAgent(db=db, retriever=retriever, memory=memory)
+technical_agent = TechnicalAgent(db=db, retriever=retriever, memory=memory)
+sales_agent = SalesAgent(db=db, retriever=retriever, memory=memory)
+
+# Answers to policy/FAQ-style questions, shared across customers on the same plan
+answer_cache = answer_cache_from_env(get_embedding_manager())
+
+def run_specialist(agent, route: str, state: AssistlyState) -> str:
+    """Run a specialist agent, serving general questions from the answer cache"""
+    customer_id = state['customer_id']
+    query = state['query']
+    history = state.get('conversation_history', [])
+    
+    if answer_cache is None or not answer_cache.applies_to(route, query, history):
+        return agent.handle_query(customer_id=customer_id, query=query, history=history)
+    
+    # The unpersonalized context has the plan, and is reused to answer a miss
+    context = agent.get_customer_context(customer_id, personalize=False)
+    if not context:
+        return agent.handle_query(customer_id=customer_id, query=query, history=history)
+    plan = context['customer']['plan']
+    
+    try:
+        answer, vector = answer_cache.lookup(route, plan, query)
+    except Exception as e:
+        logger.warning("⚠️ Answer cache unavailable (%s)", e)
+        return agent.handle_query(customer_id=customer_id, query=query, history=history)
+    
+    if answer is not None:
+        logger.info("⚡ Answer cache hit")
+        return answer
+    
+    answer = agent.handle_query(customer_id=customer_id, query=query, history=history, personalize=False,
+                                customer_context=context)
+    answer_cache.store(route, plan, vector, answer)
+    return answer
+
+async def arun_specialist(agent, route: str, state: AssistlyState) -> str:
+    """Async version of run_specialist"""
+    customer_id = state['customer_id']
+    query = state['query']
+    history = state.get('conversation_history', [])
+    
+    if answer_cache is None or not answer_cache.applies_to(route, query, history):
+        return await agent.ahandle_query(customer_id=customer_id, query=query, history=history)
+    
+    context = await agent.aget_customer_context(customer_id, personalize=False)
+    if not context:
+        return await agent.ahandle_query(customer_id=customer_id, query=query, history=history)
+    plan = context['customer']['plan']
+    
+    try:
+        answer, vector = await answer_cache.alookup(route, plan, query)
+    except Exception as e:
+        logger.warning("⚠️ Answer cache unavailable (%s)", e)
+        return await agent.ahandle_query(customer_id=customer_id, query=query, history=history)
+    
+    if answer is not None:
+        logger.info("⚡ Answer cache hit")
+        return answer
+    
+    answer = await agent.ahandle_query(customer_id=customer_id, query=query, history=history,
+                                       personalize=False, customer_context=context)
+    answer_cache.store(route, plan, vector, answer)
+    return answer
 
 def route_query(state: AssistlyState) -> AssistlyState:
     """Node: Route the customer query to appropriate agent"""
-    print(f"🔀 Routing query: {state['query'][:50]}...")
+    logger.info("🔀 Routing query: %.50s...", state['query'])
     
-    route = router_agent.route(state['query'])
+    with span("route") as routing:
+        route = router_agent.route(state['query'])
+        routing.attributes['route'] = route
     state['route'] = route
     
-    print(f"✅ Routed to: {route.upper()}")
+    logger.info("✅ Routed to: %s", route.upper())
     return state
 
 def handle_billing(state: AssistlyState) -> AssistlyState:
     """Node: Handle billing queries"""
-    print(f"💰 Billing agent processing...")
+    logger.info("💰 Billing agent processing...")
     
-    response = billing_agent.handle_query(
-        customer_id=state['customer_id'],
-        query=state['query'],
-        history=state.get('conversation_history', [])
-    )
+    response = run_specialist(billing_agent, "billing", state)
     
     state['response'] = response
     return state
 
 def handle_technical(state: AssistlyState) -> AssistlyState:
     """Node: Handle technical queries"""
-    print(f"🔧 Technical agent processing...")
+    logger.info("🔧 Technical agent processing...")
     
-    response = technical_agent.handle_query(
-        customer_id=state['customer_id'],
-        query=state['query'],
-        history=state.get('conversation_history', [])
-    )
+    response = run_specialist(technical_agent, "technical", state)
     
     state['response'] = response
     return state
 
 def handle_sales(state: AssistlyState) -> AssistlyState:
     """Node: Handle sales queries"""
-    print(f"💼 Sales agent processing...")
+    logger.info("💼 Sales agent processing...")
     
-    response = sales_agent.handle_query(
-        customer_id=state['customer_id'],
-        query=state['query'],
-        history=state.get('conversation_history', [])
-    )
+    response = run_specialist(sales_agent, "sales", state)
     
     state['response'] = response
     return state
 
+# Async nodes (used by arun_assistly)
+async def aroute_query(state: AssistlyState) -> AssistlyState:
+    """Node: Route the customer query to appropriate agent (async)"""
+    logger.info("🔀 Routing query: %.50s...", state['query'])
+    
+    with span("route") as routing:
+        route = await router_agent.aroute(state['query'])
+        routing.attributes['route'] = route
+    state['route'] = route
+    
+    logger.info("✅ Routed to: %s", route.upper())
+    return state
+
+async def ahandle_billing(state: AssistlyState) -> AssistlyState:
+    """Node: Handle billing queries (async)"""
+    logger.info("💰 Billing agent processing...")
+    
+    state['response'] = await arun_specialist(billing_agent, "billing", state)
+    return state
+
+async def ahandle_technical(state: AssistlyState) -> AssistlyState:
+    """Node: Handle technical queries (async)"""
+    logger.info("🔧 Technical agent processing...")
+    
+    state['response'] = await arun_specialist(technical_agent, "technical", state)
+    return state
+
+async def ahandle_sales(state: AssistlyState) -> AssistlyState:
+    """Node: Handle sales queries (async)"""
+    logger.info("💼 Sales agent processing...")
+    
+    state['response'] = await arun_specialist(sales_agent, "sales", state)
+    return state
+
 def determine_route(state: AssistlyState) -> str:
     """Conditional edge: Determine which specialist to call"""
     return state['route']
\ No newline at end of file
@@ -10,4 +10,5 @@ class AssistlyState(TypedDict):
     query: str
     route: Literal["billing", "technical", "sales"]
     response: str
-    conversation_history: List[Dict[str, str]]  # Added: stores chat history
\ No newline at end of file
+    conversation_history: List[Dict[str, str]]  # Added: stores chat history (turns before query)
+    spans: List  # observability.tracing.Span timings of this run, filled in as stages finish
@@ -2,28 +2,72 @@
 Main LangGraph workflow for Assistly
 Orchestrates the multi-agent customer support system
 """
+import threading
+import time
+from contextlib import contextmanager
 from langgraph.graph import StateGraph, END
 from graph.state import AssistlyState
+from agents.conversation_memory import prior_turns
 from graph.nodes import (
     route_query,
     handle_billing,
     handle_technical,
     handle_sales,
+    aroute_query,
+    ahandle_billing,
+    ahandle_technical,
+    ahandle_sales,
     determine_route
 )
-from typing import List, Dict
+from observability.log import get_logger
+from observability.metrics import get_metrics, export_metrics_from_env
+from observability.tracing import Trace, span, tracing
+from typing import Callable, Dict, Iterator, List, NamedTuple
 
-def create_assistly_workflow():
+logger = get_logger(__name__)
+
+REQUESTS = get_metrics().counter("assistly_requests", "Workflow runs by route and outcome", ("route", "status"))
+
+# Serve /metrics (METRICS_PORT) and snapshot to METRICS_FILE at exit, if configured
+export_metrics_from_env()
+
+# Default node set: node name -> node function
+DEFAULT_NODES = {
+    "route_query": route_query,
+    "handle_billing": handle_billing,
+    "handle_technical": handle_technical,
+    "handle_sales": handle_sales,
+    "determine_route": determine_route,
+}
+
+# Async node set used by arun_assistly
+ASYNC_NODES = {
+    "route_query": aroute_query,
+    "handle_billing": ahandle_billing,
+    "handle_technical": ahandle_technical,
+    "handle_sales": ahandle_sales,
+    "determine_route": determine_route,
+}
+
+# Nodes whose LLM output is the customer-facing response
+SPECIALIST_NODES = ("handle_billing", "handle_technical", "handle_sales")
+
+# Process-wide cache of compiled graphs, keyed by node set
+_compiled_apps = {}
+_compiled_apps_lock = threading.Lock()
+
+def create_assistly_workflow(nodes: Dict[str, Callable] = None):
     """Create the LangGraph workflow"""
+    nodes = nodes or DEFAULT_NODES
     
     # Initialize graph
     workflow = StateGraph(AssistlyState)
     
     # Add nodes (each step in the process)
-    workflow.add_node("route_query", route_query)
-    workflow.add_node("handle_billing", handle_billing)
-    workflow.add_node("handle_technical", handle_technical)
-    workflow.add_node("handle_sales", handle_sales)
+    workflow.add_node("route_query", nodes["route_query"])
+    workflow.add_node("handle_billing", nodes["handle_billing"])
+    workflow.add_node("handle_technical", nodes["handle_technical"])
+    workflow.add_node("handle_sales", nodes["handle_sales"])
     
     # Set entry point
     workflow.set_entry_point("route_query")
@@ -31,7 +75,7 @@ def create_assistly_workflow():
     # Add conditional edges (routing logic)
     workflow.add_conditional_edges(
         "route_query",
-        determine_route,
+        nodes["determine_route"],
         {
             "billing": "handle_billing",
             "technical": "handle_technical",
@@ -49,6 +93,55 @@ def create_assistly_workflow():
     
     return app
 
+def get_assistly_app(nodes: Dict[str, Callable] = None):
+    """
+    Get the shared compiled workflow for a node set
+    
+    The graph is built and compiled once per process and reused by every
+    caller (Streamlit, main.py, batch runs). A different node set gets its
+    own compiled graph.
+    """
+    nodes = nodes or DEFAULT_NODES
+    key = tuple(sorted(nodes.items(), key=lambda item: item[0]))
+    
+    app = _compiled_apps.get(key)
+    if app is None:
+        with _compiled_apps_lock:
+            app = _compiled_apps.get(key)
+            if app is None:
+                app = create_assistly_workflow(nodes)
+                _compiled_apps[key] = app
+    return app
+
+def clear_workflow_cache():
+    """Drop all compiled workflows so the next call rebuilds them"""
+    with _compiled_apps_lock:
+        _compiled_apps.clear()
+
+def _initial_state(customer_id: str, query: str, history: List[Dict], trace: Trace) -> Dict:
+    return {
+        "customer_id": customer_id,
+        "query": query,
+        "route": "",
+        "response": "",
+        "conversation_history": prior_turns(query, history),
+        "spans": trace.spans
+    }
+
+@contextmanager
+def _request_trace():
+    """
+    Trace one workflow run: yields (trace, request span); the caller sets
+    request.attributes['route'], and the run is counted by route and outcome
+    """
+    status = "error"
+    with tracing() as trace, span("request") as request:
+        try:
+            yield trace, request
+            status = "ok"
+        finally:
+            REQUESTS.inc(route=request.attributes.get('route', ""), status=status)
+
 def run_assistly(customer_id: str, query: str, history: List[Dict] = None) -> str:
     """
     Main function to run Assistly workflow with conversation memory
@@ -61,27 +154,129 @@ def run_assistly(customer_id: str, query: str, history: List[Dict] = None) -> st
     Returns:
         Agent's response
     """
-    print("=" * 60)
-    print("🤖 ASSISTLY - AI CUSTOMER SUPPORT")
-    print("=" * 60)
+    logger.info("=" * 60)
+    logger.info("🤖 ASSISTLY - AI CUSTOMER SUPPORT")
+    logger.info("=" * 60)
     
-    # Create workflow
-    app = create_assistly_workflow()
-    
-    # Initial state
-    initial_state = {
-        "customer_id": customer_id,
-        "query": query,
-        "route": "",
-        "response": "",
-        "conversation_history": history if history else []
-    }
+    # Get the shared compiled workflow
+    app = get_assistly_app()
     
     # Run workflow
-    result = app.invoke(initial_state)
+    with _request_trace() as (trace, request):
+        result = app.invoke(_initial_state(customer_id, query, history, trace))
+        request.attributes['route'] = result['route']
+    
+    logger.info("\n" + "=" * 60)
+    logger.info("✅ RESPONSE READY")
+    logger.info("=" * 60)
     
-    print("\n" + "=" * 60)
-    print("✅ RESPONSE READY")
-    print("=" * 60)
+    return result['response']
+
+class TurnResult(NamedTuple):
+    route: str
+    response: str
+    timings: Dict[str, float]  # seconds spent in each workflow node, in execution order
+    total_latency: float
+    spans: List  # observability.tracing.Span timings of the stages (empty with TRACING_ENABLED=false)
+
+def run_assistly_timed(customer_id: str, query: str, history: List[Dict] = None) -> TurnResult:
+    """
+    run_assistly that also reports the route, per-node timings and stage spans
+    
+    Used by batch runs and benchmarks, which need more than the response
+    text; logs nothing of its own.
+    """
+    app = get_assistly_app()
+    
+    timings = {}
+    with _request_trace() as (trace, request):
+        state = _initial_state(customer_id, query, history, trace)
+        start = last = time.perf_counter()
+        for update in app.stream(state, stream_mode="updates"):
+            now = time.perf_counter()
+            for node, node_state in update.items():
+                timings[node] = now - last
+                state = {**state, **(node_state or {})}
+            last = now
+        total_latency = time.perf_counter() - start
+        request.attributes['route'] = state['route']
+    
+    return TurnResult(state['route'], state['response'], timings, total_latency, list(trace.spans))
+
+class ResponseStream:
+    """
+    One streamed turn: iterate to get response text as it is generated
+    After iteration, route, response, ttft (seconds to the first chunk),
+    total_latency (seconds to the last chunk) and spans describe the turn.
+    """
+    def __init__(self, app, customer_id: str, query: str, history: List[Dict] = None):
+        self._app = app
+        self._request = (customer_id, query, history)
+        self.route = ""
+        self.response = ""
+        self.ttft = None
+        self.total_latency = None
+        self.spans = []
+    
+    def __iter__(self) -> Iterator[str]:
+        with _request_trace() as (trace, request):
+            self.spans = trace.spans
+            yield from self._run(_initial_state(*self._request, trace))
+            request.attributes['route'] = self.route
+    
+    def _run(self, initial_state: Dict) -> Iterator[str]:
+        start = time.perf_counter()
+        final_state = initial_state
+        streamed = False
+        
+        for mode, payload in self._app.stream(initial_state, stream_mode=["messages", "values"]):
+            if mode == "values":
+                final_state = payload
+                continue
+            
+            # Token chunks from the specialist's LLM (the router's LLM output is skipped)
+            chunk, metadata = payload
+            if metadata.get("langgraph_node") not in SPECIALIST_NODES or not chunk.content:
+                continue
+            if self.ttft is None:
+                self.ttft = time.perf_counter() - start
+            streamed = True
+            yield chunk.content
+        
+        self.route = final_state.get('route', "")
+        self.response = final_state.get('response', "")
+        
+        # Answers that never reached the LLM (answer cache hit, unknown customer)
+        if not streamed:
+            self.ttft = time.perf_counter() - start
+            yield self.response
+        
+        self.total_latency = time.perf_counter() - start
+        logger.info("⏱️ First token %.2fs, total %.2fs", self.ttft, self.total_latency)
+
+def stream_assistly(customer_id: str, query: str, history: List[Dict] = None) -> ResponseStream:
+    """
+    Streaming version of run_assistly
+    
+    Returns a ResponseStream; iterating it runs the workflow and yields the
+    specialist's response chunk by chunk (e.g. for st.write_stream).
+    """
+    logger.info("=" * 60)
+    logger.info("🤖 ASSISTLY - AI CUSTOMER SUPPORT (streaming)")
+    logger.info("=" * 60)
+    
+    return ResponseStream(get_assistly_app(), customer_id, query, history)
+
+async def arun_assistly(customer_id: str, query: str, history: List[Dict] = None) -> str:
+    """
+    Async version of run_assistly
+    
+    Routing, retrieval, database access and LLM generation are all awaited,
+    so one event loop can serve many conversations at once.
+    """
+    app = get_assistly_app(ASYNC_NODES)
     
-    return result['response']
\ No newline at end of file
+    with _request_trace() as (trace, request):
+        result = await app.ainvoke(_initial_state(customer_id, query, history, trace))
+        request.attributes['route'] = result['route']
+    return result['response']
@@ -0,0 +1,50 @@
+"""
+Logging for Assistly
+Every module logs through get_logger(__name__), under the 'assistly'
+logger. LOG_LEVEL (default INFO) controls what is written; messages below
+it cost one level check, since arguments are only formatted when emitted.
+Output goes to the current sys.stdout, where the progress prints it
+replaced went, so redirect_stdout still silences it.
+"""
+import logging
+import os
+import sys
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ROOT_LOGGER = "assistly"
+
+_configured = False
+_configure_lock = threading.Lock()
+
+class ConsoleHandler(logging.StreamHandler):
+    """StreamHandler that writes to whatever sys.stdout is at emit time"""
+    def __init__(self):
+        super().__init__(sys.stdout)
+    
+    def emit(self, record):
+        self.stream = sys.stdout
+        super().emit(record)
+
+def configure_logging(level: str = None, fmt: str = None):
+    """Set up the 'assistly' logger from LOG_LEVEL / LOG_FORMAT (or the arguments)"""
+    global _configured
+    with _configure_lock:
+        logger = logging.getLogger(ROOT_LOGGER)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        handler = ConsoleHandler()
+        handler.setFormatter(logging.Formatter(fmt or os.getenv("LOG_FORMAT", "%(message)s")))
+        logger.addHandler(handler)
+        logger.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+        # Library loggers (httpx, chromadb) keep their own configuration
+        logger.propagate = False
+        _configured = True
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger for a module, configured on first use"""
+    if not _configured:
+        configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
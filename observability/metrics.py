@@ -0,0 +1,188 @@
+"""
+In-process metrics for Assistly
+Counters and histograms (fed by the timing spans in observability/tracing.py)
+rendered in the Prometheus text format. With METRICS_PORT set, a background
+server answers scrapes on /metrics; with METRICS_FILE set, an OpenMetrics
+snapshot is written there at exit (offline and batch runs).
+"""
+import atexit
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Seconds; covers cache hits (ms) up to slow LLM generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+def metrics_settings_from_env() -> Dict:
+    """Read metrics export configuration from METRICS_* environment variables"""
+    port = os.getenv("METRICS_PORT", "")
+    return {
+        'port': int(port) if port else None,
+        'host': os.getenv("METRICS_HOST", "127.0.0.1"),
+        'file': os.getenv("METRICS_FILE") or None,
+    }
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name  # without the _total suffix
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}  # label values -> count
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def render(self, openmetrics: bool) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        family = self.name if openmetrics else f"{self.name}_total"
+        lines = [f"# HELP {family} {self.help}", f"# TYPE {family} counter"]
+        lines += [f"{self.name}_total{_labels(self.label_names, key)} {_number(value)}" for key, value in values]
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+    
+    def render(self, openmetrics: bool) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, values in series:
+            running = 0
+            for bound, count in zip(self.buckets, values):
+                running += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {running}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {values[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(values[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {values[-1]}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}  # name -> Counter | Histogram
+        self._lock = threading.Lock()
+    
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        """Get or create a counter (name without the _total suffix)"""
+        return self._get_or_create(name, lambda: Counter(name, help, labels))
+    
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram"""
+        return self._get_or_create(name, lambda: Histogram(name, help, labels, buckets))
+    
+    def _get_or_create(self, name: str, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+    
+    def render(self, openmetrics: bool = False) -> str:
+        """Every metric in the Prometheus text format (or OpenMetrics, ending in # EOF)"""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = [line for metric in metrics for line in metric.render(openmetrics)]
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+    
+    def write(self, path: str):
+        """Write an OpenMetrics snapshot, replacing the file atomically"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render(openmetrics=True))
+        os.replace(tmp_path, path)
+    
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Answer GET /metrics on a daemon thread"""
+        registry = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+            
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+                body = registry.render(openmetrics).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="assistly-metrics", daemon=True).start()
+        return server
+
+_registry = MetricsRegistry()
+_export_started = False
+_export_lock = threading.Lock()
+
+def get_metrics() -> MetricsRegistry:
+    """Process-wide metrics registry"""
+    return _registry
+
+def export_metrics_from_env():
+    """Start the METRICS_PORT server and the METRICS_FILE exit snapshot (once per process)"""
+    global _export_started
+    with _export_lock:
+        if _export_started:
+            return
+        _export_started = True
+    
+    settings = metrics_settings_from_env()
+    if settings['port'] is not None:
+        _registry.serve(settings['port'], settings['host'])
+    if settings['file']:
+        atexit.register(_registry.write, settings['file'])
@@ -0,0 +1,119 @@
+"""
+Timing spans for Assistly requests
+Code on the hot path wraps each stage in `with span("db"):`. A finished
+span is recorded in the stage histogram (assistly_stage_duration_seconds)
+and, when a workflow run is being traced, appended to that run's Trace,
+which the workflow attaches to AssistlyState['spans'].
+
+The current trace lives in a context variable, so spans from worker
+threads and asyncio tasks land in the request that started them (thread
+pools must submit through contextvars.copy_context(), as
+agents/parallel.py does). TRACING_ENABLED=false turns span() into a no-op.
+
+Stages: request, route, route_llm, db, retrieval, embedding, vector_search,
+lexical_search, llm (attribute first_token_s), summary_llm.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, NamedTuple, Optional
+from observability.metrics import get_metrics
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+
+STAGE_SECONDS = get_metrics().histogram(
+    "assistly_stage_duration_seconds", "Time spent in each stage of a request", ("stage",)
+)
+STAGE_ERRORS = get_metrics().counter(
+    "assistly_stage_errors", "Stages that ended with an exception", ("stage",)
+)
+
+class Span(NamedTuple):
+    name: str
+    offset: float        # seconds from the start of the trace
+    seconds: float
+    attributes: Dict
+
+class Trace:
+    """Spans of one workflow run, in the order they finished"""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+    
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+    
+    def totals(self) -> Dict[str, float]:
+        """Seconds per stage, summed over its spans"""
+        totals = {}
+        with self._lock:
+            for span in self.spans:
+                totals[span.name] = totals.get(span.name, 0.0) + span.seconds
+        return totals
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("assistly_trace", default=None)
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+@contextmanager
+def tracing() -> Iterator[Trace]:
+    """Collect the spans of everything run inside the block into a new Trace"""
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        try:
+            _current_trace.reset(token)
+        except ValueError:
+            # A streaming generator closed from another context
+            pass
+
+class _Span:
+    __slots__ = ("name", "attributes", "start")
+    
+    def __init__(self, name: str, attributes: Dict):
+        self.name = name
+        self.attributes = attributes
+    
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(seconds, stage=self.name)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            STAGE_ERRORS.inc(stage=self.name)
+            self.attributes["error"] = exc_type.__name__
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(Span(self.name, self.start - trace.start, seconds, self.attributes))
+        return False
+
+class _NoopSpan:
+    __slots__ = ("attributes", "start")
+    
+    def __init__(self):
+        self.attributes = {}
+        self.start = 0.0
+    
+    def __enter__(self) -> "_NoopSpan":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+def span(name: str, **attributes):
+    """Context manager timing one stage; set extra attributes on the yielded span's .attributes"""
+    if not TRACING_ENABLED:
+        return _NoopSpan()
+    return _Span(name, attributes)
@@ -0,0 +1,193 @@
+"""
+Bulk ingestion into the vector store
+Embeds documents in batches with a bounded number of concurrent embedding
+requests, retries failed batches, writes each batch as soon as it is
+embedded and can checkpoint finished documents so an interrupted run resumes
+"""
+import contextlib
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class IngestError(Exception):
+    """Raised when some batches still failed after all retries"""
+    def __init__(self, message: str, report: "IngestReport"):
+        super().__init__(message)
+        self.report = report
+
+class IngestReport(NamedTuple):
+    total: int
+    written: int
+    skipped: int   # already done according to the checkpoint
+    failed: int
+    retries: int
+    seconds: float
+    
+    @property
+    def chunks_per_second(self) -> float:
+        return self.written / self.seconds if self.seconds else 0.0
+
+def ingest_settings_from_env() -> Dict:
+    """Read bulk ingestion configuration from INGEST_* environment variables"""
+    return {
+        'batch_size': int(os.getenv('INGEST_BATCH_SIZE', '64')),
+        'max_workers': int(os.getenv('INGEST_WORKERS', '4')),
+        'max_retries': int(os.getenv('INGEST_MAX_RETRIES', '3')),
+        'retry_backoff': float(os.getenv('INGEST_RETRY_BACKOFF', '1.0')),
+    }
+
+def checkpoint_key(doc_id: str, text: str, metadata: Optional[Dict]) -> Tuple[str, str]:
+    """(id, content hash) of a document, so one edited since it was checkpointed is embedded again"""
+    digest = (metadata or {}).get('content_hash') or hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return doc_id, digest
+
+class BulkIngestor:
+    def __init__(self, vector_store, batch_size: int = 64, max_workers: int = 4,
+                 max_retries: int = 3, retry_backoff: float = 1.0,
+                 checkpoint_path: Optional[str] = None, verbose: bool = True):
+        if batch_size < 1 or max_workers < 1:
+            raise ValueError(f"Invalid ingest settings: batch_size={batch_size}, max_workers={max_workers}")
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.checkpoint_path = checkpoint_path
+        self.verbose = verbose
+    
+    def ingest(self, texts: List[str], metadatas: List[Dict], ids: List[str]) -> IngestReport:
+        """Embed and upsert documents batch by batch"""
+        start = time.perf_counter()
+        done = self._load_checkpoint()
+        keys = [checkpoint_key(doc_id, text, metadata) for doc_id, text, metadata in zip(ids, texts, metadatas)]
+        pending = [i for i, key in enumerate(keys) if key not in done]
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        
+        written = failed = retries = 0
+        show_progress = self.verbose and len(batches) > 1
+        if show_progress:
+            print(f"📦 Embedding {len(pending)} documents in {len(batches)} batches "
+                  f"({self.max_workers} concurrent, {len(ids) - len(pending)} already done)")
+        
+        # Collections that buffer writes (rag/numpy_index.py) save once, when the block ends
+        collection = self.vector_store.collection
+        deferred = getattr(collection, "deferred_writes", None)
+        unsaved_keys = []  # written to a deferring collection, not yet saved or checkpointed
+        with contextlib.ExitStack() as stack:
+            if deferred:
+                stack.enter_context(deferred())
+            executor = stack.enter_context(
+                ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ingest"))
+            queue = iter(batches)
+            in_flight = {}
+            
+            # Keep at most 2 x max_workers batches in memory at a time
+            def submit_next():
+                batch = next(queue, None)
+                if batch is not None:
+                    in_flight[executor.submit(self._embed_batch, [texts[i] for i in batch])] = batch
+            
+            for _ in range(self.max_workers * 2):
+                submit_next()
+            
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    batch = in_flight.pop(future)
+                    submit_next()
+                    try:
+                        embeddings, attempts = future.result()
+                        retries += attempts - 1
+                    except Exception as e:
+                        failed += len(batch)
+                        retries += self.max_retries
+                        print(f"❌ Embedding a batch of {len(batch)} documents failed: {e}")
+                        continue
+                    
+                    try:
+                        collection.upsert(
+                            embeddings=embeddings,
+                            documents=[texts[i] for i in batch],
+                            metadatas=[metadatas[i] for i in batch],
+                            ids=[ids[i] for i in batch]
+                        )
+                    except Exception as e:
+                        failed += len(batch)
+                        print(f"❌ Writing a batch of {len(batch)} documents failed: {e}")
+                        continue
+                    
+                    written += len(batch)
+                    if self.checkpoint_path and not deferred:
+                        self._save_checkpoint([keys[i] for i in batch])
+                    elif self.checkpoint_path:
+                        unsaved_keys.extend(keys[i] for i in batch)
+                        # Saving once the unsaved rows reach a quarter of the index keeps total I/O linear
+                        if len(unsaved_keys) >= max(self.batch_size * 4, collection.count() // 4):
+                            collection.flush()
+                            self._save_checkpoint(unsaved_keys)
+                            unsaved_keys = []
+                    if show_progress:
+                        elapsed = time.perf_counter() - start
+                        print(f"   {written}/{len(pending)} documents "
+                              f"({written / elapsed:.1f} chunks/s)")
+        
+        # The deferred writes were saved when the block ended
+        if unsaved_keys:
+            self._save_checkpoint(unsaved_keys)
+        
+        report = IngestReport(len(ids), written, len(ids) - len(pending), failed, retries,
+                              time.perf_counter() - start)
+        if failed:
+            raise IngestError(
+                f"{failed} of {len(pending)} documents failed to ingest; "
+                f"re-run to retry them", report
+            )
+        
+        self._clear_checkpoint()
+        if show_progress:
+            print(f"✅ Ingested {written} documents in {report.seconds:.1f}s "
+                  f"({report.chunks_per_second:.1f} chunks/s)")
+        return report
+    
+    def _embed_batch(self, batch_texts: List[str]):
+        """Embed one batch, retrying with exponential backoff; returns (embeddings, attempts)"""
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return self.vector_store.embedding_manager.embed_documents(batch_texts), attempt
+            except Exception as e:
+                if attempt > self.max_retries:
+                    raise
+                delay = self.retry_backoff * 2 ** (attempt - 1)
+                print(f"⚠️ Embedding batch failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+    
+    # Checkpoint: one JSON list of finished [id, content hash] pairs per line
+    def _load_checkpoint(self) -> Set[Tuple[str, str]]:
+        done = set()
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return done
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from an interrupted write
+                # Bare ids from older checkpoints don't say which content was done
+                done.update(tuple(entry) for entry in entries if isinstance(entry, list) and len(entry) == 2)
+        return done
+    
+    def _save_checkpoint(self, batch_keys: List[Tuple[str, str]]):
+        with open(self.checkpoint_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps([list(key) for key in batch_keys]) + "\n")
+    
+    def _clear_checkpoint(self):
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
@@ -6,6 +6,24 @@ import os
 from typing import List, Dict
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+# Topic of each knowledge base file, used to scope retrieval per route.
+# Other files get the topic in their name prefix (billing_refunds.txt ->
+# billing) or 'general', which every route searches.
+TOPICS = ("billing", "technical", "sales", "general")
+SOURCE_TOPICS = {
+    "billing_policy.txt": "billing",
+    "technical_troubleshooting.txt": "technical",
+    "product_features.txt": "sales",
+    "faq.txt": "general",
+}
+
+def topic_for_source(filename: str) -> str:
+    """Topic metadata for a knowledge base file"""
+    if filename in SOURCE_TOPICS:
+        return SOURCE_TOPICS[filename]
+    prefix = filename.split("_", 1)[0].split(".", 1)[0].lower()
+    return prefix if prefix in TOPICS else "general"
+
 class DocumentLoader:
     def __init__(self, knowledge_base_path: str = "knowledge_base"):
         self.knowledge_base_path = knowledge_base_path
@@ -37,16 +55,18 @@ class DocumentLoader:
                 chunks = self.text_splitter.split_text(content)
                 
                 # Add each chunk with metadata
+                topic = topic_for_source(filename)
                 for i, chunk in enumerate(chunks):
                     documents.append({
                         'content': chunk,
                         'metadata': {
                             'source': filename,
-                            'chunk_id': i
+                            'chunk_id': i,
+                            'topic': topic
                         }
                     })
                 
-                print(f"✅ Loaded {filename}: {len(chunks)} chunks")
+                print(f"✅ Loaded {filename}: {len(chunks)} chunks ({topic})")
         
         print(f"\n📚 Total documents loaded: {len(documents)}")
         return documents
\ No newline at end of file
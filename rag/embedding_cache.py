@@ -0,0 +1,95 @@
+"""
+Embedding cache for EmbeddingManager
+In-memory LRU in front of an optional SQLite tier, keyed by
+sha256(model + text), so repeated queries and unchanged chunks
+never reach the embedding model twice
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Dict, List, Optional
+from cache.ttl_cache import TTLCache
+
+def embedding_key(model: str, text: str) -> str:
+    """Cache key for a text embedded with a given model"""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    def __init__(self, maxsize: int = 10000, path: Optional[str] = None):
+        self.memory = TTLCache(maxsize=maxsize)
+        self.path = path
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._disk_hits = 0
+        
+        if path:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    vector BLOB NOT NULL
+                )
+            """)
+            self._db.commit()
+    
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Cached vectors in input order (None where missing)"""
+        keys = [embedding_key(model, text) for text in texts]
+        results = [self.memory.get(key) for key in keys]
+        
+        missing = [key for key, vector in zip(keys, results) if vector is None]
+        if missing and self._db is not None:
+            found = self._load(missing)
+            for i, key in enumerate(keys):
+                if results[i] is None and key in found:
+                    results[i] = found[key]
+                    self.memory.set(key, found[key])
+        return results
+    
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]):
+        """Store vectors in memory and (if configured) on disk"""
+        rows = []
+        for text, vector in zip(texts, vectors):
+            key = embedding_key(model, text)
+            self.memory.set(key, vector)
+            rows.append((key, model, array('f', vector).tobytes()))
+        
+        if rows and self._db is not None:
+            with self._db_lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)", rows
+                )
+                self._db.commit()
+    
+    def _load(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._db_lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for key, blob in self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ):
+                    found[key] = array('f', blob).tolist()
+        self._disk_hits += len(found)
+        return found
+    
+    def stats(self) -> Dict:
+        """Memory-tier counters plus disk hits"""
+        stats = self.memory.stats()
+        stats["disk_hits"] = self._disk_hits
+        return stats
+
+def embedding_cache_from_env() -> Optional[EmbeddingCache]:
+    """Build a cache from EMBEDDING_CACHE_* settings (None when disabled)"""
+    maxsize = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+    if maxsize <= 0:
+        return None
+    return EmbeddingCache(maxsize=maxsize, path=os.getenv("EMBEDDING_CACHE_PATH") or None)
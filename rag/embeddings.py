@@ -2,6 +2,9 @@
 Embedding manager using Ollama's nomic-embed-text model
 """
 from langchain_ollama import OllamaEmbeddings
+from rag.embedding_cache import EmbeddingCache, embedding_cache_from_env
+from config.ollama import parse_keep_alive
+from observability.tracing import span
 from typing import List
 import os
 from dotenv import load_dotenv
@@ -9,16 +12,88 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class EmbeddingManager:
-    def __init__(self):
+    def __init__(self, model: str = None, base_url: str = None, cache: EmbeddingCache = None):
+        self.model = model or os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
         self.embeddings = OllamaEmbeddings(
-            model="nomic-embed-text",
-            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+            model=self.model,
+            base_url=base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+            keep_alive=parse_keep_alive(os.getenv("OLLAMA_KEEP_ALIVE", "30m"))
         )
+        # Repeat texts skip the model entirely (None disables caching)
+        self.cache = cache if cache is not None else embedding_cache_from_env()
     
     def embed_text(self, text: str) -> List[float]:
         """Convert text to embedding vector"""
-        return self.embeddings.embed_query(text)
+        if self.cache is None:
+            return self._model_query(text)
+        
+        cached = self.cache.get_many(self.model, [text])[0]
+        if cached is not None:
+            return cached
+        
+        vector = self._model_query(text)
+        self.cache.put_many(self.model, [text], [vector])
+        return vector
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Convert multiple texts to embedding vectors"""
-        return self.embeddings.embed_documents(texts)
\ No newline at end of file
+        if self.cache is None:
+            return self._model_documents(texts)
+        
+        vectors = self.cache.get_many(self.model, texts)
+        missing = self._missing_texts(texts, vectors)
+        if missing:
+            new_vectors = self._model_documents(missing)
+            self.cache.put_many(self.model, missing, new_vectors)
+            vectors = self._fill_missing(texts, vectors, dict(zip(missing, new_vectors)))
+        return vectors
+    
+    async def aembed_text(self, text: str) -> List[float]:
+        """Async version of embed_text"""
+        if self.cache is None:
+            return await self._amodel_query(text)
+        
+        cached = self.cache.get_many(self.model, [text])[0]
+        if cached is not None:
+            return cached
+        
+        vector = await self._amodel_query(text)
+        self.cache.put_many(self.model, [text], [vector])
+        return vector
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Async version of embed_documents"""
+        if self.cache is None:
+            return await self._amodel_documents(texts)
+        
+        vectors = self.cache.get_many(self.model, texts)
+        missing = self._missing_texts(texts, vectors)
+        if missing:
+            new_vectors = await self._amodel_documents(missing)
+            self.cache.put_many(self.model, missing, new_vectors)
+            vectors = self._fill_missing(texts, vectors, dict(zip(missing, new_vectors)))
+        return vectors
+    
+    # Model calls (cache misses), timed as the 'embedding' stage
+    def _model_query(self, text: str) -> List[float]:
+        with span("embedding", texts=1):
+            return self.embeddings.embed_query(text)
+    
+    def _model_documents(self, texts: List[str]) -> List[List[float]]:
+        with span("embedding", texts=len(texts)):
+            return self.embeddings.embed_documents(texts)
+    
+    async def _amodel_query(self, text: str) -> List[float]:
+        with span("embedding", texts=1):
+            return await self.embeddings.aembed_query(text)
+    
+    async def _amodel_documents(self, texts: List[str]) -> List[List[float]]:
+        with span("embedding", texts=len(texts)):
+            return await self.embeddings.aembed_documents(texts)
+    
+    def _missing_texts(self, texts: List[str], vectors: List) -> List[str]:
+        """Unique texts that had no cached vector"""
+        return list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+    
+    def _fill_missing(self, texts: List[str], vectors: List, new_vectors: dict) -> List[List[float]]:
+        return [vector if vector is not None else new_vectors[text] for text, vector in zip(texts, vectors)]
@@ -0,0 +1,21 @@
+"""
+Metadata filters for the in-process indexes
+Supports the subset of Chroma's `where` syntax the retriever uses:
+{"field": value}, {"field": {"$eq": value}} and {"field": {"$in": [values]}}
+"""
+from typing import Dict, Optional
+
+def metadata_matches(metadata: Dict, where: Optional[Dict]) -> bool:
+    """True if a chunk's metadata satisfies every condition in where"""
+    if not where:
+        return True
+    for field, condition in where.items():
+        value = (metadata or {}).get(field)
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+        elif value != condition:
+            return False
+    return True
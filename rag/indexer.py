@@ -0,0 +1,94 @@
+"""
+Incremental knowledge base indexer
+Every chunk is stored with a hash of its content, so re-indexing only
+embeds new or changed chunks and deletes chunks that no longer exist
+"""
+import hashlib
+import json
+import time
+from typing import Dict, List, NamedTuple
+from rag.document_loader import DocumentLoader
+from rag.vector_store import VectorStore
+from rag.kb_version import bump_kb_version
+from rag.bulk_ingest import IngestError
+
+class IndexReport(NamedTuple):
+    added: int
+    updated: int
+    unchanged: int
+    deleted: int
+    seconds: float
+    
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.deleted)
+
+def chunk_id(metadata: Dict) -> str:
+    """Vector store id of a chunk"""
+    return f"{metadata['source']}_{metadata['chunk_id']}"
+
+def content_hash(text: str, metadata: Dict = None) -> str:
+    """Hash of a chunk's text and metadata (a new topic also re-indexes it)"""
+    payload = json.dumps([text, metadata or {}], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class KnowledgeBaseIndexer:
+    def __init__(self, vector_store: VectorStore, loader: DocumentLoader = None,
+                 checkpoint_path: str = None):
+        self.vector_store = vector_store
+        self.loader = loader or DocumentLoader()
+        # Chunks an interrupted upsert finished, skipped by the next run (see rag/bulk_ingest.py)
+        self.checkpoint_path = checkpoint_path
+    
+    def index(self, documents: List[Dict] = None) -> IndexReport:
+        """Bring the vector store in line with the knowledge base files"""
+        start = time.perf_counter()
+        if documents is None:
+            documents = self.loader.load_all_documents()
+        
+        # What is indexed now: id -> content hash ('' for chunks indexed without one)
+        indexed = {
+            doc_id: (metadata or {}).get('content_hash', '')
+            for doc_id, metadata in self.vector_store.get_metadatas().items()
+        }
+        
+        texts, metadatas, ids = [], [], []
+        added = updated = unchanged = 0
+        for doc in documents:
+            doc_id = chunk_id(doc['metadata'])
+            digest = content_hash(doc['content'], doc['metadata'])
+            if indexed.get(doc_id) == digest:
+                unchanged += 1
+                continue
+            
+            if doc_id in indexed:
+                updated += 1
+            else:
+                added += 1
+            texts.append(doc['content'])
+            metadatas.append({**doc['metadata'], 'content_hash': digest})
+            ids.append(doc_id)
+        
+        # Chunks of removed files, or past the end of files that got shorter
+        current_ids = {chunk_id(doc['metadata']) for doc in documents}
+        stale_ids = [doc_id for doc_id in indexed if doc_id not in current_ids]
+        
+        try:
+            if ids:
+                self.vector_store.upsert_documents(texts, metadatas, ids, checkpoint_path=self.checkpoint_path)
+            if stale_ids:
+                self.vector_store.delete_documents(stale_ids)
+        except IngestError:
+            # Some batches were written; the next run picks up the rest by hash
+            bump_kb_version(self.vector_store.persist_dir)
+            raise
+        
+        report = IndexReport(added, updated, unchanged, len(stale_ids), time.perf_counter() - start)
+        
+        # Invalidate caches built on the previous knowledge base
+        if report.changed:
+            bump_kb_version(self.vector_store.persist_dir)
+        
+        # Lexical index for hybrid retrieval, built for the new version
+        self.vector_store.rebuild_lexical_index()
+        return report
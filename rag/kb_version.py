@@ -0,0 +1,58 @@
+"""
+Knowledge base version marker
+A small file next to the vector store that changes every time the
+knowledge base is re-indexed, so caches built on top of it can invalidate
+"""
+import os
+import time
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+
+VERSION_FILENAME = "kb_version"
+
+def _version_path(persist_dir: str = None) -> str:
+    persist_dir = persist_dir or os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
+    return os.path.join(persist_dir, VERSION_FILENAME)
+
+def get_kb_version(persist_dir: str = None) -> str:
+    """Current knowledge base version ('' if it was never indexed)"""
+    try:
+        with open(_version_path(persist_dir), 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+def bump_kb_version(persist_dir: str = None) -> str:
+    """Record that the knowledge base changed; returns the new version"""
+    path = _version_path(persist_dir)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    version = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(tmp_path, path)
+    return version
+
+class KBVersionReader:
+    """The knowledge base version, read from disk at most every interval seconds"""
+    def __init__(self, persist_dir: str = None, interval: float = None):
+        self.persist_dir = persist_dir
+        if interval is None:
+            interval = float(os.getenv("KB_VERSION_CHECK_INTERVAL", "5"))
+        self.interval = interval
+        self._version = get_kb_version(persist_dir)
+        self._next_read = time.monotonic() + interval
+    
+    def get(self) -> str:
+        """Last version read, re-read once the interval has passed"""
+        if time.monotonic() >= self._next_read:
+            return self.refresh()
+        return self._version
+    
+    def refresh(self) -> str:
+        """Read the version now"""
+        self._version = get_kb_version(self.persist_dir)
+        self._next_read = time.monotonic() + self.interval
+        return self._version
@@ -0,0 +1,179 @@
+"""
+Lexical (BM25) inverted index over the knowledge base chunks
+Built from the vector store's documents at indexing time and saved next to
+it, so exact terms (error codes, invoice prefixes, plan names) can be found
+without an embedding call
+"""
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+from rag.filters import metadata_matches
+
+# Compound tokens like inv-2024-001, err_503 or ie11 are kept whole and also split
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from have how i if in is it its me my of
+on or our so that the their there this to was we what when where which who why will
+with you your
+""".split())
+
+SUFFIXES = ("ing", "ed", "es", "s")
+MIN_STEM = 4
+# Saved indexes built by a different tokenizer are rebuilt on load
+TOKENIZER_VERSION = 2
+
+def _stem(word: str) -> str:
+    """
+    Strip a common English suffix and a final "e" so charge, charges, charged
+    and charging share a term; a doubled final consonant left by -ed/-ing is
+    undone (stopped -> stop), except ll/ss/zz (billing -> bill)
+    """
+    if not word.isalpha():
+        return word
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            word = word[:-len(suffix)]
+            if suffix in ("ing", "ed") and word[-1] == word[-2] and word[-1] not in "aeiouylsz":
+                word = word[:-1]
+            break
+    if word.endswith("e") and len(word) > MIN_STEM:
+        word = word[:-1]
+    return word
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, stemmed terms without stopwords; compound tokens also yield their parts"""
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        parts = re.split(r"[-_.]", token)
+        if len(parts) > 1:
+            tokens.append(token)
+        tokens.extend(_stem(part) for part in parts if part and part not in STOPWORDS)
+    return tokens
+
+class LexicalIndex:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.kb_version = ""
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[List[int]]] = {}  # term -> [[doc index, term frequency], ...]
+        self.avg_length = 0.0
+        self._filter_cache = {}
+    
+    @classmethod
+    def build(cls, ids: List[str], documents: List[str], metadatas: List[Dict],
+              kb_version: str = "") -> "LexicalIndex":
+        """Build the index from every chunk in the knowledge base"""
+        index = cls()
+        index.kb_version = kb_version
+        index.ids = list(ids)
+        index.documents = list(documents)
+        index.metadatas = [metadata or {} for metadata in metadatas]
+        
+        postings = defaultdict(list)
+        for doc_index, text in enumerate(index.documents):
+            counts = Counter(tokenize(text))
+            index.doc_lengths.append(sum(counts.values()))
+            for term, frequency in counts.items():
+                postings[term].append([doc_index, frequency])
+        index.postings = dict(postings)
+        index.avg_length = sum(index.doc_lengths) / len(index.doc_lengths) if index.doc_lengths else 0.0
+        return index
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def idf(self, term: str) -> float:
+        document_frequency = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.ids) - document_frequency + 0.5) / (document_frequency + 0.5))
+    
+    def search(self, query: str, n_results: int = 10, where: Dict = None) -> List[Dict]:
+        """
+        Top chunks by BM25 score (only chunks sharing a term with the query)
+        Each result also has 'coverage': the IDF-weighted share of query
+        terms it contains (1.0 means every term matched). where restricts
+        the search to chunks whose metadata matches (see rag/filters.py).
+        """
+        allowed = self._allowed_docs(where)
+        terms = set(tokenize(query))
+        scores = defaultdict(float)
+        matched_idf = defaultdict(float)
+        total_idf = 0.0
+        for term in terms:
+            idf = self.idf(term)
+            total_idf += idf
+            for doc_index, frequency in self.postings.get(term, ()):
+                if allowed is not None and doc_index not in allowed:
+                    continue
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_index] / self.avg_length
+                scores[doc_index] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+                matched_idf[doc_index] += idf
+        
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
+        return [
+            {
+                'id': self.ids[doc_index],
+                'content': self.documents[doc_index],
+                'metadata': self.metadatas[doc_index],
+                'score': score,
+                'coverage': matched_idf[doc_index] / total_idf,
+            }
+            for doc_index, score in ranked
+        ]
+    
+    def _allowed_docs(self, where: Optional[Dict]) -> Optional[set]:
+        """Doc indexes matching a metadata filter (cached per filter), None for all"""
+        if not where:
+            return None
+        key = json.dumps(where, sort_keys=True)
+        allowed = self._filter_cache.get(key)
+        if allowed is None:
+            allowed = {doc_index for doc_index, metadata in enumerate(self.metadatas)
+                       if metadata_matches(metadata, where)}
+            self._filter_cache[key] = allowed
+        return allowed
+    
+    # Persistence
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        data = {
+            'k1': self.k1,
+            'b': self.b,
+            'kb_version': self.kb_version,
+            'tokenizer': TOKENIZER_VERSION,
+            'ids': self.ids,
+            'documents': self.documents,
+            'metadatas': self.metadatas,
+            'doc_lengths': self.doc_lengths,
+            'postings': self.postings,
+        }
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+    
+    @classmethod
+    def load(cls, path: str) -> Optional["LexicalIndex"]:
+        """Load a saved index, or None if there is none"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('tokenizer') != TOKENIZER_VERSION:
+            return None
+        index = cls(k1=data['k1'], b=data['b'])
+        index.kb_version = data['kb_version']
+        index.ids = data['ids']
+        index.documents = data['documents']
+        index.metadatas = data['metadatas']
+        index.doc_lengths = data['doc_lengths']
+        index.postings = data['postings']
+        index.avg_length = sum(index.doc_lengths) / len(index.doc_lengths) if index.doc_lengths else 0.0
+        return index
@@ -0,0 +1,347 @@
+"""
+In-process NumPy vector index
+Drop-in replacement for the parts of the Chroma client/collection API that
+VectorStore uses. Embeddings are L2-normalized and kept in a memory-mapped
+.npy matrix (float32, float16 or int8 with a per-row scale) next to a JSON
+sidecar with ids, documents and metadata. Search is exact: one
+matrix-vector (or matrix-matrix for batches) product plus argpartition.
+
+Bulk ingestion wraps its upserts in deferred_writes(), so the files are
+written once per run instead of once per batch.
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+from rag.filters import metadata_matches
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+
+# Rows scored per block for float16/int8, bounding the float32 temporaries
+SCORE_BLOCK_ROWS = 8192
+
+GENERATION_PREFIX = "gen-"
+MIN_BUFFER_ROWS = 1024
+
+class _Snapshot(NamedTuple):
+    """Immutable view of the index; searches use one without locking"""
+    ids: List[str]
+    documents: List[str]
+    metadatas: List[Dict]
+    matrix: np.ndarray            # (n, dim) in the storage dtype
+    scales: Optional[np.ndarray]  # (n,) float32, int8 only
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+class NumpyCollection:
+    def __init__(self, name: str, path: str, dtype: str = "float32"):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported vector dtype {dtype!r} (use one of {SUPPORTED_DTYPES})")
+        self.name = name
+        self.path = path
+        self.dtype = dtype
+        self._lock = threading.Lock()
+        self._snapshot = self._load()
+        self._row_of = {doc_id: row for row, doc_id in enumerate(self._snapshot.ids)}
+        # Writable copy of the matrix with spare rows, created by the first write
+        self._buffer = None
+        self._scales_buffer = None
+        self._deferred = 0
+        self._dirty = False
+        self._partitions = {}  # filter -> (snapshot, (rows, matrix, scales))
+    
+    # Storage: each save is a new generation directory (vectors.npy,
+    # scales.npy, meta.json); the CURRENT file names the live one and is
+    # replaced last, so readers never see files from two different saves
+    @property
+    def _current_path(self) -> str:
+        return os.path.join(self.path, "CURRENT")
+    
+    def _empty(self) -> _Snapshot:
+        return _Snapshot([], [], [], np.zeros((0, 0), dtype=self.dtype),
+                         np.zeros(0, dtype=np.float32) if self.dtype == "int8" else None)
+    
+    def _generation_dir(self) -> Optional[str]:
+        """Directory of the live generation (the collection root for indexes saved before generations)"""
+        try:
+            with open(self._current_path, 'r', encoding='utf-8') as f:
+                return os.path.join(self.path, f.read().strip())
+        except FileNotFoundError:
+            return self.path if os.path.exists(os.path.join(self.path, "meta.json")) else None
+    
+    def _load(self) -> _Snapshot:
+        for attempt in range(3):
+            directory = self._generation_dir()
+            if directory is None:
+                return self._empty()
+            try:
+                return self._load_generation(directory)
+            except FileNotFoundError:
+                # Replaced and cleaned up by another process between the two reads
+                if attempt == 2:
+                    raise
+    
+    def _load_generation(self, directory: str) -> _Snapshot:
+        with open(os.path.join(directory, "meta.json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['dtype'] != self.dtype:
+            raise ValueError(
+                f"Index at {self.path} was built with dtype {meta['dtype']}, not {self.dtype}; "
+                f"re-index with --rebuild"
+            )
+        if not meta['ids']:
+            return self._empty()
+        matrix = np.load(os.path.join(directory, "vectors.npy"), mmap_mode='r')
+        scales = np.load(os.path.join(directory, "scales.npy")) if self.dtype == "int8" else None
+        return _Snapshot(meta['ids'], meta['documents'], meta['metadatas'], matrix, scales)
+    
+    def _save(self, snapshot: _Snapshot):
+        """Write a new generation, point CURRENT at it, then remove the older ones"""
+        os.makedirs(self.path, exist_ok=True)
+        directory = tempfile.mkdtemp(prefix=GENERATION_PREFIX, dir=self.path)
+        if snapshot.ids:
+            np.save(os.path.join(directory, "vectors.npy"), snapshot.matrix)
+            if snapshot.scales is not None:
+                np.save(os.path.join(directory, "scales.npy"), snapshot.scales)
+        meta = {
+            'dtype': self.dtype,
+            'ids': snapshot.ids,
+            'documents': snapshot.documents,
+            'metadatas': snapshot.metadatas,
+        }
+        with open(os.path.join(directory, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        
+        with open(self._current_path + ".tmp", 'w', encoding='utf-8') as f:
+            f.write(os.path.basename(directory))
+        os.replace(self._current_path + ".tmp", self._current_path)
+        
+        # Open memory maps keep their data on POSIX; elsewhere a later save retries
+        for entry in os.listdir(self.path):
+            if entry.startswith(GENERATION_PREFIX) and entry != os.path.basename(directory):
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+        for legacy in ("meta.json", "vectors.npy", "scales.npy"):
+            try:
+                os.remove(os.path.join(self.path, legacy))
+            except OSError:
+                pass
+    
+    def _commit(self, snapshot: _Snapshot):
+        """Make a write visible to searches; save it unless writes are deferred"""
+        self._snapshot = snapshot
+        self._dirty = True
+        if not self._deferred:
+            self._persist()
+    
+    def _persist(self):
+        self._save(self._snapshot)
+        # Serve from the memory-mapped files again and free the writable copy
+        self._snapshot = self._load()
+        self._buffer = self._scales_buffer = None
+        self._dirty = False
+    
+    @contextmanager
+    def deferred_writes(self):
+        """Keep upserts and deletes in memory and save once when the (outermost) block ends"""
+        with self._lock:
+            self._deferred += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._deferred -= 1
+                if not self._deferred and self._dirty:
+                    self._persist()
+    
+    def flush(self):
+        """Save deferred writes now"""
+        with self._lock:
+            if self._dirty:
+                self._persist()
+    
+    def _writable(self, extra_rows: int, dim: int) -> tuple:
+        """(matrix, scales) buffers with room for extra_rows more rows, grown by doubling"""
+        n = len(self._snapshot.ids)
+        if self._buffer is None or len(self._buffer) < n + extra_rows:
+            capacity = max(MIN_BUFFER_ROWS, 2 * (n + extra_rows))
+            buffer = np.empty((capacity, dim), dtype=self.dtype)
+            scales = np.empty(capacity, dtype=np.float32) if self.dtype == "int8" else None
+            if n:
+                buffer[:n] = self._snapshot.matrix[:n]
+                if scales is not None:
+                    scales[:n] = self._snapshot.scales[:n]
+            self._buffer, self._scales_buffer = buffer, scales
+        return self._buffer, self._scales_buffer
+    
+    def _encode(self, embeddings) -> tuple:
+        """Normalize float vectors and convert them to the storage dtype"""
+        vectors = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        if self.dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+            return quantized, scales.astype(np.float32)
+        return vectors.astype(self.dtype), None
+    
+    # Chroma-compatible API
+    def add(self, embeddings, documents: List[str], metadatas: List[Dict], ids: List[str]):
+        self.upsert(embeddings=embeddings, documents=documents, metadatas=metadatas, ids=ids)
+    
+    def upsert(self, embeddings, documents: List[str], metadatas: List[Dict], ids: List[str]):
+        """
+        Insert or replace rows by id
+        New rows are appended to a buffer with spare capacity, so a run of
+        upserts copies the matrix once rather than on every call. Rows
+        replaced in place are also visible to searches already running.
+        """
+        new_rows, new_scales = self._encode(embeddings)
+        with self._lock:
+            current = self._snapshot
+            if current.ids and current.matrix.shape[1] != new_rows.shape[1]:
+                raise ValueError(
+                    f"Embedding dimension {new_rows.shape[1]} does not match index "
+                    f"dimension {current.matrix.shape[1]}"
+                )
+            matrix, scales = self._writable(len(ids), new_rows.shape[1])
+            ids_out = list(current.ids)
+            documents_out = list(current.documents)
+            metadatas_out = list(current.metadatas)
+            
+            for i, doc_id in enumerate(ids):
+                row = self._row_of.get(doc_id)
+                if row is None:
+                    row = self._row_of[doc_id] = len(ids_out)
+                    ids_out.append(doc_id)
+                    documents_out.append(documents[i])
+                    metadatas_out.append(metadatas[i])
+                else:
+                    documents_out[row] = documents[i]
+                    metadatas_out[row] = metadatas[i]
+                matrix[row] = new_rows[i]
+                if scales is not None:
+                    scales[row] = new_scales[i]
+            
+            n = len(ids_out)
+            self._commit(_Snapshot(ids_out, documents_out, metadatas_out, matrix[:n],
+                                   None if scales is None else scales[:n]))
+    
+    def delete(self, ids: List[str]):
+        """Delete rows by id"""
+        with self._lock:
+            current = self._snapshot
+            remove = set(ids)
+            keep = [row for row, doc_id in enumerate(current.ids) if doc_id not in remove]
+            if len(keep) == len(current.ids):
+                return
+            snapshot = _Snapshot(
+                [current.ids[row] for row in keep],
+                [current.documents[row] for row in keep],
+                [current.metadatas[row] for row in keep],
+                np.array(current.matrix[keep]),
+                None if current.scales is None else current.scales[keep],
+            )
+            self._row_of = {doc_id: row for row, doc_id in enumerate(snapshot.ids)}
+            self._buffer = self._scales_buffer = None
+            self._commit(snapshot)
+    
+    def get(self, ids: List[str] = None, include: List[str] = ("documents", "metadatas")) -> Dict:
+        snapshot = self._snapshot
+        rows = range(len(snapshot.ids))
+        if ids is not None:
+            wanted = set(ids)
+            rows = [row for row in rows if snapshot.ids[row] in wanted]
+        result = {'ids': [snapshot.ids[row] for row in rows]}
+        if "documents" in include:
+            result['documents'] = [snapshot.documents[row] for row in rows]
+        if "metadatas" in include:
+            result['metadatas'] = [snapshot.metadatas[row] for row in rows]
+        return result
+    
+    def count(self) -> int:
+        return len(self._snapshot.ids)
+    
+    def query(self, query_embeddings, n_results: int = 10, where: Dict = None) -> Dict:
+        """Exact top-k by cosine similarity for one or more query vectors"""
+        snapshot = self._snapshot
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        result = {'ids': [], 'documents': [], 'metadatas': [], 'distances': []}
+        rows, matrix, scales = self._partition(snapshot, where)
+        if len(rows) == 0:
+            for key in result:
+                result[key] = [[] for _ in range(len(queries))]
+            return result
+        
+        scores = self._scores(matrix, scales, _normalize_rows(queries))  # (n_queries, len(rows))
+        k = min(n_results, scores.shape[1])
+        for row_scores in scores:
+            top = np.argpartition(-row_scores, k - 1)[:k] if k < len(row_scores) else np.arange(len(row_scores))
+            top = top[np.argsort(-row_scores[top])]
+            result['ids'].append([snapshot.ids[rows[i]] for i in top])
+            result['documents'].append([snapshot.documents[rows[i]] for i in top])
+            result['metadatas'].append([snapshot.metadatas[rows[i]] for i in top])
+            result['distances'].append([float(1.0 - row_scores[i]) for i in top])
+        return result
+    
+    def _partition(self, snapshot: _Snapshot, where: Optional[Dict]) -> tuple:
+        """
+        (rows, matrix, scales) of the chunks matching a metadata filter
+        Each distinct filter's sub-matrix is cached until the next write, so
+        a filtered search only scores its own partition.
+        """
+        if not where:
+            return np.arange(len(snapshot.ids)), snapshot.matrix, snapshot.scales
+        
+        key = json.dumps(where, sort_keys=True)
+        cached = self._partitions.get(key)
+        if cached is not None and cached[0] is snapshot:
+            return cached[1]
+        
+        rows = np.array([row for row, metadata in enumerate(snapshot.metadatas)
+                         if metadata_matches(metadata, where)], dtype=np.int64)
+        partition = (
+            rows,
+            np.ascontiguousarray(snapshot.matrix[rows]),
+            None if snapshot.scales is None else snapshot.scales[rows],
+        )
+        self._partitions[key] = (snapshot, partition)
+        return partition
+    
+    def _scores(self, matrix: np.ndarray, scales: Optional[np.ndarray], queries: np.ndarray) -> np.ndarray:
+        """Cosine similarity of each query with every row"""
+        if self.dtype == "float32":
+            return queries @ matrix.T
+        
+        n = len(matrix)
+        scores = np.empty((len(queries), n), dtype=np.float32)
+        for start in range(0, n, SCORE_BLOCK_ROWS):
+            block = matrix[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + SCORE_BLOCK_ROWS] = queries @ block.T
+        if scales is not None:
+            scores *= scales
+        return scores
+
+class NumpyIndexClient:
+    """Chroma-client-like factory for NumpyCollections under one directory"""
+    def __init__(self, path: str, dtype: str = "float32"):
+        self.path = path
+        self.dtype = dtype
+        self._collections = {}
+        self._lock = threading.Lock()
+    
+    def get_or_create_collection(self, name: str, metadata: Dict = None) -> NumpyCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = NumpyCollection(name, os.path.join(self.path, name), self.dtype)
+            return self._collections[name]
+    
+    def delete_collection(self, name: str):
+        with self._lock:
+            self._collections.pop(name, None)
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
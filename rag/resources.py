@@ -0,0 +1,89 @@
+"""
+Shared RAG resources
+Hands out one vector index client, EmbeddingManager and VectorStore per
+process so every agent reuses the same connections and memory.
+VECTOR_BACKEND selects the index: 'chroma' (default) or 'numpy'
+(rag/numpy_index.py, storage dtype from VECTOR_DTYPE).
+"""
+import threading
+import os
+import chromadb
+from dotenv import load_dotenv
+from rag.embeddings import EmbeddingManager
+from rag.vector_store import VectorStore
+from rag.numpy_index import NumpyIndexClient
+
+load_dotenv()
+
+DEFAULT_COLLECTION = "assistly_knowledge"
+
+_lock = threading.RLock()
+_clients = {}             # (backend, persist_dir, dtype) -> index client
+_embedding_managers = {}  # (model, base_url) -> EmbeddingManager
+_vector_stores = {}       # (backend, dtype, persist_dir, collection, model) -> VectorStore
+
+def _default_persist_dir() -> str:
+    return os.path.abspath(os.getenv("CHROMA_PERSIST_DIR", "./chroma_db"))
+
+def _backend_settings() -> tuple:
+    backend = os.getenv("VECTOR_BACKEND", "chroma").lower()
+    if backend not in ("chroma", "numpy"):
+        raise ValueError(f"Unknown VECTOR_BACKEND {backend!r} (use 'chroma' or 'numpy')")
+    dtype = os.getenv("VECTOR_DTYPE", "float32") if backend == "numpy" else ""
+    return backend, dtype
+
+def get_chroma_client(persist_dir: str = None):
+    """Get the shared persistent Chroma client for a directory"""
+    persist_dir = os.path.abspath(persist_dir) if persist_dir else _default_persist_dir()
+    key = ("chroma", persist_dir, "")
+    with _lock:
+        if key not in _clients:
+            _clients[key] = chromadb.PersistentClient(path=persist_dir)
+        return _clients[key]
+
+def get_numpy_client(persist_dir: str = None, dtype: str = "float32") -> NumpyIndexClient:
+    """Get the shared NumPy index client for a directory and storage dtype"""
+    persist_dir = os.path.abspath(persist_dir) if persist_dir else _default_persist_dir()
+    key = ("numpy", persist_dir, dtype)
+    with _lock:
+        if key not in _clients:
+            _clients[key] = NumpyIndexClient(os.path.join(persist_dir, f"numpy_{dtype}"), dtype)
+        return _clients[key]
+
+def get_embedding_manager(model: str = None, base_url: str = None) -> EmbeddingManager:
+    """Get the shared EmbeddingManager for a model"""
+    model = model or os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+    base_url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    key = (model, base_url)
+    with _lock:
+        if key not in _embedding_managers:
+            _embedding_managers[key] = EmbeddingManager(model=model, base_url=base_url)
+        return _embedding_managers[key]
+
+def get_vector_store(collection_name: str = DEFAULT_COLLECTION,
+                     persist_dir: str = None, model: str = None) -> VectorStore:
+    """Get the shared VectorStore for (backend, persist dir, collection, model)"""
+    persist_dir = os.path.abspath(persist_dir) if persist_dir else _default_persist_dir()
+    backend, dtype = _backend_settings()
+    embedding_manager = get_embedding_manager(model)
+    key = (backend, dtype, persist_dir, collection_name, embedding_manager.model)
+    with _lock:
+        if key not in _vector_stores:
+            if backend == "numpy":
+                client = get_numpy_client(persist_dir, dtype)
+            else:
+                client = get_chroma_client(persist_dir)
+            _vector_stores[key] = VectorStore(
+                collection_name=collection_name,
+                client=client,
+                embedding_manager=embedding_manager,
+                persist_dir=persist_dir
+            )
+        return _vector_stores[key]
+
+def reset_resources():
+    """Forget all shared resources (next call creates fresh ones)"""
+    with _lock:
+        _vector_stores.clear()
+        _embedding_managers.clear()
+        _clients.clear()
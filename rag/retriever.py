@@ -1,40 +1,203 @@
 """
 RAG Retriever - searches knowledge base and formats context for agents
+Hybrid retrieval: BM25 and vector rankings fused with reciprocal rank
+fusion, with a lexical-only fast path when the term match is decisive
 """
 from rag.vector_store import VectorStore
-from typing import List
+from rag.resources import get_vector_store
+from typing import Dict, List, Optional
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+NO_CONTEXT_MESSAGE = "No relevant information found in knowledge base."
+
+RETRIEVAL_MODES = ("hybrid", "vector", "lexical")
+
+# Knowledge base topics (see rag/document_loader.py) each specialist searches
+ROUTE_TOPICS = {
+    "billing": ("billing", "general"),
+    "technical": ("technical", "general"),
+    "sales": ("sales", "general"),
+}
+
+def route_n_results_from_env() -> Dict[str, int]:
+    """Chunks put into each specialist's prompt (RETRIEVAL_N_RESULTS_<ROUTE>)"""
+    defaults = {"billing": 2, "technical": 3, "sales": 2}
+    return {
+        route: int(os.getenv(f"RETRIEVAL_N_RESULTS_{route.upper()}", str(default)))
+        for route, default in defaults.items()
+    }
+
+def retrieval_settings_from_env() -> Dict:
+    """Read retrieval configuration from RETRIEVAL_* / HYBRID_* / LEXICAL_* variables"""
+    return {
+        'mode': os.getenv('RETRIEVAL_MODE', 'hybrid').lower(),
+        'vector_weight': float(os.getenv('HYBRID_VECTOR_WEIGHT', '1.0')),
+        'lexical_weight': float(os.getenv('HYBRID_LEXICAL_WEIGHT', '1.0')),
+        'rrf_k': int(os.getenv('HYBRID_RRF_K', '60')),
+        'candidates': int(os.getenv('HYBRID_CANDIDATES', '20')),
+        'fast_path': os.getenv('LEXICAL_FAST_PATH', 'true').lower() in ('1', 'true', 'yes'),
+        'fast_path_min_score': float(os.getenv('LEXICAL_FAST_PATH_MIN_SCORE', '3.0')),
+        'fast_path_margin': float(os.getenv('LEXICAL_FAST_PATH_MARGIN', '1.5')),
+    }
+
+def reciprocal_rank_fusion(rankings: List[List[Dict]], weights: List[float], k: int = 60) -> List[Dict]:
+    """Merge ranked result lists by sum of weight / (k + rank), keyed by chunk id"""
+    fused = {}
+    scores = {}
+    for results, weight in zip(rankings, weights):
+        for rank, doc in enumerate(results, 1):
+            fused.setdefault(doc['id'], doc)
+            scores[doc['id']] = scores.get(doc['id'], 0.0) + weight / (k + rank)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [{**fused[doc_id], 'rrf_score': scores[doc_id]} for doc_id in ranked]
 
 class RAGRetriever:
-    def __init__(self):
-        self.vector_store = VectorStore()
+    def __init__(self, vector_store: VectorStore = None, settings: Dict = None):
+        # Default to the process-wide shared store
+        self.vector_store = vector_store or get_vector_store()
+        self.settings = {**retrieval_settings_from_env(), **(settings or {})}
+        self.route_n_results = route_n_results_from_env()
+        if self.settings['mode'] not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown RETRIEVAL_MODE {self.settings['mode']!r} (use one of {RETRIEVAL_MODES})")
     
     def retrieve_context(self, query: str, n_results: int = 3) -> str:
         """
         Retrieve relevant context for a query
         Returns formatted string with sources
         """
-        results = self.vector_store.search(query, n_results=n_results)
+        return self._format_context(self.search(query, n_results))
+    
+    async def aretrieve_context(self, query: str, n_results: int = 3) -> str:
+        """Async version of retrieve_context"""
+        return self._format_context(await self.asearch(query, n_results))
+    
+    def search(self, query: str, n_results: int = 3, where: Dict = None) -> List[Dict]:
+        """Ranked chunks for a query according to the retrieval mode"""
+        if self.settings['mode'] == "vector":
+            return self.vector_store.search(query, n_results=n_results, where=where)
         
-        if not results:
-            return "No relevant information found in knowledge base."
+        lexical = self.vector_store.lexical_search(query, n_results=self._candidates(n_results), where=where)
+        decided = self._lexical_decision(lexical, n_results)
+        if decided is not None:
+            return decided
+        
+        dense = self.vector_store.search(query, n_results=self._candidates(n_results), where=where)
+        return self._fuse(dense, lexical, n_results)
+    
+    async def asearch(self, query: str, n_results: int = 3, where: Dict = None) -> List[Dict]:
+        """Async version of search (the BM25 lookup is in-memory and runs inline)"""
+        if self.settings['mode'] == "vector":
+            return await self.vector_store.asearch(query, n_results=n_results, where=where)
         
-        # Format context
-        context_parts = []
-        for i, doc in enumerate(results, 1):
-            source = doc['metadata'].get('source', 'unknown')
-            content = doc['content']
-            context_parts.append(f"[Source {i}: {source}]\n{content}\n")
+        lexical = self.vector_store.lexical_search(query, n_results=self._candidates(n_results), where=where)
+        decided = self._lexical_decision(lexical, n_results)
+        if decided is not None:
+            return decided
+        
+        dense = await self.vector_store.asearch(query, n_results=self._candidates(n_results), where=where)
+        return self._fuse(dense, lexical, n_results)
+    
+    def _candidates(self, n_results: int) -> int:
+        return max(n_results, self.settings['candidates'])
+    
+    def _lexical_decision(self, lexical: List[Dict], n_results: int) -> Optional[List[Dict]]:
+        """Lexical results when they can answer alone, else None (run the vector search)"""
+        if self.settings['mode'] == "lexical":
+            return lexical[:n_results]
+        if not self.settings['fast_path'] or not lexical:
+            return None
         
-        return "\n".join(context_parts)
+        # Decisive: the best chunk contains every query term, scores well and clearly leads
+        top = lexical[0]
+        runner_up = lexical[1]['score'] if len(lexical) > 1 else 0.0
+        if (top['coverage'] >= 0.999
+                and top['score'] >= self.settings['fast_path_min_score']
+                and top['score'] >= self.settings['fast_path_margin'] * runner_up):
+            return lexical[:n_results]
+        return None
+    
+    def _fuse(self, dense: List[Dict], lexical: List[Dict], n_results: int) -> List[Dict]:
+        return reciprocal_rank_fusion(
+            [dense, lexical],
+            [self.settings['vector_weight'], self.settings['lexical_weight']],
+            k=self.settings['rrf_k']
+        )[:n_results]
+    
+    def _format_context(self, results: List[dict]) -> str:
+        if not results:
+            return NO_CONTEXT_MESSAGE
+        return "\n".join(self.format_chunks(results))
+    
+    def format_chunks(self, results: List[dict]) -> List[str]:
+        """One formatted '[Source i: file]' block per result, best first"""
+        return [
+            f"[Source {i}: {doc['metadata'].get('source', 'unknown')}]\n{doc['content']}\n"
+            for i, doc in enumerate(results, 1)
+        ]
+    
+    # Route-scoped retrieval
+    def route_scope(self, route: str) -> tuple:
+        """(metadata filter, n_results) for a specialist route"""
+        topics = ROUTE_TOPICS.get(route)
+        where = {"topic": {"$in": list(topics)}} if topics else None
+        return where, self.route_n_results.get(route, 3)
+    
+    def search_for_route(self, route: str, query: str) -> List[Dict]:
+        """Search only the route's topics, with the route's n_results"""
+        where, n_results = self.route_scope(route)
+        results = self.search(query, n_results, where)
+        if not results and where:
+            # Chunks indexed before topics existed: fall back to the whole knowledge base
+            results = self.search(query, n_results)
+        return results
+    
+    async def asearch_for_route(self, route: str, query: str) -> List[Dict]:
+        """Async version of search_for_route"""
+        where, n_results = self.route_scope(route)
+        results = await self.asearch(query, n_results, where)
+        if not results and where:
+            results = await self.asearch(query, n_results)
+        return results
+    
+    def retrieve_for_route(self, route: str, query: str) -> str:
+        """Formatted context from search_for_route"""
+        return self._format_context(self.search_for_route(route, query))
+    
+    async def aretrieve_for_route(self, route: str, query: str) -> str:
+        """Async version of retrieve_for_route"""
+        return self._format_context(await self.asearch_for_route(route, query))
+    
+    def retrieve_chunks_for_route(self, route: str, query: str) -> List[str]:
+        """Formatted chunks from search_for_route, best first (for prompt budgeting)"""
+        return self.format_chunks(self.search_for_route(route, query))
+    
+    async def aretrieve_chunks_for_route(self, route: str, query: str) -> List[str]:
+        """Async version of retrieve_chunks_for_route"""
+        return self.format_chunks(await self.asearch_for_route(route, query))
     
     def retrieve_for_billing(self, query: str) -> str:
         """Specialized retrieval for billing queries"""
-        return self.retrieve_context(query, n_results=3)
+        return self.retrieve_for_route("billing", query)
     
     def retrieve_for_technical(self, query: str) -> str:
         """Specialized retrieval for technical queries"""
-        return self.retrieve_context(query, n_results=3)
+        return self.retrieve_for_route("technical", query)
     
     def retrieve_for_sales(self, query: str) -> str:
         """Specialized retrieval for sales/product queries"""
-        return self.retrieve_context(query, n_results=3)
\ No newline at end of file
+        return self.retrieve_for_route("sales", query)
+    
+    async def aretrieve_for_billing(self, query: str) -> str:
+        """Async version of retrieve_for_billing"""
+        return await self.aretrieve_for_route("billing", query)
+    
+    async def aretrieve_for_technical(self, query: str) -> str:
+        """Async version of retrieve_for_technical"""
+        return await self.aretrieve_for_route("technical", query)
+    
+    async def aretrieve_for_sales(self, query: str) -> str:
+        """Async version of retrieve_for_sales"""
+        return await self.aretrieve_for_route("sales", query)
\ No newline at end of file
@@ -1,11 +1,17 @@
 """
-One-time setup script to load knowledge base into vector store
-Run this after creating knowledge base documents
+Setup script to load knowledge base into vector store
+Run this after creating or editing knowledge base documents; only new or
+changed chunks are embedded (use --rebuild to re-index everything).
+With --checkpoint FILE, an interrupted run resumes without re-embedding the
+batches it already wrote.
 """
+import argparse
+import os
 from rag.document_loader import DocumentLoader
-from rag.vector_store import VectorStore
+from rag.resources import get_vector_store
+from rag.indexer import KnowledgeBaseIndexer
 
-def setup_rag():
+def setup_rag(rebuild: bool = False, checkpoint_path: str = None):
     print("=" * 60)
     print("ASSISTLY RAG SETUP")
     print("=" * 60)
@@ -21,18 +27,20 @@ def setup_rag():
     
     # Initialize vector store
     print("\n🔧 Initializing vector store...")
-    vector_store = VectorStore()
+    vector_store = get_vector_store()
     
-    # Clear existing data (optional, comment out if you want to keep old data)
-    # vector_store.clear_collection()
+    # Start from an empty collection only when asked to (and forget any earlier progress)
+    if rebuild:
+        vector_store.clear_collection()
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
     
-    # Add documents to vector store
-    print("\n💾 Adding documents to vector store...")
-    texts = [doc['content'] for doc in documents]
-    metadatas = [doc['metadata'] for doc in documents]
-    ids = [f"{doc['metadata']['source']}_{doc['metadata']['chunk_id']}" for doc in documents]
-    
-    vector_store.add_documents(texts, metadatas, ids)
+    # Embed and upsert new/changed chunks, delete removed ones
+    print("\n💾 Indexing documents...")
+    report = KnowledgeBaseIndexer(vector_store, loader, checkpoint_path=checkpoint_path).index(documents)
+    print(f"   ➕ {report.added} added, ✏️ {report.updated} updated, "
+          f"🗑️ {report.deleted} deleted, {report.unchanged} unchanged "
+          f"({report.seconds:.1f}s)")
     
     # Verify
     count = vector_store.get_collection_count()
@@ -51,4 +59,9 @@ def setup_rag():
         print(f"  Content: {result['content'][:100]}...")
 
 if __name__ == "__main__":
-    setup_rag()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Index the knowledge base into the vector store")
+    parser.add_argument("--rebuild", action="store_true", help="clear the collection and re-index everything")
+    parser.add_argument("--checkpoint", metavar="FILE",
+                        help="record finished batches here so an interrupted run resumes where it stopped")
+    args = parser.parse_args()
+    setup_rag(rebuild=args.rebuild, checkpoint_path=args.checkpoint)
\ No newline at end of file
@@ -1,7 +1,9 @@
 """
-Vector store manager using ChromaDB
+Vector store manager using ChromaDB (or the NumPy index, see rag/resources.py)
 Stores and retrieves document embeddings
 """
+import asyncio
+import threading
 from chromadb import Client
 from chromadb.config import Settings
 import chromadb
@@ -9,24 +11,47 @@ from typing import List, Dict
 import os
 from dotenv import load_dotenv
 from rag.embeddings import EmbeddingManager
+from rag.bulk_ingest import BulkIngestor, ingest_settings_from_env
+from rag.lexical_index import LexicalIndex
+from rag.kb_version import KBVersionReader, get_kb_version
+from observability.log import get_logger
+from observability.tracing import span
 
 load_dotenv()
 
+logger = get_logger(__name__)
+
 class VectorStore:
-    def __init__(self, collection_name: str = "assistly_knowledge"):
-        # Initialize ChromaDB with persistent storage
-        persist_dir = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
+    def __init__(self, collection_name: str = "assistly_knowledge",
+                 client=None, embedding_manager: EmbeddingManager = None,
+                 persist_dir: str = None):
+        self.persist_dir = persist_dir or os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
+        
+        # Use the injected client, or initialize ChromaDB with persistent storage
+        if client is None:
+            client = chromadb.PersistentClient(path=self.persist_dir)
         
-        self.client = chromadb.PersistentClient(path=persist_dir)
-        self.embedding_manager = EmbeddingManager()
+        self.client = client
+        self.embedding_manager = embedding_manager or EmbeddingManager()
+        self.collection_name = collection_name
         
         # Get or create collection
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
+        self.collection = self._get_or_create_collection()
+        
+        # BM25 index over the same chunks, loaded on first lexical search
+        self.lexical_index_path = os.path.join(self.persist_dir, f"lexical_{collection_name}.json")
+        self._lexical_index = None
+        self._lexical_lock = threading.Lock()
+        self._kb_version = KBVersionReader(self.persist_dir)
+    
+    def _get_or_create_collection(self):
+        return self.client.get_or_create_collection(
+            name=self.collection_name,
             metadata={"description": "Assistly knowledge base"}
         )
     
-    def add_documents(self, texts: List[str], metadatas: List[Dict] = None, ids: List[str] = None):
+    def add_documents(self, texts: List[str], metadatas: List[Dict] = None, ids: List[str] = None,
+                      checkpoint_path: str = None):
         """Add documents to vector store"""
         if not ids:
             ids = [f"doc_{i}" for i in range(len(texts))]
@@ -34,38 +59,127 @@ class VectorStore:
         if not metadatas:
             metadatas = [{"source": "unknown"} for _ in texts]
         
-        # Generate embeddings
-        embeddings = self.embedding_manager.embed_documents(texts)
+        # Embed and write in batches (see rag/bulk_ingest.py)
+        self._bulk_ingestor(checkpoint_path).ingest(texts, metadatas, ids)
+        self._invalidate_lexical_index()
         
-        # Add to collection
-        self.collection.add(
-            embeddings=embeddings,
-            documents=texts,
-            metadatas=metadatas,
-            ids=ids
-        )
+        logger.info("✅ Added %d documents to vector store", len(texts))
+    
+    def upsert_documents(self, texts: List[str], metadatas: List[Dict], ids: List[str],
+                         checkpoint_path: str = None):
+        """Insert new documents or replace existing ones with the same ids"""
+        self._bulk_ingestor(checkpoint_path).ingest(texts, metadatas, ids)
+        self._invalidate_lexical_index()
+        logger.info("✅ Upserted %d documents to vector store", len(texts))
+    
+    def _bulk_ingestor(self, checkpoint_path: str = None) -> BulkIngestor:
+        return BulkIngestor(self, checkpoint_path=checkpoint_path, **ingest_settings_from_env())
+    
+    def delete_documents(self, ids: List[str]):
+        """Delete documents by id"""
+        self.collection.delete(ids=ids)
+        self._invalidate_lexical_index()
+        logger.info("🗑️ Deleted %d documents from vector store", len(ids))
+    
+    def get_metadatas(self) -> Dict[str, Dict]:
+        """Metadata of every stored document, keyed by id"""
+        results = self.collection.get(include=["metadatas"])
+        return dict(zip(results['ids'], results['metadatas']))
+    
+    # Lexical index
+    def rebuild_lexical_index(self) -> LexicalIndex:
+        """Rebuild the BM25 index from every stored chunk and save it"""
+        with self._lexical_lock:
+            return self._rebuild_lexical_index_locked()
+    
+    def _rebuild_lexical_index_locked(self) -> LexicalIndex:
+        results = self.collection.get(include=["documents", "metadatas"])
+        index = LexicalIndex.build(results['ids'], results['documents'], results['metadatas'],
+                                   kb_version=get_kb_version(self.persist_dir))
+        index.save(self.lexical_index_path)
+        self._lexical_index = index
+        return index
+    
+    def get_lexical_index(self) -> LexicalIndex:
+        """The BM25 index for the current knowledge base version"""
+        index = self._lexical_index
+        if index is not None and index.kb_version == self._kb_version.get():
+            return index
         
-        print(f"✅ Added {len(texts)} documents to vector store")
+        # Confirm a mismatch on disk (the version read may be up to an interval old)
+        kb_version = self._kb_version.refresh()
+        if index is not None and index.kb_version == kb_version:
+            return index
+        with self._lexical_lock:
+            index = self._lexical_index
+            if index is None or index.kb_version != kb_version:
+                # Re-indexed by another process: load its index, or build one
+                index = LexicalIndex.load(self.lexical_index_path)
+                if index is None or index.kb_version != kb_version:
+                    index = self._rebuild_lexical_index_locked()
+                self._lexical_index = index
+            return index
+    
+    def _invalidate_lexical_index(self):
+        """Drop the saved BM25 index after a write; the next lexical search rebuilds it"""
+        with self._lexical_lock:
+            self._lexical_index = None
+            if os.path.exists(self.lexical_index_path):
+                os.remove(self.lexical_index_path)
+    
+    def lexical_search(self, query: str, n_results: int = 3, where: Dict = None) -> List[Dict]:
+        """Search by BM25 term matching (no embedding call)"""
+        index = self.get_lexical_index()
+        with span("lexical_search"):
+            return index.search(query, n_results, where=where)
     
-    def search(self, query: str, n_results: int = 3) -> List[Dict]:
-        """Search for similar documents"""
+    # Dense search
+    def search(self, query: str, n_results: int = 3, where: Dict = None) -> List[Dict]:
+        """Search for similar documents, optionally only those whose metadata matches where"""
         query_embedding = self.embedding_manager.embed_text(query)
+        return self._query(query_embedding, n_results, where)
+    
+    async def asearch(self, query: str, n_results: int = 3, where: Dict = None) -> List[Dict]:
+        """Async version of search (embedding over async HTTP, Chroma query on a worker thread)"""
+        query_embedding = await self.embedding_manager.aembed_text(query)
+        return await asyncio.to_thread(self._query, query_embedding, n_results, where)
+    
+    def search_many(self, queries: List[str], n_results: int = 3, where: Dict = None) -> List[List[Dict]]:
+        """Search for several queries with one index call"""
+        query_embeddings = self.embedding_manager.embed_documents(queries)
+        return self._query_many(query_embeddings, n_results, where)
+    
+    async def asearch_many(self, queries: List[str], n_results: int = 3,
+                           where: Dict = None) -> List[List[Dict]]:
+        """Async version of search_many"""
+        query_embeddings = await self.embedding_manager.aembed_documents(queries)
+        return await asyncio.to_thread(self._query_many, query_embeddings, n_results, where)
+    
+    def _query(self, query_embedding: List[float], n_results: int, where: Dict = None) -> List[Dict]:
+        return self._query_many([query_embedding], n_results, where)[0]
+    
+    def _query_many(self, query_embeddings: List[List[float]], n_results: int,
+                    where: Dict = None) -> List[List[Dict]]:
+        with span("vector_search", queries=len(query_embeddings)):
+            results = self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=where or None
+            )
         
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results
-        )
-        
-        # Format results
-        documents = []
-        for i in range(len(results['documents'][0])):
-            documents.append({
-                'content': results['documents'][0][i],
-                'metadata': results['metadatas'][0][i],
-                'distance': results['distances'][0][i]
-            })
-        
-        return documents
+        # Format results, one list per query
+        return [
+            [
+                {
+                    'id': results['ids'][q][i],
+                    'content': results['documents'][q][i],
+                    'metadata': results['metadatas'][q][i],
+                    'distance': results['distances'][q][i]
+                }
+                for i in range(len(results['documents'][q]))
+            ]
+            for q in range(len(query_embeddings))
+        ]
     
     def get_collection_count(self) -> int:
         """Get number of documents in collection"""
@@ -73,5 +187,8 @@ class VectorStore:
     
     def clear_collection(self):
         """Delete all documents from collection"""
-        self.client.delete_collection(self.collection.name)
-        print(f"✅ Cleared collection: {self.collection.name}")
\ No newline at end of file
+        self.client.delete_collection(self.collection_name)
+        # Recreate it so this (possibly shared) store stays usable
+        self.collection = self._get_or_create_collection()
+        self._invalidate_lexical_index()
+        logger.info("✅ Cleared collection: %s", self.collection_name)
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""Tests for the semantic answer cache (graph/answer_cache.py)"""
+from agents.conversation_memory import prior_turns
+from graph.answer_cache import AnswerCache
+
+class KeywordEmbeddings:
+    """Embeds text as word counts over a fixed vocabulary"""
+    VOCABULARY = ["payment", "methods", "accept", "refund", "policy", "plan"]
+
+    def embed_text(self, text: str):
+        words = text.lower().replace("?", "").split()
+        return [float(words.count(word)) for word in self.VOCABULARY]
+
+def ui_history(messages, query):
+    """The history app.py sends: session messages with the new prompt already appended"""
+    return prior_turns(query, messages + [{"role": "user", "content": query}])
+
+def test_first_turn_faq_from_the_ui_hits_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("CHROMA_PERSIST_DIR", str(tmp_path))
+    cache = AnswerCache(KeywordEmbeddings())
+    query = "What payment methods do you accept?"
+
+    # First customer asks; the answer is generated and stored
+    history = ui_history([], query)
+    assert history == []
+    assert cache.applies_to("billing", query, history)
+    answer, vector = cache.lookup("billing", "PLAN_PRO", query)
+    assert answer is None
+    cache.store("billing", "PLAN_PRO", vector, "Cards and PayPal.")
+
+    # Another session on the same plan asks the same first question
+    history = ui_history([], query)
+    assert cache.applies_to("billing", query, history)
+    assert cache.lookup("billing", "PLAN_PRO", query)[0] == "Cards and PayPal."
+
+def test_later_turns_and_personal_questions_are_not_cached():
+    cache = AnswerCache(KeywordEmbeddings())
+    earlier = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello!"}]
+    query = "What payment methods do you accept?"
+    assert not cache.applies_to("billing", query, ui_history(earlier, query))
+    assert not cache.applies_to("billing", "Why did my payment fail?", [])
+    assert not cache.applies_to("technical", query, [])
+
+def test_prior_turns_keeps_histories_without_the_query():
+    earlier = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello!"}]
+    assert prior_turns("Refund policy?", earlier) == earlier
+    assert prior_turns("Refund policy?", None) == []
@@ -0,0 +1,32 @@
+"""Tests for checkpointed bulk ingestion (rag/bulk_ingest.py)"""
+from types import SimpleNamespace
+from rag.bulk_ingest import BulkIngestor, checkpoint_key
+
+class RecordingCollection:
+    def __init__(self):
+        self.rows = {}
+    
+    def upsert(self, embeddings, documents, metadatas, ids):
+        self.rows.update(zip(ids, documents))
+    
+    def count(self):
+        return len(self.rows)
+
+def vector_store():
+    embedder = SimpleNamespace(embed_documents=lambda texts: [[float(len(text))] for text in texts])
+    return SimpleNamespace(collection=RecordingCollection(), embedding_manager=embedder)
+
+def test_checkpointed_document_edited_before_rerun_is_embedded_again(tmp_path):
+    checkpoint = str(tmp_path / "ingest.checkpoint")
+    store = vector_store()
+    ingestor = BulkIngestor(store, batch_size=1, max_workers=1, checkpoint_path=checkpoint, verbose=False)
+    # An interrupted run finished "a" and "b" as they were then
+    ingestor._save_checkpoint([checkpoint_key("a", "old text", {}), checkpoint_key("b", "same text", {})])
+    
+    report = ingestor.ingest(["new text", "same text", "other"], [{}, {}, {}], ["a", "b", "c"])
+    assert report.skipped == 1
+    assert store.collection.rows == {"a": "new text", "c": "other"}
+
+def test_checkpoint_keys_follow_the_indexer_content_hash():
+    assert checkpoint_key("a", "text", {"content_hash": "h1"}) == ("a", "h1")
+    assert checkpoint_key("a", "text", {"content_hash": "h2"}) != checkpoint_key("a", "text", {"content_hash": "h1"})
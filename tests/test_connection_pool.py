@@ -0,0 +1,61 @@
+"""Tests for the shared connection pool (database/connection_pool.py), without a database server"""
+import psycopg2
+from psycopg2 import extensions
+from database import connection_pool
+from database.connection_pool import ConnectionPool
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if self.conn.bad_state:
+            raise psycopg2.DatabaseError("connection left in a bad state")
+
+class FakeConnection:
+    closed = 0
+
+    def __init__(self):
+        self.bad_state = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        if self.bad_state:
+            raise psycopg2.DatabaseError("connection left in a bad state")
+
+    def get_transaction_status(self):
+        return extensions.TRANSACTION_STATUS_INERROR if self.bad_state else extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+def test_connection_failing_its_health_check_frees_its_slot(monkeypatch):
+    monkeypatch.setattr(connection_pool.psycopg2, "connect", lambda **params: FakeConnection())
+    pool = ConnectionPool({}, min_size=0, max_size=1, timeout=0.1, health_check_after=0)
+
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.bad_state = True
+
+    replacement = pool.acquire()
+    assert replacement is not conn
+    assert conn.closed
+    pool.release(replacement)
+
+def test_connection_failing_rollback_on_release_frees_its_slot(monkeypatch):
+    monkeypatch.setattr(connection_pool.psycopg2, "connect", lambda **params: FakeConnection())
+    pool = ConnectionPool({}, min_size=0, max_size=1, timeout=0.1)
+
+    conn = pool.acquire()
+    conn.bad_state = True
+    pool.release(conn)
+
+    assert pool.acquire() is not conn
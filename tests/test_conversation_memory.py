@@ -0,0 +1,40 @@
+"""Tests for the rolling conversation memory (agents/conversation_memory.py)"""
+from types import SimpleNamespace
+from agents.conversation_memory import ConversationMemory
+
+class CountingLLM:
+    """Summarizer stand-in that reports how many calls it has answered"""
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return SimpleNamespace(content=f"summary {self.calls}")
+
+def conversation(turns: int):
+    history = []
+    for turn in range(turns):
+        history += [{"role": "user", "content": f"question {turn}"},
+                    {"role": "assistant", "content": f"answer {turn}"}]
+    return history
+
+def memory():
+    return ConversationMemory({"recent_messages": 2, "summarize_every": 2, "workers": 1}, llm=CountingLLM())
+
+def test_ui_history_with_the_query_matches_earlier_turns_only():
+    earlier = conversation(3)
+    query = "question 3"
+    plain, ui = memory(), memory()
+
+    expected = plain.context("CUST001", earlier, query)
+    context = ui.context("CUST001", earlier + [{"role": "user", "content": query}], query)
+    assert context == expected
+    assert all(message["content"] != query for message in context.recent)
+
+    # Summaries are folded at the same point, so the next turn reuses them
+    plain.wait()
+    ui.wait()
+    assert plain.llm.calls == ui.llm.calls == 1
+    later = earlier + [{"role": "user", "content": query}, {"role": "assistant", "content": "answer 3"}]
+    assert ui.context("CUST001", later + [{"role": "user", "content": "question 4"}], "question 4") == \
+        plain.context("CUST001", later, "question 4")
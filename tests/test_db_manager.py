@@ -0,0 +1,69 @@
+"""Tests for DatabaseManager cache handling (database/db_manager.py), without a database server"""
+from contextlib import contextmanager
+from types import SimpleNamespace
+from database.db_manager import DatabaseManager
+from database.reference_cache import ReferenceCache
+
+class FakeCursor:
+    rowcount = 1
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def execute(self, query, params=None):
+        pass
+
+class FakeDatabaseManager(DatabaseManager):
+    """DatabaseManager whose SELECTs return canned plan rows and whose writes go nowhere"""
+    def __init__(self):
+        self.reference_cache = ReferenceCache(ttl=3600)
+        self.customer_cache = None
+        self.pool = None
+        self.selects = 0
+    
+    @contextmanager
+    def connection(self):
+        yield SimpleNamespace(cursor=lambda **options: FakeCursor(), commit=lambda: None)
+    
+    def execute_query(self, query, params=None):
+        self.selects += 1
+        return [{"plan_id": "PLAN_PRO", "price": 29.99, "active": True, "customer_id": "CUST001",
+                 "name": "John Doe", "email": "john@example.com"}]
+
+def test_plan_updates_drop_cached_plans():
+    db = FakeDatabaseManager()
+    db.get_all_plans()
+    db.get_all_plans()
+    assert db.selects == 1
+    
+    db.execute_update("UPDATE plans SET price = %s WHERE plan_id = %s", (39.99, "PLAN_PRO"))
+    db.get_all_plans()
+    assert db.selects == 2
+
+def test_customer_writes_drop_the_cached_directory():
+    db = FakeDatabaseManager()
+    db.get_customer_directory()
+    db.execute_update("INSERT INTO customers (customer_id, name) VALUES (%s, %s)", ("CUST999", "New"))
+    db.get_customer_directory()
+    assert db.selects == 2
+
+def test_other_writes_keep_reference_data():
+    db = FakeDatabaseManager()
+    db.get_all_plans()
+    db.execute_update("UPDATE tickets SET status = 'resolved' WHERE ticket_id = %s", (1,), customer_id="CUST001")
+    db.get_all_plans()
+    assert db.selects == 1
+    db.execute_update("UPDATE tickets SET status = 'resolved'", tables=["plans"])
+    db.get_all_plans()
+    assert db.selects == 2
+
+def test_cached_plans_are_returned_as_copies():
+    db = FakeDatabaseManager()
+    db.get_plan("PLAN_PRO")["price"] = 0
+    db.get_all_plans()[0]["price"] = 0
+    db.get_all_plans().clear()
+    assert db.get_plan("PLAN_PRO")["price"] == 29.99
+    assert db.get_all_plans()[0]["price"] == 29.99
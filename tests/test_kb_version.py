@@ -0,0 +1,19 @@
+"""Tests for the knowledge base version marker (rag/kb_version.py)"""
+from rag.kb_version import KBVersionReader, bump_kb_version, get_kb_version
+
+def test_reader_rereads_at_most_every_interval(tmp_path):
+    persist_dir = str(tmp_path)
+    first = bump_kb_version(persist_dir)
+    reader = KBVersionReader(persist_dir, interval=3600)
+    assert reader.get() == first
+    
+    second = bump_kb_version(persist_dir)
+    assert reader.get() == first
+    assert reader.refresh() == second == get_kb_version(persist_dir)
+
+def test_reader_without_interval_always_reads(tmp_path):
+    persist_dir = str(tmp_path)
+    reader = KBVersionReader(persist_dir, interval=0)
+    assert reader.get() == ""
+    version = bump_kb_version(persist_dir)
+    assert reader.get() == version
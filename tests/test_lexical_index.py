@@ -0,0 +1,31 @@
+"""Tests for the BM25 lexical index (rag/lexical_index.py)"""
+from rag.lexical_index import LexicalIndex, tokenize
+
+def test_inflections_share_a_term():
+    assert len(set(tokenize("charge charges charged charging"))) == 1
+    assert len(set(tokenize("stop stopped stopping stops"))) == 1
+    assert len(set(tokenize("bill bills billed billing"))) == 1
+
+def test_compound_tokens_kept_whole_and_split():
+    assert tokenize("ERR_503") == ["err_503", "err", "503"]
+
+def test_query_matches_other_inflections():
+    index = LexicalIndex.build(
+        ids=["a", "b"],
+        documents=["You were charged twice for the same invoice", "Reset your password from the login page"],
+        metadatas=[{"topic": "billing"}, {"topic": "technical"}],
+    )
+    results = index.search("charge")
+    assert [result['id'] for result in results] == ["a"]
+
+def test_index_from_older_tokenizer_is_not_loaded(tmp_path):
+    path = str(tmp_path / "lexical.json")
+    index = LexicalIndex.build(ids=["a"], documents=["charges"], metadatas=[{}])
+    index.save(path)
+    assert LexicalIndex.load(path) is not None
+    
+    with open(path, encoding="utf-8") as f:
+        data = f.read().replace('"tokenizer": 2', '"tokenizer": 1')
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data)
+    assert LexicalIndex.load(path) is None
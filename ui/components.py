@@ -7,7 +7,7 @@ from database.db_manager import DatabaseManager
 def show_billing_history(customer_id: str):
     """Display customer's billing history"""
     db = DatabaseManager()
-    billing = db.get_billing_history(customer_id)
+    billing = db.get_billing_history(customer_id, limit=5)  # Show last 5
     
     if not billing:
         st.info("No billing history found")
@@ -15,7 +15,7 @@ def show_billing_history(customer_id: str):
     
     st.subheader("💳 Billing History")
     
-    for record in billing[:5]:  # Show last 5
+    for record in billing:
         status_emoji = "✅" if record['status'] == 'paid' else "❌" if record['status'] == 'failed' else "⏳"
         
         with st.expander(f"{status_emoji} {record['billing_date']} - ${record['amount']}"):
@@ -26,22 +26,18 @@ def show_billing_history(customer_id: str):
 def show_tickets(customer_id: str):
     """Display customer's support tickets"""
     db = DatabaseManager()
-    tickets = db.get_tickets(customer_id)
-    
-    if not tickets:
-        st.info("No support tickets found")
-        return
-    
     st.subheader("🎫 Support Tickets")
     
-    # Filter by status
+    # Filter by status (applied in the database query)
     status_filter = st.radio("Filter", ["All", "Open", "In Progress", "Resolved"], horizontal=True)
+    status = None if status_filter == "All" else status_filter.lower().replace(" ", "_")
+    tickets = db.get_tickets(customer_id, status=status)
     
-    filtered_tickets = tickets
-    if status_filter != "All":
-        filtered_tickets = [t for t in tickets if t['status'] == status_filter.lower().replace(" ", "_")]
+    if not tickets:
+        st.info("No support tickets found")
+        return
     
-    for ticket in filtered_tickets:
+    for ticket in tickets:
         status_color = {
             'open': '🔴',
             'in_progress': '🟡',